@@ -0,0 +1,124 @@
+import datetime as dt
+
+import pandas as pd
+import streamlit as st
+import plotly.express as px
+
+from atualizadorDados import get_atualizador
+from cacheRender import get_cache
+from instrumentacao import historico
+
+
+# =============================
+# Tabelas do histórico de execuções
+# =============================
+def tabela_execucoes(execucoes: list) -> pd.DataFrame:
+    """Uma linha por execução, da mais recente para a mais antiga."""
+    linhas = []
+    for i, ex in enumerate(execucoes):
+        acertos = sum(c["acertos"] for c in ex.cache.values())
+        falhas = sum(c["falhas"] for c in ex.cache.values())
+        linhas.append({
+            "id": i,
+            "Execução": ex.nome,
+            "Início": dt.datetime.fromtimestamp(ex.inicio),
+            "Total (s)": round(ex.total_s or 0.0, 3),
+            "Etapas": len(ex.etapas),
+            "Cache (acertos)": acertos,
+            "Cache (falhas)": falhas,
+        })
+    colunas = ["id", "Execução", "Início", "Total (s)", "Etapas", "Cache (acertos)", "Cache (falhas)"]
+    return pd.DataFrame(linhas, columns=colunas).iloc[::-1].reset_index(drop=True)
+
+
+def tabela_etapas(ex) -> pd.DataFrame:
+    """Etapas de uma execução na ordem em que rodaram, recuadas pelo nível."""
+    out = pd.DataFrame(ex.etapas, columns=["etapa", "nivel", "s", "mem_mb"])
+    out["Etapa"] = [" " * n + e for e, n in zip(out["etapa"], out["nivel"])]
+    return out.rename(columns={"s": "Tempo (s)", "mem_mb": "Δ memória (MB)"})
+
+
+def estatisticas_etapas(execucoes: list) -> pd.DataFrame:
+    """Por (execução, etapa): quantas vezes rodou, média, p95 e máximo do tempo."""
+    linhas = [
+        {"Execução": ex.nome, "Etapa": e["etapa"], "s": e["s"]}
+        for ex in execucoes for e in ex.etapas if e["s"] is not None
+    ]
+    if not linhas:
+        return pd.DataFrame(columns=["Execução", "Etapa", "N", "Média (s)", "p95 (s)", "Máx (s)"])
+    g = pd.DataFrame(linhas).groupby(["Execução", "Etapa"])["s"]
+    out = g.agg(N="size", **{"Média (s)": "mean", "Máx (s)": "max"})
+    out["p95 (s)"] = g.quantile(0.95)
+    out = out.reset_index()[["Execução", "Etapa", "N", "Média (s)", "p95 (s)", "Máx (s)"]]
+    return out.sort_values("p95 (s)", ascending=False).round(4).reset_index(drop=True)
+
+
+def estatisticas_cache(execucoes: list) -> pd.DataFrame:
+    """Acertos e falhas somados por cache em todo o histórico."""
+    total: dict[str, dict[str, int]] = {}
+    for ex in execucoes:
+        for nome, c in ex.cache.items():
+            t = total.setdefault(nome, {"acertos": 0, "falhas": 0})
+            t["acertos"] += c["acertos"]
+            t["falhas"] += c["falhas"]
+    out = pd.DataFrame(
+        [{"Cache": k, "Acertos": v["acertos"], "Falhas": v["falhas"]} for k, v in total.items()],
+        columns=["Cache", "Acertos", "Falhas"],
+    )
+    chamadas = out["Acertos"] + out["Falhas"]
+    out["Acerto (%)"] = (out["Acertos"] / chamadas.where(chamadas > 0) * 100).round(1)
+    return out.sort_values("Cache").reset_index(drop=True)
+
+
+# =============================
+# Página
+# =============================
+def exibirDesempenho():
+    st.title("Desempenho")
+    st.caption("Tempo por etapa das últimas execuções deste processo (não inclui esta página).")
+
+    execucoes = [ex for ex in historico() if ex.nome != "Desempenho"]
+
+    st.subheader("Fontes de dados")
+    status = pd.DataFrame(get_atualizador().status())
+    if not status.empty:
+        status["Versão"] = status["Versão"].astype(str)
+    st.dataframe(status, width="stretch", hide_index=True)
+
+    if not execucoes:
+        st.info("Nenhuma execução registrada ainda. Abra uma das páginas e volte aqui.")
+        return
+
+    tabela = tabela_execucoes(execucoes)
+    st.subheader("Execuções recentes")
+    sel = st.dataframe(
+        tabela.drop(columns="id"), width="stretch", hide_index=True,
+        on_select="rerun", selection_mode="single-row", key="perf_execucao",
+    )
+    linhas = sel.selection.rows if sel is not None else []
+    ex = execucoes[int(tabela.loc[linhas[0], "id"])] if linhas else execucoes[-1]
+
+    st.subheader(f"Etapas: {ex.nome} ({ex.total_s or 0:.3f}s)")
+    etapas = tabela_etapas(ex)
+    if etapas.empty:
+        st.info("Execução sem etapas medidas.")
+    else:
+        c1, c2 = st.columns([1, 1])
+        c1.dataframe(etapas[["Etapa", "Tempo (s)", "Δ memória (MB)"]], width="stretch", hide_index=True)
+        # só o primeiro nível no gráfico: os níveis de baixo já estão dentro deles
+        topo = etapas[etapas["nivel"] == 0]
+        fig = px.bar(topo, x="Tempo (s)", y="etapa", orientation="h", title="Tempo por etapa (nível 1)",
+                     labels={"etapa": ""})
+        fig.update_layout(yaxis={"categoryorder": "array", "categoryarray": list(topo["etapa"])[::-1]})
+        c2.plotly_chart(fig, width="stretch")
+
+    st.subheader("Etapas no histórico")
+    st.dataframe(estatisticas_etapas(execucoes), width="stretch", hide_index=True)
+
+    st.subheader("Caches")
+    render = get_cache().estatisticas()
+    st.caption(
+        f"Cache de render: {render['itens']} itens, {render['MB']:.1f} MB "
+        f"({render['descartes']} descartados pelo LRU)."
+    )
+    st.dataframe(estatisticas_cache(execucoes), width="stretch", hide_index=True)
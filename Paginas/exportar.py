@@ -0,0 +1,55 @@
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pandas as pd
+import streamlit as st
+
+from exportacao import FORMATOS, get_exportador
+
+
+# =============================
+# Painel de exportação (usado pelas páginas)
+# =============================
+@st.fragment(run_every=1.5)
+def _acompanhar(chave: str) -> None:
+    """Atualiza só este trecho enquanto a tarefa roda; ao terminar, refaz a página."""
+    tarefa = get_exportador().status(st.session_state[f"{chave}_tarefa"])
+    if tarefa is None or tarefa["estado"] in ("pronto", "erro"):
+        st.rerun()
+    st.caption(f"⏳ Gerando {tarefa['arquivo']}... {tarefa['linhas']:,} linhas gravadas".replace(",", "."))
+
+
+def painel_exportacao(chave: str, titulo: str, nome: str, gerar: Callable[[], Iterable[pd.DataFrame]],
+                      aba_por: str | None = None) -> None:
+    """
+    Expander com formato + botão: o arquivo é gerado em blocos pelo
+    exportador em segundo plano e oferecido para download quando fica
+    pronto. `gerar` monta os blocos com a seleção atual; só roda no worker.
+    """
+    with st.expander(f"⬇️ Exportar {titulo}"):
+        c1, c2 = st.columns([3, 1])
+        formato = c1.segmented_control("Formato", list(FORMATOS), default="CSV", key=f"{chave}_formato") or "CSV"
+        exportador = get_exportador()
+        if c2.button("Gerar arquivo", key=f"{chave}_gerar", width="stretch"):
+            st.session_state[f"{chave}_tarefa"] = exportador.submeter(nome, gerar, formato, aba_por)
+
+        tid = st.session_state.get(f"{chave}_tarefa")
+        tarefa = exportador.status(tid) if tid else None
+        if tarefa is None:
+            st.caption("O arquivo usa os filtros atuais e é gerado em segundo plano.")
+        elif tarefa["estado"] in ("na fila", "gerando"):
+            _acompanhar(chave)
+        elif tarefa["estado"] == "erro":
+            st.error(f"Falha na exportação: {tarefa['erro']}")
+        elif not Path(tarefa["caminho"]).exists():
+            st.caption("O arquivo gerado expirou; gere de novo.")
+        else:
+            caminho = tarefa["caminho"]
+            st.download_button(
+                f"Baixar {tarefa['arquivo']} ({tarefa['linhas']:,} linhas)".replace(",", "."),
+                # lido do disco só no clique
+                data=Path(caminho).read_bytes,
+                file_name=tarefa["arquivo"],
+                mime=tarefa["mime"],
+                key=f"{chave}_baixar",
+            )
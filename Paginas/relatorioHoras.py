@@ -1,191 +1,155 @@
 import os
 import streamlit as st
-import plotly.express as px
-import datetime as dt
 from planilhaLoader import *
-import plotly.graph_objects as go
+from horasAgregados import medias_dia_semana
+from horasFiguras import (
+    preparar_mapa, figura_mapa, figura_pizza,
+    figura_mensal, figura_ano_a_ano, figura_dia_semana,
+)
+from atualizadorDados import get_atualizador
+from fontesDados import registrar_fontes
+from exportacao import blocos_horas
+from Paginas.exportar import painel_exportacao
+from cacheRender import memo
+from instrumentacao import etapa, medido
+from orcamentoRender import tamanho_figura, tamanho_tabela
 
 BASE_DIR = get_base_dir()
 FILE_PATH = get_excel_path()
 ICON_LOGO = os.path.join(BASE_DIR, "Logos", "mills_logo_branca.png")
 LOGO_PATH = os.path.join(BASE_DIR, "Logos", "mills_logo_branca.svg")
 
-MONTH_MAP = {
-    "janeiro": 1, "fevereiro": 2, "março": 3, "abril": 4,
-    "maio": 5, "junho": 6, "julho": 7, "agosto": 8,
-    "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12
-}
+# normalmente já registradas na subida do app (fontesDados.iniciar)
+registrar_fontes()
 
-DOW_ORDER = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
-DOW_MAP = {0: "Seg", 1: "Ter", 2: "Qua", 3: "Qui", 4: "Sex", 5: "Sáb", 6: "Dom"}
 
+def dados_horas() -> tuple:
+    """(versão do Excel, tabelas de carregar_horas)."""
+    with st.spinner("Carregando o Excel..."), etapa("horas.dados"):
+        return get_atualizador().obter("horas")
 
-def get_month_number(sheet_name: str) -> int | None:
-    return MONTH_MAP.get(sheet_name.strip().lower())
 
-
-def hhmmss_to_minutes(x: str) -> float:
-    if not isinstance(x, str) or ":" not in x:
-        return 0.0
-    h, m, s = x.split(":")
-    return int(h) * 60 + int(m) + int(s) / 60
-
-def hhmmss_to_hours(x: str) -> float:
-    """Converte HH:MM:SS para horas (float)"""
-    if not isinstance(x, str) or ":" not in x:
-        return 0.0
-    h, m, s = x.split(":")
-    return int(h) + int(m) / 60 + int(s) / 3600
+def plotar(nome: str, chave, construir) -> None:
+    """
+    st.plotly_chart da figura de `construir`; com `chave` (que inclui a
+    versão do Excel) a figura sai do cache de render.
+    """
+    fig = construir() if chave is None else memo("graficos", nome, chave, construir, tamanho_figura)
+    st.plotly_chart(fig, width="stretch")
 
 
+@medido("horas.tabela")
 def relatorio():
     if not os.path.exists(FILE_PATH):
         st.error("❌ Arquivo não encontrado: Planilhas/Controle de Horas Mills.xlsx")
         st.stop()
-    sheet_names = list_sheets(FILE_PATH)
+    # todas as worksheets carregadas de uma vez; trocar de mês é só um filtro
+    versao, dados = dados_horas()
+    horas = dados["horas"]
+    sheet_names = list(horas["Planilha"].unique())
     sheet_selected = st.selectbox("📄 Worksheet", sheet_names, index=max(0, len(sheet_names) - 1))
-    df = load_sheet(FILE_PATH, sheet_selected)
-    df = recortar_planilha(df)                   
-    df = fix_duration_column(df, "Total - Monitoramento")
-    df = fix_duration_column(df, "Total - Desenvolvimento")
-    df = fix_duration_column(df, "Total")
+    df = horas[horas["Planilha"] == sheet_selected].drop(columns=["Planilha", "Mes"]).reset_index(drop=True)
     st.subheader(f"📌 {sheet_selected}")
-    st.dataframe(df, use_container_width=True, height=650)
-    return df, sheet_selected
+    tabela = memo("tabelas", "horas.tabela", (versao, sheet_selected), lambda: formatar_duracoes(df), tamanho_tabela)
+    st.dataframe(tabela, width="stretch", height=650)
+    # no XLSX cada worksheet vira uma aba
+    painel_exportacao("exp_horas", "todas as worksheets", "horas",
+                      lambda: blocos_horas(horas, sheet_names), aba_por="Planilha")
+    return df, sheet_selected, versao
 
 
-def mapa_dia_mes_08_17(df: pd.DataFrame, titulo="Mapa de horas (08:00–17:00)"):
+@medido("horas.mapa")
+def mapa_dia_mes_08_17(df: pd.DataFrame, titulo="Mapa de horas (08:00–17:00)", versao=None):
     if df is None or df.empty:
         st.info("Sem dados para gerar o mapa.")
         return
-
-    # ✅ ignora "Soma"
-    df_plot = df[df["Dia"].astype(str).str.strip().str.lower() != "soma"].copy()
+    # com a versão do Excel, tabela e figura saem do cache de render
+    chave = (versao, titulo) if versao is not None else None
+    if chave is None:
+        df_plot = preparar_mapa(df)
+    else:
+        df_plot = memo("tabelas", "horas.mapa", chave, lambda: preparar_mapa(df), tamanho_tabela)
     if df_plot.empty:
         st.warning("Sem dados (apenas linha de soma).")
         return
-
-    # mantém só o que interessa e ordena por dia (tenta ordenar pelo número no começo)
-    df_plot["DiaLabel"] = df_plot["Dia"].astype(str).str.strip()
-
-    # tenta extrair número do dia (serve pra "01/12" e "1")
-    df_plot["DiaNum"] = pd.to_numeric(df_plot["DiaLabel"].str.extract(r"(\d+)")[0], errors="coerce")
-    df_plot = df_plot.sort_values(["DiaNum", "DiaLabel"], na_position="last")
-
-    # converte tempos para horas
-    df_plot["Monit_h"] = df_plot["Total - Monitoramento"].map(hhmmss_to_hours)
-    df_plot["Dev_h"]   = df_plot["Total - Desenvolvimento"].map(hhmmss_to_hours)
-
-    # opcional: limitar a janela 08-17 (9h) para caber no eixo
-    # se quiser mostrar tudo, remova o clip (mas aí pode “passar” de 17:00)
-    df_plot["Monit_h"] = df_plot["Monit_h"].clip(lower=0, upper=9)
-    df_plot["Dev_h"]   = df_plot["Dev_h"].clip(lower=0, upper=9)
-
-    start_hour = 8
-    end_hour = 17
-    max_window = end_hour - start_hour  # 9 horas
-
-    # se quiser que a soma não passe de 9h, ajusta proporcionalmente
-    total = df_plot["Monit_h"] + df_plot["Dev_h"]
-    scale = (max_window / total).where(total > max_window, 1.0)
-    df_plot["Monit_h"] = df_plot["Monit_h"] * scale
-    df_plot["Dev_h"]   = df_plot["Dev_h"] * scale
-
-    y = df_plot["DiaLabel"]
-
-    fig = go.Figure()
-
-    # 1) Monitoramento (começa em 08:00)
-    fig.add_trace(go.Bar(
-        y=y,
-        x=df_plot["Monit_h"],
-        base=start_hour,
-        orientation="h",
-        name="Monitoramento",
-        marker=dict(color="#FAA43A"),
-        hovertemplate="Dia: %{y}<br>Monitoramento: %{x:.2f}h<extra></extra>",
-    ))
-
-    # 2) Desenvolvimento 
-    fig.add_trace(go.Bar(
-        y=y,
-        x=df_plot["Dev_h"],
-        base=start_hour + df_plot["Monit_h"],
-        orientation="h",
-        name="Desenvolvimento",
-        marker=dict(color="#5DA5DA"),
-        hovertemplate="Dia: %{y}<br>Desenvolvimento: %{x:.2f}h<extra></extra>",
-    ))
-
-    tickvals = list(range(start_hour, end_hour + 1))
-    ticktext = [f"{h:02d}:00" for h in tickvals]
-
-    fig.update_layout(
-        template="simple_white",
-        title=titulo,
-        barmode="overlay", 
-        xaxis=dict(
-            range=[start_hour, end_hour],
-            tickmode="array",
-            tickvals=tickvals,
-            ticktext=ticktext,
-            side="top",
-            title="",
-        ),
-        yaxis=dict(
-            title="Dia",
-            autorange="reversed"
-        ),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        margin=dict(l=60, r=30, t=80, b=30),
-        height=max(420, 22 * len(df_plot))
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    plotar("horas.mapa", chave, lambda: figura_mapa(df_plot, titulo))
     return df_plot
 
-def graficoPizza(df_plot):
+@medido("horas.pizza")
+def graficoPizza(df_plot, chave=None):
     if df_plot is None or df_plot.empty:
         st.info("Sem dados para gerar o gráfico de pizza.")
         return
-    total_monit_h = df_plot["Monit_h"].sum()
-    total_dev_h   = df_plot["Dev_h"].sum()
-    if total_monit_h == 0 and total_dev_h == 0:
+    if df_plot["Monit_h"].sum() == 0 and df_plot["Dev_h"].sum() == 0:
         st.warning("Tempo total zerado — não há dados para exibir.")
         return
-    df_pie = pd.DataFrame({
-        "Tipo": ["Monitoramento", "Desenvolvimento"],
-        "Horas": [total_monit_h, total_dev_h]
-    })
-    fig = px.pie(
-        df_pie,
-        names="Tipo",
-        values="Horas",
-        title="Distribuição do tempo total",
-        hole=0.35,  # donut (mais profissional)
-        color="Tipo",
-        color_discrete_map={
-            "Monitoramento": "#FAA43A",
-            "Desenvolvimento": "#5DA5DA",
-        }
-    )
-    fig.update_traces(
-        textinfo="percent+label",
-        marker=dict(line=dict(color="#000000", width=1))
-    )
-    fig.update_layout(
-        template="simple_white",
-        showlegend=True
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    plotar("horas.pizza", chave, lambda: figura_pizza(df_plot))
 
 
 def exibir():
-    df, sheet_selected = relatorio()
-    df_plot = mapa_dia_mes_08_17(df, sheet_selected)
-    graficoPizza(df_plot)
+    df, sheet_selected, versao = relatorio()
+    df_plot = mapa_dia_mes_08_17(df, sheet_selected, versao)
+    graficoPizza(df_plot, (versao, sheet_selected))
+
+
+
+# =============================
+# VISÃO ANUAL
+# =============================
+# `chave` (versão do Excel + anos selecionados) liga o cache de render
+@medido("horas.grafico_mensal")
+def grafico_mensal(mensal: pd.DataFrame, chave=None):
+    plotar("horas.mensal", chave, lambda: figura_mensal(mensal))
+
+
+@medido("horas.grafico_ano_a_ano")
+def grafico_ano_a_ano(mensal: pd.DataFrame, chave=None):
+    plotar("horas.ano_a_ano", chave, lambda: figura_ano_a_ano(mensal))
+
+
+@medido("horas.grafico_dia_semana")
+def grafico_dia_semana(semana: pd.DataFrame, chave=None):
+    plotar("horas.dia_semana", chave, lambda: figura_dia_semana(semana))
+
+
+def exibirAnual():
+    if not os.path.exists(FILE_PATH):
+        st.error("❌ Arquivo não encontrado: Planilhas/Controle de Horas Mills.xlsx")
+        st.stop()
+    versao, agregado = dados_horas()
+    diario, mensal = agregado["diario"], agregado["mensal"]
+    if diario.empty:
+        st.info("Sem dados para a visão anual.")
+        return
+
+    anos = sorted(mensal["Ano"].unique())
+    anos_sel = st.multiselect("📅 Ano", anos, default=anos)
+    if anos_sel:
+        mensal = mensal[mensal["Ano"].isin(anos_sel)]
+        diario = diario[diario["Ano"].isin(anos_sel)]
+        # as médias por dia da semana dependem do recorte; com todos os anos vêm prontas
+        semana = agregado["semana"] if len(anos_sel) == len(anos) else \
+            medias_dia_semana(diario)
+    else:
+        semana = agregado["semana"]
+
+    st.subheader("📆 Visão anual")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Horas totais", f"{mensal['Total_h'].sum():,.1f}".replace(",", "."))
+    c2.metric("Monitoramento", f"{mensal['Monit_h'].sum():,.1f}h".replace(",", "."))
+    c3.metric("Desenvolvimento", f"{mensal['Dev_h'].sum():,.1f}h".replace(",", "."))
+    c4.metric("Dias trabalhados", int(mensal["Dias"].sum()))
+
+    chave = (versao, anos_sel)
+    grafico_mensal(mensal, chave)
+    if mensal["Ano"].nunique() > 1:
+        grafico_ano_a_ano(mensal, chave)
+    grafico_dia_semana(semana, chave)
+
+    st.dataframe(
+        mensal[["Periodo", "Dias", "Monit_h", "Dev_h", "Total_h", "Monit_pct"]].rename(columns={
+            "Periodo": "Mês", "Monit_h": "Monitoramento (h)", "Dev_h": "Desenvolvimento (h)",
+            "Total_h": "Total (h)", "Monit_pct": "% Monitoramento",
+        }).round(1),
+        width="stretch", hide_index=True,
+    )
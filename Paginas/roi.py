@@ -3,174 +3,81 @@ import pandas as pd
 import streamlit as st
 import plotly.express as px
 
-from csvLoader import get_csv_path
-
-
-# =============================
-# Leitura + formatação
-# =============================
-@st.cache_data(show_spinner=False)
-def load_roi_csv(path: str) -> pd.DataFrame:
-    # ajuste encoding/sep se necessário
-    return pd.read_csv(path, sep=";", encoding="latin1")
-
-JOB_COLORS = {
-    "JOB_NASA_VA": "#FAA43A",
-    "JOB_NASA_CME_NF": "#5DA5DA",
-    "JOB_NASA_CME_ST": "#60BD68",
-    "JOB_SD_ZVF31_ECP": "#F10C29",
-    "JOB_NASA_J3GH": "#B2912F",
-    "JOB_SD_J1BFNE_ECP": "#B276B2",
-}
-
-
-def _parse_duration_to_minutes(series: pd.Series) -> pd.Series:
+from atualizadorDados import get_atualizador
+from fontesDados import registrar_fontes
+from instrumentacao import etapa, cache_medido
+from csvLoader import get_csv_path, listar_particoes
+from roiAgregados import (
+    kpis_cubo, contar_por_cubo, tempo_medio_cubo, variancia_cubo,
+    carga_node_cubo, heatmap_cubo, filtrar_cubo,
+    SketchPorGrupo, PERCENTIS, limiar_por_linha,
+)
+from roiIndice import COLUNAS_FILTRO
+from roiStreaming import outliers_em_blocos, MAX_OUTLIERS
+import roiSqlite
+from orcamentoRender import OrcamentoPagina, top_n_outros, reduzir_serie, MAX_CATEGORIAS
+from roiTendencias import tendencias, FREQS
+from roiFiguras import (
+    JOB_COLORS, figura_top_jobs, figura_por_hora, figura_tempo_medio,
+    figura_nodes, figura_cenarios,
+)
+from roiAnomalias import filtrar_sinalizadas, resumo_anomalias, JANELA, K_EWMA, Z_ROBUSTO, MIN_EXCESSO_MIN
+from exportacao import blocos_roi, blocos_tabela
+from Paginas.exportar import painel_exportacao
+from roiConcorrencia import concorrencia_por_hora, resumo_concorrencia, perfil_hora_do_dia
+
+# normalmente já registradas na subida do app (fontesDados.iniciar)
+registrar_fontes()
+
+@cache_medido("roi.outliers_streaming", st.cache_data(show_spinner="Buscando outliers..."))
+def outliers_streaming(path: str, versao: tuple, limiar: float | dict, inicio, fim, filtros: dict) -> pd.DataFrame:
+    return outliers_em_blocos(path, limiar, inicio, fim, filtros)
+
+@cache_medido("roi.outliers_sqlite", st.cache_data(show_spinner="Buscando outliers..."))
+def outliers_sqlite(db: str, limiar: float | dict, inicio, fim, filtros: dict) -> pd.DataFrame:
+    # o nome do banco já muda com a versão da fonte
+    return roiSqlite.outliers(db, limiar, inicio, fim, filtros)
+
+@cache_medido("roi.tendencias", st.cache_data(show_spinner=False))
+def tendencias_cache(versao: tuple, freq: str, por: str, q: float, inicio, fim, filtros: dict, _dados: dict) -> pd.DataFrame:
+    """Séries da aba Tendências; recalculadas só quando muda a versão do CSV ou a seleção."""
+    cubo = _dados["cubo"]
+    df = None
+    if inicio is not None or any(filtros.values()):
+        cubo = filtrar_cubo(cubo, inicio, fim, filtros)
+    if freq == "h" and "sqlite" in _dados:
+        df = roiSqlite.linhas(_dados["sqlite"], ["Data Início", por, "Duracao_min"], inicio, fim, filtros)
+    elif freq == "h" and not _dados["streaming"]:
+        df = _dados["df"].iloc[_dados["indice"].posicoes(inicio, fim, filtros)]
+    return tendencias(cubo, _dados.get("sketch_dia"), q, freq, por, inicio, fim, filtros, df)
+
+@cache_medido("roi.concorrencia", st.cache_data(show_spinner="Calculando concorrência..."))
+def concorrencia_cache(versao: tuple, inicio, fim, filtros: dict, _dados: dict) -> dict:
+    """Varredura de intervalos por Node (precisa das linhas: df em memória ou banco SQLite)."""
+    if "sqlite" in _dados:
+        df = roiSqlite.linhas(_dados["sqlite"], ["Node", "Data Início", "Data Fim"], inicio, fim, filtros)
+    else:
+        df = _dados["df"].iloc[_dados["indice"].posicoes(inicio, fim, filtros)]
+    por_hora = concorrencia_por_hora(df, "Node")
+    return {
+        "resumo": resumo_concorrencia(df, "Node"),
+        "por_hora": por_hora,
+        "perfil": perfil_hora_do_dia(por_hora, "Node"),
+    }
+
+def jobs_long(df: pd.DataFrame, q: float = 0.99, sketch: SketchPorGrupo | None = None,
+              por_job: bool = False) -> pd.DataFrame:
     """
-    Converte uma coluna de duração para minutos.
-    Aceita:
-      - número em segundos (int/float)
-      - texto "HH:MM:SS"
-      - texto "0 days 00:12:33"
+    Linhas acima do quantil q de Duracao_min. Com `sketch` o limiar sai dos
+    sketches (global ou do Job de cada linha) em vez de um quantile sobre o df.
     """
-    # tenta numérico (segundos)
-    s_num = pd.to_numeric(series, errors="coerce")
-    if s_num.notna().any():
-        # assume que é segundos
-        return (s_num / 60.0)
-
-    # tenta to_timedelta para textos
-    td = pd.to_timedelta(series, errors="coerce")
-    return td.dt.total_seconds() / 60.0
-
-
-def formatacao_csv(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-
-    # Datas
-    # Tenta com formato fixo; se falhar, cai no parse genérico
-    if "Data Início" in df.columns:
-        df["Data Início"] = pd.to_datetime(df["Data Início"], format="%d/%m/%Y %H:%M", errors="coerce")
-        # fallback
-        df["Data Início"] = df["Data Início"].fillna(pd.to_datetime(df["Data Início"], errors="coerce", dayfirst=True))
-
-    if "Data Fim" in df.columns:
-        df["Data Fim"] = pd.to_datetime(df["Data Fim"], format="%d/%m/%Y %H:%M", errors="coerce")
-        df["Data Fim"] = df["Data Fim"].fillna(pd.to_datetime(df["Data Fim"], errors="coerce", dayfirst=True))
-
-    # Duração
-    # Preferência: Total (s) (se existir) -> Duracao_min
-    if "Total (s)" in df.columns:
-        df["Duracao_min"] = _parse_duration_to_minutes(df["Total (s)"])
-    elif "Duração" in df.columns:
-        df["Duracao_min"] = _parse_duration_to_minutes(df["Duração"])
-    else:
-        # se tiver começo/fim, calcula
-        if "Data Início" in df.columns and "Data Fim" in df.columns:
-            df["Duracao_min"] = (df["Data Fim"] - df["Data Início"]).dt.total_seconds() / 60.0
-        else:
-            df["Duracao_min"] = pd.NA
-
-    # Hora do dia (para heatmap/hist)
-    if "Data Início" in df.columns:
-        df["Hora"] = df["Data Início"].dt.hour
-
-    return df
-
-def volume_exec(df: pd.DataFrame) -> pd.DataFrame:
-    top_jobs = (
-        df["Job"]
-        .value_counts()
-        .rename_axis("Job")          # <- garante o nome da 1ª coluna
-        .reset_index(name="Execuções")  # <- garante o nome da contagem
-        .head(10)
-    )
-    return top_jobs
-
-
-def tempo_medio_exec(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
-    if "Job" not in df.columns or "Duracao_min" not in df.columns:
-        return pd.DataFrame(columns=["Job", "Tempo médio (min)"])
-    out = (
-        df.groupby("Job", as_index=False)["Duracao_min"]
-        .mean()
-        .rename(columns={"Duracao_min": "Tempo médio (min)"})
-        .sort_values("Tempo médio (min)", ascending=False)
-        .head(top_n)
-    )
-    return out
-
-
-def carga_node(df: pd.DataFrame) -> pd.DataFrame:
-    # tenta achar uma coluna de ID/registro para contagem
-    count_col = "Código" if "Código" in df.columns else None
-    if "Node" not in df.columns or "Duracao_min" not in df.columns:
-        return pd.DataFrame(columns=["Node", "Execucoes", "Tempo_Total_min", "Tempo_Medio_min"])
-
-    if count_col is None:
-        # se não houver "Código", conta linhas
-        out = (
-            df.groupby("Node", as_index=False)
-            .agg(
-                Execucoes=("Duracao_min", "count"),
-                Tempo_Total_min=("Duracao_min", "sum"),
-                Tempo_Medio_min=("Duracao_min", "mean"),
-            )
-        )
-    else:
-        out = (
-            df.groupby("Node", as_index=False)
-            .agg(
-                Execucoes=(count_col, "count"),
-                Tempo_Total_min=("Duracao_min", "sum"),
-                Tempo_Medio_min=("Duracao_min", "mean"),
-            )
-        )
-
-    return out.sort_values("Execucoes", ascending=False)
-
-
-def heatmap_execs_por_hora(df: pd.DataFrame) -> pd.DataFrame:
-    # na prática é “volume por hora”
-    if "Hora" not in df.columns:
-        return pd.DataFrame(columns=["Hora", "Execuções"])
-    base_col = "Código" if "Código" in df.columns else None
-    if base_col:
-        out = df.groupby("Hora")[base_col].count().reset_index(name="Execuções")
-    else:
-        out = df.groupby("Hora").size().reset_index(name="Execuções")
-    return out.sort_values("Hora")
-
-
-def variancia_jobs(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
-    if "Job" not in df.columns or "Duracao_min" not in df.columns:
-        return pd.DataFrame(columns=["Job", "Desvio padrão (min)"])
-    out = (
-        df.groupby("Job", as_index=False)["Duracao_min"]
-        .std()
-        .rename(columns={"Duracao_min": "Desvio padrão (min)"})
-        .sort_values("Desvio padrão (min)", ascending=False)
-        .head(top_n)
-    )
-    return out
-
-
-def exec_ambiente(df: pd.DataFrame) -> pd.DataFrame:
-    col = "Cenário" if "Cenário" in df.columns else ("Cenario" if "Cenario" in df.columns else None)
-    if col is None:
-        return pd.DataFrame(columns=["Cenário", "Execuções"])
-    return (
-        df[col]
-        .value_counts()
-        .reset_index()
-        .rename(columns={"index": "Cenário", col: "Execuções"})
-    )
-
-
-def jobs_long(df: pd.DataFrame, q: float = 0.99) -> pd.DataFrame:
     if "Duracao_min" not in df.columns:
         return pd.DataFrame()
-    thr = df["Duracao_min"].quantile(q)
-    return df[df["Duracao_min"] > thr].copy()
+    if sketch is None:
+        thr = df["Duracao_min"].quantile(q)
+    else:
+        thr = limiar_por_linha(df, sketch, q, por_grupo=por_job)
+    return df[df["Duracao_min"] > thr]
 
 def contar_por(df: pd.DataFrame, col: str, nome_contagem: str = "Execuções", top: int = 10) -> pd.DataFrame:
     """
@@ -188,107 +95,293 @@ def contar_por(df: pd.DataFrame, col: str, nome_contagem: str = "Execuções", t
         .reset_index(name=nome_contagem)  # garante o nome da contagem
     )
     return out
+
+def arredondar(df: pd.DataFrame, casas: int = 2) -> pd.DataFrame:
+    """round() só nas colunas numéricas (nas de data ele só emite aviso)."""
+    return df.round({c: casas for c in df.select_dtypes("number").columns})
+# =============================
+# Filtros
+# =============================
+def opcoes_cubo(cubo: pd.DataFrame) -> tuple:
+    """Período e valores disponíveis para os filtros, tirados do cubo (modo streaming)."""
+    dias = cubo["Dia"].dropna()
+    periodo = (dias.min(), dias.max()) if not dias.empty else None
+    valores = {col: sorted(cubo[col].dropna().astype(str).unique()) for col in COLUNAS_FILTRO}
+    return periodo, valores
+
+
+def filtros_sidebar(periodo: tuple | None, valores: dict[str, list]) -> tuple:
+    """Filtros da sidebar -> (inicio, fim, {coluna: valores}); None/[] = sem filtro."""
+    st.sidebar.header("Filtros")
+    inicio = fim = None
+    if periodo is not None:
+        d0, d1 = periodo[0].date(), periodo[1].date()
+        sel = st.sidebar.date_input("Período (Data Início)", value=(d0, d1), min_value=d0, max_value=d1)
+        if isinstance(sel, (tuple, list)) and len(sel) == 2 and (sel[0], sel[1]) != (d0, d1):
+            inicio = pd.Timestamp(sel[0])
+            fim = pd.Timestamp(sel[1]) + pd.Timedelta(days=1)
+
+    filtros = {
+        col: st.sidebar.multiselect(col, valores[col], placeholder="Todos")
+        for col in COLUNAS_FILTRO if valores.get(col)
+    }
+    return inicio, fim, filtros
+
+
 # =============================
 # Página Streamlit
 # =============================
 def exibirROI():
     path = get_csv_path()
 
-    if not os.path.exists(path):
+    if not listar_particoes(path):
         st.error(f"❌ CSV não encontrado em: {path}")
         st.stop()
 
-    df_raw = load_roi_csv(path)
-    df = formatacao_csv(df_raw)
+    # dataset pronto do atualizador (só espera na primeira carga do processo)
+    with st.spinner("Carregando o CSV..."), etapa("roi.dados"):
+        versao, agg = get_atualizador().obter("roi")
+    streaming = agg["streaming"]
+
+    if streaming:
+        # arquivo grande: só agregados combináveis, nenhuma linha fica em memória
+        periodo, valores = opcoes_cubo(agg["cubo"])
+    else:
+        df = agg["df"]
+        indice = agg["indice"]
+        periodo = indice.periodo()
+        valores = {col: indice.valores(col) for col in COLUNAS_FILTRO}
+
+    # filtros: agregados pelo cubo recortado, linhas pelas posições do índice
+    with etapa("roi.filtros"):
+        inicio, fim, filtros = filtros_sidebar(periodo, valores)
+        filtrado = inicio is not None or any(filtros.values())
+        cubo = agg["cubo"]
+        if filtrado:
+            cubo = filtrar_cubo(cubo, inicio, fim, filtros)
+            if not streaming:
+                df = df.iloc[indice.posicoes(inicio, fim, filtros)]
 
     st.title("ROI — Análises de Execução")
     st.caption(f"Fonte: {os.path.basename(path)}")
+    if "sqlite" in agg:
+        st.caption(f"Backend SQLite: {os.path.basename(agg['sqlite'])}; até {MAX_OUTLIERS:,} outliers listados.")
+    elif streaming:
+        st.caption(
+            f"Modo streaming ({versao[0] / 1024 ** 2:,.0f} MB): "
+            f"até {MAX_OUTLIERS:,} outliers listados."
+        )
 
-    # KPIs rápidos
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Registros", f"{len(df):,}".replace(",", "."))
-    if "Duracao_min" in df.columns:
-        c2.metric("Tempo total (min)", f"{df['Duracao_min'].fillna(0).sum():.1f}")
-        c3.metric("Tempo médio (min)", f"{df['Duracao_min'].dropna().mean():.2f}" if df["Duracao_min"].dropna().size else "—")
-
-    tab1, tab2, tab3, tab4 = st.tabs(["📈 Volume", "⏱️ Tempos", "🖥️ Nodes", "🚨 Outliers"])
-
-    with tab1:
-        top_jobs = contar_por(df, "Job", nome_contagem="Execuções", top=10)
+    # KPIs rápidos (todas as tabelas abaixo saem do cubo, não do df)
+    with etapa("roi.kpis"):
+        kpis = kpis_cubo(cubo)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Registros", f"{kpis['registros']:,}".replace(",", "."))
+        c2.metric("Tempo total (min)", f"{kpis['tempo_total']:.1f}")
+        c3.metric("Tempo médio (min)", f"{kpis['tempo_medio']:.2f}" if kpis["tempo_medio"] is not None else "—")
+
+    if not streaming:
+        with st.expander("Memória do dataset"):
+            mem = agg["memoria"]
+            st.caption(f"{mem['MB'].sum():.2f} MB em memória para {len(agg['df']):,} linhas".replace(",", "."))
+            st.dataframe(mem, width="stretch", hide_index=True)
+
+    # exportação em blocos, no worker: a página não materializa o recorte
+    painel_exportacao("exp_roi", "dados filtrados", "roi",
+                      lambda: blocos_roi(agg, path, inicio, fim, filtros))
+
+    # tudo que vai ao navegador passa pelo orçamento (top-N, paginação, tamanho);
+    # figuras e tabelas ficam no cache de render enquanto versão e filtros não mudam
+    orc = OrcamentoPagina()
+    estado = (versao, inicio, fim, filtros)
+    tab1, tab2, tab3, tab_t, tab4 = st.tabs(["📈 Volume", "⏱️ Tempos", "🖥️ Nodes", "📉 Tendências", "🚨 Outliers"])
+
+    # cada aba é uma etapa no painel de desempenho
+    with tab1, etapa("roi.aba_volume"):
         st.subheader("Top 10 Jobs por volume de execuções")
-        st.dataframe(top_jobs, use_container_width=True, hide_index=True)
+        top_jobs = orc.dataframe(lambda: contar_por_cubo(cubo, "Job", nome_contagem="Execuções", top=10),
+                                 "Top Jobs", chave_cache=estado, hide_index=True)
 
         if not top_jobs.empty:
-            fig = px.bar(
-                top_jobs,
-                x="Job",
-                y="Execuções",
-                color="Job",
-                title="Execuções por Job (Top 10)",
-                color_discrete_map=JOB_COLORS
-            )
+            orc.grafico(lambda: figura_top_jobs(top_jobs), "Execuções por Job", chave_cache=estado)
 
-            fig.update_layout(showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
-
-        heat = heatmap_execs_por_hora(df)
+        heat = heatmap_cubo(cubo)
         if not heat.empty:
             st.subheader("Execuções por hora do dia")
-            figh = px.bar(heat, x="Hora", y="Execuções", title="Execuções por Hora")
-            st.plotly_chart(figh, use_container_width=True)
+            orc.grafico(lambda: figura_por_hora(heat), "Execuções por hora", chave_cache=estado)
 
-    with tab2:
-        tm = tempo_medio_exec(df, top_n=10)
+    with tab2, etapa("roi.aba_tempos"):
         st.subheader("Top 10 Jobs por tempo médio (min)")
-        st.dataframe(tm, use_container_width=True, hide_index=True)
+        tm = orc.dataframe(lambda: tempo_medio_cubo(cubo, top_n=10), "Tempo médio por Job",
+                           chave_cache=estado, hide_index=True)
 
         if not tm.empty:
-            fig2 = px.bar(
-                tm,
-                x="Tempo médio (min)",
-                y="Job",
-                orientation="h",
-                color="Job",
-                title="Tempo médio por Job (Top 10)",
-                color_discrete_map=JOB_COLORS
-            )
-
-            fig2.update_layout(showlegend=False)
-            st.plotly_chart(fig2, use_container_width=True)
-
-        var = variancia_jobs(df, top_n=10)
+            orc.grafico(lambda: figura_tempo_medio(tm), "Tempo médio por Job", chave_cache=estado)
+
+        def tabela_desvio():
+            if "sqlite" in agg and filtrado:
+                # recorte no banco em duas passadas: sem a perda de precisão de soma/soma dos quadrados
+                return roiSqlite.variancia_jobs(agg["sqlite"], 10, inicio, fim, filtros)
+            if streaming and not filtrado and "welford" in agg:
+                # desvio por Welford (estável numericamente em históricos longos)
+                return (
+                    agg["welford"].tabela()[["Job", "Desvio padrão (min)"]]
+                    .sort_values("Desvio padrão (min)", ascending=False)
+                    .head(10)
+                )
+            return variancia_cubo(cubo, top_n=10)
         st.subheader("Top 10 Jobs por instabilidade (desvio padrão)")
-        st.dataframe(var, use_container_width=True, hide_index=True)
+        orc.dataframe(tabela_desvio, "Desvio por Job", chave_cache=estado, hide_index=True)
 
-    with tab3:
-        ns = carga_node(df)
+    with tab3, etapa("roi.aba_nodes"):
+        ns = carga_node_cubo(cubo)
         st.subheader("Carga por Node")
-        st.dataframe(ns, use_container_width=True, hide_index=True)
+        orc.dataframe_paginado(ns, "Carga por Node", chave="pagina_nodes", hide_index=True)
 
         if not ns.empty:
-            fig3 = px.bar(ns, x="Node", y="Execucoes", title="Execuções por Node")
-            st.plotly_chart(fig3, use_container_width=True)
+            # gráfico com os maiores Nodes e o resto somado em "Outros"
+            ns_graf = top_n_outros(ns, "Node", "Execucoes", MAX_CATEGORIAS)
+            orc.grafico(lambda: figura_nodes(ns_graf), "Execuções por Node", chave_cache=estado)
 
-        amb = contar_por(df, "Cenário", nome_contagem="Execuções", top=50)  # top alto pra não “sumir”
+        amb = contar_por_cubo(cubo, "Cenário", nome_contagem="Execuções", top=len(cubo))
 
         if not amb.empty:
             st.subheader("Execuções por Cenário")
-            fig4 = px.pie(amb, names="Cenário", values="Execuções", title="Distribuição por Cenário")
-            st.plotly_chart(fig4, use_container_width=True)
+            amb = top_n_outros(amb, "Cenário", "Execuções", MAX_CATEGORIAS)
+            orc.grafico(lambda: figura_cenarios(amb), "Execuções por Cenário", chave_cache=estado)
 
-    with tab4:
-        outliers = df[df["Duracao_min"] > df["Duracao_min"].quantile(0.99)]
-        st.subheader("Outliers (top 1% em duração)")
-        st.dataframe(outliers, use_container_width=True, height=420)
+        st.subheader("Concorrência por Node")
+        if streaming and "sqlite" not in agg:
+            st.info("A concorrência usa os intervalos de cada execução e não está disponível no modo streaming.")
+        else:
+            conc = concorrencia_cache(versao, inicio, fim, filtros, agg)
+            if conc["resumo"].empty:
+                st.info("Sem execuções com início e fim no período.")
+            else:
+                orc.dataframe(
+                    conc["resumo"].rename(columns={
+                        "Pico": "Pico simultâneo", "Quando": "Primeiro pico",
+                        "Media": "Execuções simultâneas (média)", "Utilizacao_pct": "Utilização (%)",
+                    }).pipe(arredondar),
+                    "Resumo de concorrência", hide_index=True,
+                )
+                def figura_pico():
+                    pico = reduzir_serie(conc["por_hora"], "Hora", "Pico", agg="max", por="Node")
+                    fig6 = px.line(pico, x="Hora", y="Pico", color="Node",
+                                   title="Pico de execuções simultâneas por hora",
+                                   labels={"Hora": "", "Pico": "Execuções simultâneas"})
+                    fig6.update_traces(line_shape="hv")
+                    return fig6
+                orc.grafico(figura_pico, "Pico por hora", chave_cache=estado)
+
+                orc.grafico(
+                    lambda: px.bar(conc["perfil"], x="HoraDia", y="Utilizacao_pct", color="Node", barmode="group",
+                                   title="Utilização média por hora do dia",
+                                   labels={"HoraDia": "Hora do dia", "Utilizacao_pct": "Utilização (%)"},
+                                   hover_data={"Pico_medio": ":.1f", "Pico_max": True}),
+                    "Utilização por hora do dia", chave_cache=estado,
+                )
+
+    with tab_t, etapa("roi.aba_tendencias"):
+        t1, t2, t3 = st.columns(3)
+        gran = t1.segmented_control("Granularidade", list(FREQS), default="Dia", key="tend_gran") or "Dia"
+        por = t2.segmented_control("Por", ["Job", "Node"], default="Job", key="tend_por") or "Job"
+        nome_pt = t3.segmented_control("Percentil", list(PERCENTIS), default="p95", key="tend_pct") or "p95"
+        serie = tendencias_cache(versao, FREQS[gran], por, PERCENTIS[nome_pt], inicio, fim, filtros, agg)
+
+        if serie.empty:
+            st.info("Sem execuções no período selecionado.")
+        else:
+            # no máximo MAX_CATEGORIAS séries; as de maior volume
+            principais = (
+                serie.groupby(por)["Execucoes"].sum()
+                .nlargest(MAX_CATEGORIAS).index
+            )
+            serie = serie[serie[por].isin(principais)]
+            metricas = {"Execuções": "Execucoes", "Duração média (min)": "Media_min",
+                        f"{nome_pt} da duração (min)": nome_pt}
+            if gran == "Hora" and streaming and "sqlite" not in agg:
+                st.caption(f"No modo streaming o {nome_pt} por hora não está disponível.")
+                metricas.pop(f"{nome_pt} da duração (min)")
+            elif filtros.get("Cenário") or filtros.get("Node" if por == "Job" else "Job"):
+                st.caption(f"O {nome_pt} diário/semanal considera só o período e o filtro de {por}.")
+            def figura_tendencia(titulo: str, col: str):
+                pontos = reduzir_serie(serie, "Periodo", col, agg="sum" if col == "Execucoes" else "mean", por=por)
+                fig = px.line(
+                    pontos, x="Periodo", y=col, color=por, markers=gran != "Hora",
+                    title=f"{titulo} por {gran.lower()}",
+                    color_discrete_map=JOB_COLORS if por == "Job" else None,
+                    labels={"Periodo": "", col: titulo},
+                )
+                fig.update_layout(template="simple_white", legend=dict(orientation="h", y=-0.2))
+                return fig
+
+            for titulo, col in metricas.items():
+                orc.grafico(lambda: figura_tendencia(titulo, col), f"Tendência: {titulo}",
+                            chave_cache=(estado, gran, por, nome_pt))
+
+    with tab4, etapa("roi.aba_outliers"):
+        # limiares saem dos sketches de quantis (histórico completo), sem ordenar a coluna
+        sketch = agg["sketch"]
+        o1, o2 = st.columns(2)
+        nome_p = o1.segmented_control("Percentil", list(PERCENTIS), default="p99") or "p99"
+        modo = o2.segmented_control("Limiar", ["Por Job", "Global"], default="Por Job") or "Por Job"
+        q = PERCENTIS[nome_p]
+        por_job = modo == "Por Job"
+
+        if streaming:
+            limiar = sketch.limiares(q) if por_job else sketch.global_().quantil(q)
+            if "sqlite" in agg:
+                outliers = outliers_sqlite(agg["sqlite"], limiar, inicio, fim, filtros)
+            else:
+                outliers = outliers_streaming(path, versao, limiar, inicio, fim, filtros)
+        else:
+            outliers = jobs_long(df, q, sketch=sketch, por_job=por_job)
+
+        with st.expander("Percentis de duração por Job (min)"):
+            orc.dataframe_paginado(sketch.quantis(), "Percentis por Job", chave="pagina_percentis", hide_index=True)
+
+        st.subheader(f"Outliers (acima do {nome_p} {'do Job' if por_job else 'global'} em duração)")
+        orc.dataframe_paginado(outliers, "Outliers", chave="pagina_outliers", height=420)
+        painel_exportacao("exp_outliers", "outliers", "outliers", lambda: blocos_tabela(outliers))
 
         if not outliers.empty and "Job" in outliers.columns:
-            top_out = contar_por(outliers, "Job", nome_contagem="Ocorrências", top=10)
-            fig5 = px.bar(
-                top_out,
-                x="Job",
-                y="Ocorrências",
-                color="Job",
-                title="Jobs mais frequentes nos outliers (Top 10)",
-                color_discrete_map=JOB_COLORS
+            def figura_outliers():
+                top_out = contar_por(outliers, "Job", nome_contagem="Ocorrências", top=10)
+                return px.bar(
+                    top_out,
+                    x="Job",
+                    y="Ocorrências",
+                    color="Job",
+                    title="Jobs mais frequentes nos outliers (Top 10)",
+                    color_discrete_map=JOB_COLORS
+                )
+            orc.grafico(figura_outliers, "Jobs nos outliers", chave_cache=(estado, nome_p, modo))
+
+        st.subheader("Anomalias por Job (linha de base móvel)")
+        det = agg.get("anomalias")
+        if det is None:
+            st.info("As anomalias precisam das linhas em ordem: disponíveis no modo em memória e no backend SQLite.")
+        else:
+            st.caption(
+                f"Cada execução contra o histórico do próprio Job: acima de EWMA + {K_EWMA:g}σ, "
+                f"z robusto > {Z_ROBUSTO:g} sobre a mediana/MAD das últimas {JANELA} execuções "
+                f"e pelo menos {MIN_EXCESSO_MIN:g} min acima da mediana."
             )
-            st.plotly_chart(fig5, use_container_width=True)
\ No newline at end of file
+            sinal = filtrar_sinalizadas(det.sinalizadas, inicio, fim, filtros)
+            if sinal.empty:
+                st.info("Nenhuma anomalia no período selecionado.")
+            else:
+                c1, c2, c3 = st.columns(3)
+                for coluna, col in ((c1, "Job"), (c2, "Node"), (c3, "Cenário")):
+                    with coluna:
+                        orc.dataframe(lambda: resumo_anomalias(sinal, cubo, col), f"Anomalias por {col}",
+                                      chave_cache=estado, hide_index=True)
+                orc.dataframe_paginado(
+                    arredondar(sinal.sort_values("Data Início", ascending=False)),
+                    "Anomalias", chave="pagina_anomalias", hide_index=True,
+                )
+            with st.expander("Linha de base atual por Job"):
+                orc.dataframe(lambda: det.baseline().round(3), "Linha de base", chave_cache=versao, hide_index=True)
+
+    orc.resumo()
\ No newline at end of file
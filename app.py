@@ -1,21 +1,27 @@
 import os
 import base64
+import importlib
 import streamlit as st
-from Paginas import relatorioHoras, roi
-from PIL import Image
-from planilhaLoader import get_base_dir
+from instrumentacao import configurar_log, execucao
+from fontesDados import iniciar as iniciar_fontes
 
-BASE_DIR = get_base_dir()
+# só o necessário para a primeira pintura: pandas/plotly e os loaders
+# entram quando a página que os usa é aberta (ver pagina())
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ICON_LOGO = os.path.join(BASE_DIR, "Logos", "mills_logo_branca.png")
 LOGO_PATH = os.path.join(BASE_DIR, "Logos", "mills_logo_branca.svg")
 
+configurar_log()
+# a primeira carga dos dados começa na subida, não na primeira visita à página
+iniciar_fontes()
+
 st.logo(LOGO_PATH, icon_image=LOGO_PATH )
 
 def img_to_base64(path: str) -> str:
     with open(path, "rb") as f:
         return base64.b64encode(f.read()).decode("utf-8")
 logo_b64 = img_to_base64(ICON_LOGO ) if os.path.exists(ICON_LOGO) else ""
-page_icon = Image.open(ICON_LOGO ) if os.path.exists(ICON_LOGO ) else None
+page_icon = ICON_LOGO if os.path.exists(ICON_LOGO ) else None
 
 st.set_page_config(
     page_title="Central de Relatórios", 
@@ -32,11 +38,28 @@ st.markdown(
     </style> """, 
     unsafe_allow_html=True 
 )
+
+
+def pagina(modulo: str, funcao: str):
+    """Função da st.Page que importa Paginas.<modulo> só na primeira visita."""
+    def exibir():
+        getattr(importlib.import_module(f"Paginas.{modulo}"), funcao)()
+    # mesmo nome da função original: a URL da página não muda
+    exibir.__name__ = funcao
+    return exibir
+
+
 pages = {
     "Relatorios":[
-        st.Page(relatorioHoras.exibir, title="Relatório de Horas"),
-        st.Page(roi.exibirROI, title="ROI")
+        st.Page(pagina("relatorioHoras", "exibir"), title="Relatório de Horas"),
+        st.Page(pagina("relatorioHoras", "exibirAnual"), title="Visão Anual"),
+        st.Page(pagina("roi", "exibirROI"), title="ROI")
     ]
 }
+# painel de desempenho (tempos, caches, caminhos): só com CENTRAL_DEBUG=1 no ambiente do servidor
+if os.environ.get("CENTRAL_DEBUG") == "1":
+    pages["Depuração"] = [st.Page(pagina("desempenho", "exibirDesempenho"), title="Desempenho")]
 pg = st.navigation(pages, position="top")
-pg.run()
\ No newline at end of file
+# cada rodada da página vira uma execução medida (etapas, caches, memória)
+with execucao(pg.title):
+    pg.run()
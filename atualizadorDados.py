@@ -0,0 +1,221 @@
+"""
+Atualização dos datasets em segundo plano.
+
+Uma thread daemon verifica periodicamente (tamanho + mtime) os arquivos
+registrados e, quando um deles muda, recarrega o dataset fora do caminho
+das requisições. Quando a carga termina, a versão nova é trocada de uma vez
+(uma única atribuição da tupla (versao, valor)). Quem está lendo continua
+com a referência antiga até a próxima execução da página. Se a carga falha,
+por exemplo com o arquivo no meio de uma cópia, os dados anteriores
+continuam valendo. A fonte é recarregada assim que o arquivo mudar de
+novo; se continuar igual (ex.: CSV corrompido), as novas tentativas
+esperam cada vez mais, até MAX_ESPERA_S.
+
+Os datasets ficam uma vez só no processo e valem para todas as sessões:
+obter entrega cópias rasas (copy-on-write do pandas) dos DataFrames, que
+compartilham os buffers sem copiar nada; se uma sessão alterar a sua cópia,
+só ela recebe dados novos, e o dataset compartilhado não muda.
+"""
+import glob
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+import pandas as pd
+
+from csvLoader import listar_particoes
+from instrumentacao import execucao
+
+log = logging.getLogger(__name__)
+
+# segundos entre verificações dos arquivos
+INTERVALO_S = float(os.environ.get("ATUALIZADOR_INTERVALO_S", "5"))
+# teto da espera entre tentativas de uma fonte que falha sem o arquivo mudar
+MAX_ESPERA_S = float(os.environ.get("ATUALIZADOR_MAX_ESPERA_S", "600"))
+
+
+def versao_arquivo(path: str) -> tuple[int, ...] | None:
+    """
+    (tamanho, mtime_ns) do arquivo, ou None se ele não existe. Para uma
+    pasta ou glob (fonte particionada): (tamanho total, maior mtime_ns,
+    número de arquivos) dos mesmos CSVs que o loader lê (listar_particoes),
+    que muda quando qualquer um deles entra, sai ou muda. Outros arquivos
+    da pasta (ex.: um .tmp sendo gravado) não contam.
+    """
+    if os.path.isdir(path) or glob.has_magic(path):
+        stats = []
+        for p in listar_particoes(path):
+            try:
+                stats.append(os.stat(p))
+            except FileNotFoundError:
+                continue
+        if not stats:
+            return None
+        return sum(s.st_size for s in stats), max(s.st_mtime_ns for s in stats), len(stats)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def visao(valor: Any) -> Any:
+    """
+    Visão sem cópia de um dataset compartilhado: DataFrames/Series viram
+    cópias rasas (copy-on-write) e dicts são percorridos; o resto é
+    devolvido como está e deve ser tratado como somente leitura.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy(deep=False)
+    if isinstance(valor, dict):
+        return {k: visao(v) for k, v in valor.items()}
+    return valor
+
+
+class _Fonte:
+    def __init__(self, nome: str, path: str, carregar: Callable[[str], Any]):
+        self.nome = nome
+        self.path = path
+        self.carregar = carregar
+        # (versao, valor) trocado atomicamente; None até a primeira carga
+        self.estado: tuple[tuple, Any] | None = None
+        self.erro: Exception | None = None
+        self.pronto = threading.Event()
+        self.carga_s: float | None = None
+        # falhas seguidas na mesma versão do arquivo e quando tentar de novo
+        self.falhas = 0
+        self.versao_falha: tuple | None = None
+        self.tentar_apos = 0.0
+        self.lock = threading.Lock()
+
+
+class AtualizadorDados:
+    def __init__(self, intervalo_s: float = INTERVALO_S):
+        self.intervalo_s = intervalo_s
+        self._fontes: dict[str, _Fonte] = {}
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def registrar(self, nome: str, path: str, carregar: Callable[[str], Any]) -> None:
+        """
+        Passa a vigiar `path`; `carregar(path)` monta o dataset. Registrar o
+        mesmo nome de novo não faz nada, então as páginas podem chamar a cada
+        import.
+        """
+        with self._lock:
+            if nome in self._fontes:
+                return
+            self._fontes[nome] = _Fonte(nome, path, carregar)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="atualizador-dados", daemon=True)
+                self._thread.start()
+        self._acordar.set()
+
+    def pronto(self, nome: str) -> bool:
+        return self._fontes[nome].pronto.is_set()
+
+    def obter(self, nome: str, timeout: float | None = None) -> tuple[tuple, Any]:
+        """
+        (versao, valor) mais recente, com valor passado por visao(). Só
+        bloqueia antes da primeira carga; depois disso nunca espera por uma
+        recarga em andamento.
+        """
+        fonte = self._fontes[nome]
+        if not fonte.pronto.wait(timeout):
+            raise TimeoutError(f"{nome}: primeira carga não terminou em {timeout}s")
+        estado = fonte.estado
+        if estado is None:
+            raise fonte.erro or FileNotFoundError(fonte.path)
+        versao, valor = estado
+        return versao, visao(valor)
+
+    def status(self) -> list[dict]:
+        """Situação de cada fonte (para depuração)."""
+        out = []
+        for fonte in list(self._fontes.values()):
+            estado = fonte.estado
+            out.append({
+                "Fonte": fonte.nome,
+                "Arquivo": os.path.basename(fonte.path),
+                "Versão": estado[0] if estado else None,
+                "Carga (s)": fonte.carga_s,
+                "Erro": repr(fonte.erro) if fonte.erro else "",
+                "Falhas seguidas": fonte.falhas,
+            })
+        return out
+
+    def atualizar(self, nome: str) -> bool:
+        """
+        Recarrega a fonte se o arquivo mudou desde a última carga. Devolve
+        True se trocou os dados. Chamado pela thread; também serve para forçar
+        uma verificação na hora.
+        """
+        fonte = self._fontes[nome]
+        with fonte.lock:
+            versao = versao_arquivo(fonte.path)
+            atual = fonte.estado[0] if fonte.estado else None
+            if versao is None:
+                if fonte.estado is None:
+                    fonte.erro = FileNotFoundError(fonte.path)
+                    fonte.pronto.set()
+                return False
+            if versao == atual:
+                return False
+            if versao == fonte.versao_falha and time.monotonic() < fonte.tentar_apos:
+                return False
+
+            t = time.perf_counter()
+            try:
+                # cargas em segundo plano aparecem no painel como execuções próprias
+                with execucao(f"carga:{nome}"):
+                    valor = fonte.carregar(fonte.path)
+            except Exception as e:
+                # mesma versão falhando de novo: dobra a espera; versão nova recomeça a contagem
+                fonte.falhas = fonte.falhas + 1 if versao == fonte.versao_falha else 1
+                fonte.versao_falha = versao
+                espera = min(MAX_ESPERA_S, self.intervalo_s * 2 ** (fonte.falhas - 1))
+                fonte.tentar_apos = time.monotonic() + espera
+                log.warning("falha ao recarregar %s: %r (nova tentativa em %.0fs ou quando o arquivo mudar)",
+                            nome, e, espera)
+                fonte.erro = e
+                fonte.pronto.set()
+                return False
+
+            # arquivo mudou durante a carga (cópia em andamento): tenta de novo depois
+            if versao_arquivo(fonte.path) != versao:
+                log.info("%s mudou durante a carga; nova tentativa na próxima verificação", nome)
+                return False
+
+            fonte.estado = (versao, valor)
+            fonte.erro = None
+            fonte.falhas, fonte.versao_falha = 0, None
+            fonte.carga_s = time.perf_counter() - t
+            fonte.pronto.set()
+            log.info("%s recarregado em %.2fs (versão %s)", nome, fonte.carga_s, versao)
+            return True
+
+    def _loop(self) -> None:
+        while True:
+            for nome in list(self._fontes):
+                try:
+                    self.atualizar(nome)
+                except Exception:
+                    log.exception("erro inesperado ao atualizar %s", nome)
+            self._acordar.wait(self.intervalo_s)
+            self._acordar.clear()
+
+
+_ATUALIZADOR: AtualizadorDados | None = None
+_ATUALIZADOR_LOCK = threading.Lock()
+
+
+def get_atualizador() -> AtualizadorDados:
+    """Instância única do processo (compartilhada por todas as sessões)."""
+    global _ATUALIZADOR
+    with _ATUALIZADOR_LOCK:
+        if _ATUALIZADOR is None:
+            _ATUALIZADOR = AtualizadorDados()
+        return _ATUALIZADOR
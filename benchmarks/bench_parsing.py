@@ -0,0 +1,70 @@
+"""
+Benchmark do parse de datas/durações de formatacao_csv.
+
+Compara a versão anterior (to_datetime com formato + fallback genérico na
+coluna inteira, to_numeric + to_timedelta) com o motor atual, no
+Planilhas/roi.csv real e num arquivo sintético.
+
+    python -m benchmarks.bench_parsing
+    python -m benchmarks.bench_parsing --linhas 5000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from csvLoader import get_csv_path, read_roi_csv, formatacao_csv
+from benchmarks.gerador import gerar_roi
+
+
+def formatacao_legada(df: pd.DataFrame) -> pd.DataFrame:
+    """formatacao_csv como era antes do motor de parse (só datas e duração)."""
+    df = df.copy()
+    for col in ("Data Início", "Data Fim"):
+        df[col] = pd.to_datetime(df[col], format="%d/%m/%Y %H:%M", errors="coerce")
+        df[col] = df[col].fillna(pd.to_datetime(df[col], errors="coerce", dayfirst=True))
+    s_num = pd.to_numeric(df["Total (s)"], errors="coerce")
+    if s_num.notna().any():
+        df["Duracao_min"] = s_num / 60.0
+    else:
+        df["Duracao_min"] = pd.to_timedelta(df["Total (s)"], errors="coerce").dt.total_seconds() / 60.0
+    df["Hora"] = df["Data Início"].dt.hour
+    return df
+
+
+def _cronometrar(fn, df: pd.DataFrame, repeticoes: int) -> tuple[float, pd.DataFrame]:
+    melhor, out = float("inf"), None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        out = fn(df)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor, out
+
+
+def comparar(nome: str, raw: pd.DataFrame, repeticoes: int) -> None:
+    t_old, old = _cronometrar(formatacao_legada, raw, repeticoes)
+    t_new, new = _cronometrar(formatacao_csv, raw, repeticoes)
+    # Duracao_min agora é float32 (compactar_schema): compara na mesma precisão
+    iguais = all(
+        (old[c].astype("datetime64[ns]") == new[c]).all() for c in ("Data Início", "Data Fim")
+    ) and np.array_equal(old["Duracao_min"].to_numpy(dtype="float32"),
+                         new["Duracao_min"].to_numpy(dtype="float32"), equal_nan=True)
+    print(
+        f"{nome:<24} {len(raw):>10,} linhas | legado {t_old:8.3f}s | atual {t_new:8.3f}s "
+        f"| {t_old / t_new:6.1f}x | resultados iguais: {iguais}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=5_000_000, help="linhas do arquivo sintético")
+    parser.add_argument("--repeticoes", type=int, default=3, help="repetições no roi.csv (vale a melhor)")
+    args = parser.parse_args()
+
+    comparar("roi.csv", read_roi_csv(get_csv_path()), args.repeticoes)
+    comparar("sintético", gerar_roi(args.linhas), 1)
+
+
+if __name__ == "__main__":
+    main()
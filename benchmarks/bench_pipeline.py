@@ -0,0 +1,367 @@
+"""
+Benchmark das etapas dos pipelines do ROI e do Controle de Horas.
+
+Gera dados sintéticos (benchmarks.gerador) em cada tamanho pedido, mede o
+tempo de parede e o pico de memória de cada etapa e compara com a linha
+de base gravada em benchmarks/baseline.json. Sai com código 1 se alguma
+etapa ficou mais lenta ou usou mais memória que a base além da
+tolerância. Não sobe o Streamlit.
+
+    python -m benchmarks.bench_pipeline                       # 10k e 1m
+    python -m benchmarks.bench_pipeline --tamanhos 10k,1m,10m
+    python -m benchmarks.bench_pipeline --salvar-baseline     # grava o resultado como base
+
+Para a base servir em outras máquinas, o tempo é guardado relativo a uma
+carga de referência fixa (ordenação + groupby com numpy/pandas) medida na
+mesma execução, antes e depois de cada tamanho (vale o menor):
+"tempo_rel" = tempo da etapa / tempo da referência. A comparação usa só o
+tempo relativo; "tempo_s" e a referência ("_referencia_s") ficam como
+informação. Rode a base numa máquina sem outra carga.
+
+O tempo de cada etapa é o melhor de --repeticoes passadas. O pico de
+memória vem do tracemalloc (alocações do Python e do numpy; o que o
+pyarrow aloca por fora não entra) numa passada separada, para o custo do
+rastreamento não contaminar os tempos. A pasta de trabalho do Controle de
+Horas é limitada a --horas-max linhas (o openpyxl lê na casa de poucos
+milhares de linhas por segundo).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.gerador import gerar_roi, gerar_horas_xlsx
+
+TAMANHOS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# diferenças abaixo disto são ruído e nunca contam como regressão
+FOLGA_S = 0.05
+FOLGA_MB = 2.0
+# linhas da carga de referência (uns 0,1-0,3 s numa máquina comum)
+LINHAS_REFERENCIA = 2_000_000
+
+
+# =============================
+# Carga de referência
+# =============================
+def medir_referencia(repeticoes: int = 5) -> float:
+    """Melhor tempo de uma carga fixa que exercita as mesmas bibliotecas das etapas."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "chave": rng.integers(0, 1_000, LINHAS_REFERENCIA),
+        "valor": rng.random(LINHAS_REFERENCIA),
+    })
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        df.sort_values("valor").groupby("chave")["valor"].agg(["mean", "std", "max"])
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos)
+
+
+# =============================
+# Dados sintéticos
+# =============================
+def preparar_dados(pasta: str, n: int, horas_max: int, seed: int = 0) -> dict:
+    """
+    Arquivos de entrada do tamanho `n` (reaproveitados entre execuções):
+    roi.csv com n linhas, a versão sem as 1% mais novas (para medir a
+    ingestão incremental) e o Excel com min(n, horas_max) linhas.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    roi = os.path.join(pasta, f"roi_{n}.csv")
+    antigo = os.path.join(pasta, f"roi_{n}_antigo.csv")
+    horas = os.path.join(pasta, f"horas_{min(n, horas_max)}.xlsx")
+    if not (os.path.exists(roi) and os.path.exists(antigo)):
+        df = gerar_roi(n, seed)
+        df.to_csv(roi, sep=";", encoding="latin1", index=False)
+        # o CSV é gravado do mais novo para o mais antigo: as novas ficam no começo
+        df.iloc[max(1, n // 100):].to_csv(antigo, sep=";", encoding="latin1", index=False)
+    if not os.path.exists(horas):
+        gerar_horas_xlsx(horas, min(n, horas_max), seed)
+    return {"roi": roi, "roi_antigo": antigo, "horas": horas}
+
+
+# =============================
+# Etapas
+# =============================
+def etapas_roi(arquivos: dict, cache_dir: str) -> list:
+    """(nome, função(ctx)) na ordem do pipeline; ctx guarda as saídas das etapas anteriores."""
+    import shutil
+
+    from csvLoader import read_roi_csv, formatacao_csv, load_roi_dados
+    from roiAgregados import (
+        montar_cubo, montar_sketch, montar_sketch_dia, kpis_cubo, contar_por_cubo,
+        tempo_medio_cubo, variancia_cubo, carga_node_cubo, heatmap_cubo,
+    )
+    from roiIndice import IndiceROI
+    from roiTendencias import tendencias
+    from roiConcorrencia import concorrencia_por_hora
+    from roiStreaming import agregar_em_blocos
+
+    os.environ["ROI_CACHE_DIR"] = cache_dir
+
+    def limpar_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def ler(ctx):
+        ctx["raw"] = read_roi_csv(arquivos["roi"])
+
+    def formatar(ctx):
+        ctx["df"] = formatacao_csv(ctx.pop("raw"), copiar=False)
+
+    def cubo(ctx):
+        ctx["cubo"] = montar_cubo(ctx["df"])
+
+    def sketch(ctx):
+        ctx["sketch"] = montar_sketch(ctx["df"])
+
+    def sketch_dia(ctx):
+        ctx["sketch_dia"] = montar_sketch_dia(ctx["df"])
+
+    def indice(ctx):
+        ctx["indice"] = IndiceROI(ctx["df"])
+
+    def filtro(ctx):
+        ind = ctx["indice"]
+        ini, fim = ind.periodo()
+        meio = ini + (fim - ini) / 2
+        ctx["df"].iloc[ind.posicoes(meio, fim, {"Job": ind.valores("Job")[:2]})]
+
+    def tabelas(ctx):
+        c = ctx["cubo"]
+        kpis_cubo(c)
+        contar_por_cubo(c, "Job")
+        contar_por_cubo(c, "Cenário", top=50)
+        tempo_medio_cubo(c)
+        variancia_cubo(c)
+        carga_node_cubo(c)
+        heatmap_cubo(c)
+
+    def series(ctx):
+        for freq in ("D", "W"):
+            tendencias(ctx["cubo"], ctx["sketch_dia"], 0.95, freq, "Job")
+        tendencias(ctx["cubo"], ctx["sketch_dia"], 0.95, "h", "Node", df=ctx["df"])
+
+    def concorrencia(ctx):
+        concorrencia_por_hora(ctx["df"], "Node")
+
+    def cache_frio(ctx):
+        limpar_cache()
+        load_roi_dados(arquivos["roi"])
+
+    def cache_quente(ctx):
+        load_roi_dados(arquivos["roi"])
+
+    def incremental(ctx):
+        # cache do arquivo sem as linhas novas; só a leitura com as novas é medida
+        limpar_cache()
+        tmp = os.path.join(cache_dir, "entrada", os.path.basename(arquivos["roi"]))
+        os.makedirs(os.path.dirname(tmp), exist_ok=True)
+        shutil.copy(arquivos["roi_antigo"], tmp)
+        load_roi_dados(tmp)
+        shutil.copy(arquivos["roi"], tmp)
+        ctx["_inicio"] = time.perf_counter()
+        load_roi_dados(tmp)
+
+    def streaming(ctx):
+        agregar_em_blocos(arquivos["roi"])
+
+    return [
+        ("roi.read_csv", ler),
+        ("roi.formatacao", formatar),
+        ("roi.cubo", cubo),
+        ("roi.sketch", sketch),
+        ("roi.sketch_dia", sketch_dia),
+        ("roi.indice", indice),
+        ("roi.filtro_indice", filtro),
+        ("roi.tabelas_cubo", tabelas),
+        ("roi.tendencias", series),
+        ("roi.concorrencia", concorrencia),
+        ("roi.cache_frio", cache_frio),
+        ("roi.cache_quente", cache_quente),
+        ("roi.incremental", incremental),
+        ("roi.streaming", streaming),
+    ]
+
+
+def etapas_horas(arquivos: dict) -> list:
+    from planilhaLoader import read_workbook, preparar_planilha, load_horas
+    from horasAgregados import agregar_horas
+
+    def ler(ctx):
+        ctx["planilhas"] = read_workbook(arquivos["horas"])
+
+    def preparar(ctx):
+        ctx["prontas"] = {nome: preparar_planilha(df) for nome, df in ctx.pop("planilhas").items()}
+
+    def carregar(ctx):
+        ctx["horas"] = load_horas(arquivos["horas"])
+
+    def agregar(ctx):
+        agregar_horas(ctx["horas"])
+
+    return [
+        ("horas.read_workbook", ler),
+        ("horas.preparar", preparar),
+        ("horas.load_horas", carregar),
+        ("horas.agregar", agregar),
+    ]
+
+
+def executar(etapas: list, memoria: bool) -> dict:
+    """Roda as etapas em ordem: {etapa: segundos} ou {etapa: pico em MB} (memoria=True)."""
+    ctx: dict = {}
+    out = {}
+    if memoria:
+        tracemalloc.start()
+    try:
+        for nome, fn in etapas:
+            if memoria:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+            t0 = time.perf_counter()
+            fn(ctx)
+            # etapas com preparação própria marcam onde a medição começa
+            t0 = ctx.pop("_inicio", t0)
+            if memoria:
+                out[nome] = max(0, tracemalloc.get_traced_memory()[1] - base) / 1024 ** 2
+            else:
+                out[nome] = time.perf_counter() - t0
+    finally:
+        if memoria:
+            tracemalloc.stop()
+    return out
+
+
+# =============================
+# Linha de base
+# =============================
+def comparar(resultado: dict, base: dict, tolerancia: float, tolerancia_mem: float) -> list[str]:
+    """
+    Regressões de `resultado` contra `base` ({tamanho: {"_referencia_s",
+    etapa: {"tempo_rel", "tempo_s", "pico_mb"}}}). A folga absoluta vale em
+    segundos desta máquina (diferença relativa x referência desta execução).
+    """
+    problemas = []
+    for tam, etapas in resultado.items():
+        if tam.startswith("_"):
+            continue
+        referencia_s = etapas["_referencia_s"]
+        for etapa, med in etapas.items():
+            ref = base.get(tam, {}).get(etapa)
+            if etapa.startswith("_") or not ref or "tempo_rel" not in ref:
+                continue
+            t, tb = med["tempo_rel"], ref["tempo_rel"]
+            if t > tb * (1 + tolerancia) and (t - tb) * referencia_s > FOLGA_S:
+                problemas.append(f"{tam} {etapa}: tempo relativo {t:.2f} vs base {tb:.2f} (+{(t / tb - 1) * 100:.0f}%)")
+            m, mb = med.get("pico_mb"), ref.get("pico_mb")
+            if m is not None and mb is not None and m > mb * (1 + tolerancia_mem) and m - mb > FOLGA_MB:
+                problemas.append(f"{tam} {etapa}: memória {m:.1f} MB vs base {mb:.1f} MB (+{(m / mb - 1) * 100:.0f}%)")
+    return problemas
+
+
+def ambiente() -> dict:
+    """Onde a medição foi feita (só informativo; a comparação usa o tempo relativo)."""
+    import platform
+
+    import numpy as np
+    import openpyxl
+    import pandas as pd
+    import pyarrow as pa
+
+    return {
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "versoes": {"pandas": pd.__version__, "numpy": np.__version__,
+                    "pyarrow": pa.__version__, "openpyxl": openpyxl.__version__},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", default="10k,1m", help=f"tamanhos separados por vírgula ({', '.join(TAMANHOS)})")
+    parser.add_argument("--dados", default=os.path.join(tempfile.gettempdir(), "central_bench"),
+                        help="pasta dos arquivos sintéticos (reaproveitados)")
+    parser.add_argument("--horas-max", type=int, default=100_000, help="teto de linhas do Excel sintético")
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava o resultado como nova base")
+    parser.add_argument("--repeticoes", type=int, default=3, help="passadas de tempo por tamanho (vale a melhor)")
+    parser.add_argument("--tolerancia", type=float, default=0.50, help="folga relativa do tempo (0.50 = +50%%)")
+    parser.add_argument("--tolerancia-mem", type=float, default=0.20, help="folga relativa da memória")
+    parser.add_argument("--json", help="grava o resultado neste arquivo")
+    args = parser.parse_args()
+
+    resultado = {}
+    for tam in [t.strip() for t in args.tamanhos.split(",") if t.strip()]:
+        if tam not in TAMANHOS:
+            parser.error(f"tamanho desconhecido: {tam}")
+        n = TAMANHOS[tam]
+        t0 = time.perf_counter()
+        arquivos = preparar_dados(args.dados, n, args.horas_max)
+        print(f"\n== {tam} ({n:,} linhas ROI) — dados prontos em {time.perf_counter() - t0:.1f}s")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            etapas = etapas_roi(arquivos, cache_dir) + etapas_horas(arquivos)
+            referencia_s = medir_referencia()
+            passadas = [executar(etapas, memoria=False) for _ in range(max(1, args.repeticoes))]
+            referencia_s = min(referencia_s, medir_referencia())
+            tempos = {etapa: min(p[etapa] for p in passadas) for etapa in passadas[0]}
+            picos = {} if args.sem_memoria else executar(etapas, memoria=True)
+        print(f"  carga de referência: {referencia_s:.3f}s")
+
+        resultado[tam] = {"_referencia_s": round(referencia_s, 4)}
+        resultado[tam].update({
+            etapa: {"tempo_rel": round(tempos[etapa] / referencia_s, 4),
+                    "tempo_s": round(tempos[etapa], 4),
+                    **({"pico_mb": round(picos[etapa], 1)} if etapa in picos else {})}
+            for etapa in tempos
+        })
+        for etapa, med in resultado[tam].items():
+            if etapa.startswith("_"):
+                continue
+            pico = f"{med['pico_mb']:10.1f} MB" if "pico_mb" in med else ""
+            print(f"  {etapa:<22} {med['tempo_s']:10.3f}s {med['tempo_rel']:8.2f}x {pico}")
+
+    resultado["_ambiente"] = ambiente()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+
+    base = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+
+    if args.salvar_baseline:
+        # tamanhos medidos em execuções diferentes convivem: cada um é relativo à própria referência
+        base.update(resultado)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(base, f, indent=2, ensure_ascii=False)
+        print(f"\nbase gravada em {args.baseline}")
+        return
+
+    problemas = comparar(resultado, base, args.tolerancia, args.tolerancia_mem)
+    versoes = base.get("_ambiente", {}).get("versoes")
+    if versoes and versoes != resultado["_ambiente"]["versoes"]:
+        print(f"\naviso: base gravada com outras versões de bibliotecas ({versoes})")
+    if not base:
+        print("\nsem linha de base para comparar (use --salvar-baseline)")
+    elif problemas:
+        print("\nREGRESSÕES:")
+        for p in problemas:
+            print("  " + p)
+        sys.exit(1)
+    else:
+        print("\nsem regressões em relação à base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Gerador de dados sintéticos no formato de Planilhas/roi.csv.
+
+Tudo é montado com numpy (inclusive o texto das datas e durações), para
+gerar milhões de linhas em poucos segundos.
+"""
+import numpy as np
+import pandas as pd
+
+JOBS = [
+    "JOB_NASA_VA", "JOB_NASA_CME_NF", "JOB_NASA_CME_ST",
+    "JOB_SD_ZVF31_ECP", "JOB_NASA_J3GH", "JOB_SD_J1BFNE_ECP",
+]
+NODES = ["N1", "N2"]
+CENARIOS = [
+    "SD_J1BFNE_REST", "SD_J1BFNE_SQL", "SD_J3GH_IE02", "SD_J4GL_VA22_VA41",
+    "SD_NF", "SD_ZCME_REALIZAR", "SD_ZCME_STATUS", "SD_ZVF31_REST",
+    "SD_ZVF31_SQL", "newvisionapp",
+]
+
+
+def _texto(partes: list) -> np.ndarray:
+    """
+    Concatena colunas de bytes (uint8) e inteiros de largura fixa num array
+    de strings. Cada parte é um literal (str) ou um par (valores, largura).
+    """
+    n = next(len(p[0]) for p in partes if not isinstance(p, str))
+    blocos = []
+    for p in partes:
+        if isinstance(p, str):
+            blocos.append(np.tile(np.frombuffer(p.encode(), dtype=np.uint8), (n, 1)))
+        else:
+            valores, largura = p
+            div = 10 ** np.arange(largura - 1, -1, -1)
+            blocos.append((valores[:, None] // div % 10 + ord("0")).astype(np.uint8))
+    buf = np.ascontiguousarray(np.hstack(blocos))
+    return buf.view(f"S{buf.shape[1]}").ravel().astype(f"U{buf.shape[1]}")
+
+
+def _data_txt(ts: np.ndarray) -> np.ndarray:
+    """datetime64 -> "dd/mm/YYYY HH:MM"."""
+    dias = ts.astype("datetime64[D]")
+    meses = ts.astype("datetime64[M]")
+    ano = meses.astype(np.int64) // 12 + 1970
+    mes = meses.astype(np.int64) % 12 + 1
+    dia = (dias - meses.astype("datetime64[D]")).astype(np.int64) + 1
+    minutos = (ts - dias).astype("timedelta64[m]").astype(np.int64)
+    return _texto([(dia, 2), "/", (mes, 2), "/", (ano, 4), " ", (minutos // 60, 2), ":", (minutos % 60, 2)])
+
+
+def gerar_roi(n: int, seed: int = 0, inicio: str = "2025-01-01", dias: int = 365) -> pd.DataFrame:
+    """DataFrame cru (texto, como sai do read_csv) com o esquema do roi.csv."""
+    rng = np.random.default_rng(seed)
+    ini = (np.datetime64(inicio, "m")
+           + np.sort(rng.integers(0, dias * 24 * 60, n))[::-1].astype("timedelta64[m]"))
+    # durações com cauda longa (a maioria em segundos/minutos, alguns jobs longos)
+    dur = np.minimum(rng.lognormal(mean=4.0, sigma=1.2, size=n), 6 * 3600 - 1).astype(np.int64)
+    fim = ini + ((dur + 59) // 60).astype("timedelta64[m]")
+    return pd.DataFrame({
+        "Código": np.arange(n, 0, -1, dtype=np.int64) + 300_000,
+        "Job": np.asarray(JOBS, dtype=object)[rng.integers(0, len(JOBS), n)],
+        "PID": rng.integers(1_000, 500_000, n),
+        "Node": np.asarray(NODES, dtype=object)[rng.integers(0, len(NODES), n)],
+        "Cenário": np.asarray(CENARIOS, dtype=object)[rng.integers(0, len(CENARIOS), n)],
+        "Data Início": _data_txt(ini),
+        "Data Fim": _data_txt(fim),
+        "Total (s)": _texto([(dur // 3600, 2), ":", (dur % 3600 // 60, 2), ":", (dur % 60, 2)]),
+    })
+
+
+def gerar_roi_csv(path: str, n: int, seed: int = 0) -> str:
+    gerar_roi(n, seed).to_csv(path, sep=";", encoding="latin1", index=False)
+    return path
+
+
+# =============================
+# Controle de Horas (Excel)
+# =============================
+CABECALHO_HORAS = [
+    "Dia", "Início - Monitoramento", "Fim - Monitoramento", "Total - Monitoramento",
+    "Início - Desenvolvimento", "Fim - Desenvolvimento", "Total - Desenvolvimento",
+    "Total", "Atividade", "IMPORTANTE", "Desconto Hora Almoço",
+]
+MESES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+]
+# limite de linhas de uma worksheet do Excel (menos cabeçalho e "Soma")
+LINHAS_POR_WORKSHEET = 1_048_576 - 2
+
+
+def gerar_horas_xlsx(path: str, n: int, seed: int = 0) -> str:
+    """
+    Pasta de trabalho no layout do Controle de Horas: uma worksheet por mês,
+    n linhas no total divididas entre elas, linha "Soma" no fim e uma coluna
+    extra depois de J (como o original). Os totais são gravados como valor
+    (fração de dia ou timedelta), já que fórmulas não teriam valor em cache.
+    """
+    import datetime as dt
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    por_mes = np.array_split(np.arange(n), len(MESES))
+    for mes, idx in enumerate(por_mes, start=1):
+        if len(idx) > LINHAS_POR_WORKSHEET:
+            raise ValueError(f"{len(idx):,} linhas não cabem numa worksheet")
+        ws = wb.create_sheet(MESES[mes - 1])
+        ws.append(CABECALHO_HORAS)
+        k = len(idx)
+        # monitoramento começa às 8h e dura 3-9h; o resto do dia (até 17h) é desenvolvimento
+        monit_min = rng.integers(180, 541, k) // 10 * 10
+        dias = idx % 28 + 1
+        for i in range(k):
+            m = int(monit_min[i])
+            fim_m = dt.time(8 + m // 60, m % 60)
+            dev = 540 - m
+            linha = [
+                f"{dias[i]:02d}/{mes:02d}", dt.time(8, 0), fim_m, m / 1440,
+                fim_m if dev else None, dt.time(17, 0) if dev else None,
+                dt.timedelta(minutes=dev) if dev else None,
+                dt.timedelta(hours=8), "Monitoramento dos processos",
+                None if i % 3 else "Desenvolvimento de melhorias", None,
+            ]
+            ws.append(linha)
+        ws.append(["Soma"] + [None] * (len(CABECALHO_HORAS) - 1))
+    wb.save(path)
+    return path
@@ -0,0 +1,112 @@
+"""
+Cache de figuras e tabelas prontas para o navegador.
+
+Cada rerun do Streamlit remontaria todos os gráficos (px.bar, layout,
+medição do payload) mesmo sem mudar dado nem filtro. Aqui o resultado
+fica num LRU do processo, compartilhado entre sessões, com chave
+(tipo, nome, versão do dataset, estado da seleção) e limite de itens e
+de bytes. A versão faz parte da chave: quando o arquivo muda, as
+entradas antigas simplesmente deixam de ser pedidas e saem pelo LRU.
+
+Os objetos devolvidos são compartilhados: quem recebe não pode alterá-los.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import registrar_cache
+
+MAX_ITENS = int(os.environ.get("RENDER_CACHE_ITENS", "256"))
+MAX_MB = float(os.environ.get("RENDER_CACHE_MB", "64"))
+
+
+def congelar(valor) -> Any:
+    """Versão hashable de um estado de seleção (dicts e listas viram tuplas ordenadas)."""
+    if isinstance(valor, dict):
+        return tuple(sorted((str(k), congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple, set, frozenset, np.ndarray, pd.Index)):
+        itens = [congelar(v) for v in valor]
+        return tuple(sorted(itens, key=repr) if isinstance(valor, (set, frozenset)) else itens)
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+class CacheLRU:
+    """LRU com teto de itens e de bytes (cada item informa o próprio tamanho)."""
+
+    def __init__(self, max_itens: int = MAX_ITENS, max_bytes: int = int(MAX_MB * 1024 ** 2)):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def guardar(self, chave, valor, nbytes: int) -> None:
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self._bytes -= antigo[1]
+            if nbytes > self.max_bytes or self.max_itens <= 0:
+                return
+            self._itens[chave] = (valor, nbytes)
+            self._bytes += nbytes
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                _, (_, n) = self._itens.popitem(last=False)
+                self._bytes -= n
+                self.descartes += 1
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "MB": self._bytes / 1024 ** 2,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "descartes": self.descartes,
+            }
+
+
+_CACHE = CacheLRU()
+_FALTA = object()
+
+
+def get_cache() -> CacheLRU:
+    return _CACHE
+
+
+def memo(tipo: str, nome: str, chave, construir: Callable[[], Any], tamanho: Callable[[Any], int]) -> Any:
+    """
+    Valor de `construir()` guardado por (tipo, nome, chave); `tamanho` mede
+    o valor em bytes para o teto do cache. `chave` deve incluir a versão
+    do dataset e tudo da seleção que muda o resultado.
+    """
+    k = (tipo, nome, congelar(chave))
+    valor = _CACHE.obter(k, _FALTA)
+    registrar_cache(f"render.{tipo}", valor is not _FALTA)
+    if valor is _FALTA:
+        valor = construir()
+        _CACHE.guardar(k, valor, tamanho(valor))
+    return valor
@@ -1,12 +1,858 @@
+import io
 import os
+import re
+import glob
+import json
+import hashlib
+import numpy as np
 import pandas as pd
-import streamlit as st
 import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from instrumentacao import medido, registrar_cache
+
+from roiAgregados import (
+    montar_cubo, merge_cubos, montar_sketch, merge_sketches, SketchPorGrupo,
+    montar_sketch_dia, merge_sketches_dia, SketchPorDia,
+)
+
+# Incrementar sempre que formatacao_csv mudar o formato da saída,
+# para invalidar os caches já gravados em disco.
+CACHE_VERSION = 7
+CATEGORICAS = ["Job", "Node", "Cenário"]
+# texto repetitivo que também vale guardar como categoria (poucos valores distintos)
+CATEGORICAS_EXTRA = ["Total (s)", "Duração"]
+INTEIROS = ["Código", "PID"]
+
 
 def get_base_dir() -> str:
     return os.path.dirname(os.path.abspath(__file__))
 
 
 def get_csv_path() -> str:
+    """
+    Fonte do ROI: Planilhas/roi.csv, ou o que estiver em ROI_CSV (um CSV,
+    uma pasta de CSVs-partição ou um glob, ex.: exports/roi_*.csv).
+    """
+    if os.environ.get("ROI_CSV"):
+        return os.environ["ROI_CSV"]
     base_dir = get_base_dir()
-    return os.path.join(base_dir, "Planilhas", "roi.csv")
\ No newline at end of file
+    return os.path.join(base_dir, "Planilhas", "roi.csv")
+
+
+def get_cache_dir() -> str:
+    """Pasta dos caches colunares (Parquet) gerados a partir dos CSVs (ROI_CACHE_DIR sobrescreve)."""
+    if os.environ.get("ROI_CACHE_DIR"):
+        return os.environ["ROI_CACHE_DIR"]
+    base_dir = get_base_dir()
+    return os.path.join(base_dir, "Planilhas", ".cache")
+
+
+# =============================
+# Leitura + formatação
+# =============================
+@medido("csv.read_csv")
+def read_roi_csv(path: str) -> pd.DataFrame:
+    # ajuste encoding/sep se necessário
+    return pd.read_csv(path, sep=";", encoding="latin1")
+
+
+# formatos tentados (na ordem) ao detectar o padrão de uma coluna de data;
+# todos têm largura fixa, o que permite o parse direto nos bytes
+DATE_FORMATS = [
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%d/%m/%Y",
+]
+# tamanho da amostra usada para detectar o formato
+DETECT_SAMPLE = 200
+_FIELD_WIDTH = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2}
+
+
+def _layout_formato(fmt: str) -> tuple[int, dict, str]:
+    """Largura total, posição de cada campo e regex de validação de um formato fixo."""
+    pos, campos, regex = 0, {}, ""
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == "%":
+            campo = fmt[i + 1]
+            w = _FIELD_WIDTH[campo]
+            campos[campo] = (pos, pos + w)
+            regex += rf"\d{{{w}}}"
+            pos += w
+            i += 2
+        else:
+            regex += re.escape(fmt[i])
+            pos += 1
+            i += 1
+    return pos, campos, regex
+
+
+def _digitos(txt: pd.Series, largura: int) -> np.ndarray:
+    """Matriz uint8 (linhas x largura) com o valor de cada dígito (caractere - '0')."""
+    b = np.asarray(txt.to_numpy(dtype=object), dtype=f"S{largura}").view(np.uint8)
+    return b.reshape(-1, largura) - np.uint8(ord("0"))
+
+
+def _numero(d: np.ndarray, ini: int, fim: int) -> np.ndarray:
+    """Inteiro formado pelas colunas de dígitos [ini, fim) de _digitos."""
+    out = d[:, ini].astype(np.int64)
+    for i in range(ini + 1, fim):
+        out = out * 10 + d[:, i]
+    return out
+
+
+def _parse_data_fixa(txt: pd.Series, fmt: str) -> np.ndarray:
+    """
+    Parse vetorizado de datas no formato fixo `fmt`: valida com regex,
+    converte os dígitos em inteiros e monta datetime64 com aritmética numpy.
+    Linhas fora do padrão (ou datas impossíveis, ex. 31/02) ficam NaT.
+    """
+    largura, campos, regex = _layout_formato(fmt)
+    out = np.full(len(txt), np.datetime64("NaT"), dtype="datetime64[s]")
+    ok = txt.str.fullmatch(regex).fillna(False).to_numpy(dtype=bool)
+    if not ok.any():
+        return out
+
+    d = _digitos(txt[ok], largura)
+    ano = _numero(d, *campos["Y"])
+    mes = _numero(d, *campos["m"])
+    dia = _numero(d, *campos["d"])
+    zero = np.zeros(len(d), dtype=np.int64)
+    hora = _numero(d, *campos["H"]) if "H" in campos else zero
+    minuto = _numero(d, *campos["M"]) if "M" in campos else zero
+    seg = _numero(d, *campos["S"]) if "S" in campos else zero
+
+    meses = (ano - 1970) * 12 + (mes - 1)
+    datas = (meses.astype("datetime64[M]").astype("datetime64[D]")
+             + (dia - 1).astype("timedelta64[D]"))
+    valido = (
+        (mes >= 1) & (mes <= 12) & (dia >= 1)
+        & (datas.astype("datetime64[M]") == meses.astype("datetime64[M]"))
+        & (hora < 24) & (minuto < 60) & (seg < 60)
+    )
+    valores = (datas.astype("datetime64[s]")
+               + (hora * 3600 + minuto * 60 + seg).astype("timedelta64[s]"))
+    valores[~valido] = np.datetime64("NaT")
+    out[ok] = valores
+    return out
+
+
+def detectar_formato_data(series: pd.Series) -> str | None:
+    """Escolhe, numa amostra da coluna, o formato de DATE_FORMATS que mais acerta."""
+    amostra = series.dropna().astype("string").str.strip().head(DETECT_SAMPLE)
+    if amostra.empty:
+        return None
+    melhor, acertos = None, 0
+    for fmt in DATE_FORMATS:
+        ok = int(amostra.str.fullmatch(_layout_formato(fmt)[2]).fillna(False).sum())
+        if ok > acertos:
+            melhor, acertos = fmt, ok
+            if ok == len(amostra):
+                break
+    return melhor
+
+
+def parse_datas(series: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna de datas em texto para datetime.
+
+    O formato é detectado uma vez (amostra) e aplicado na coluna inteira
+    pelo caminho vetorizado; só as linhas que falharem nele passam pelo
+    parse genérico (dayfirst).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    txt = series.astype("string").str.strip()
+    fmt = detectar_formato_data(txt)
+    if fmt is None:
+        valores = np.full(len(txt), np.datetime64("NaT"), dtype="datetime64[s]")
+    else:
+        valores = _parse_data_fixa(txt, fmt)
+    out = pd.Series(valores.astype("datetime64[ns]"), index=series.index, name=series.name)
+
+    falhas = out.isna() & txt.notna() & (txt != "")
+    if falhas.any():
+        out[falhas] = pd.to_datetime(txt[falhas], errors="coerce", dayfirst=True, format="mixed")
+    return out
+
+
+def _hhmmss_fixo_to_seconds(series: pd.Series) -> np.ndarray:
+    """"HH:MM:SS" (largura fixa, já validado) -> segundos, direto nos bytes."""
+    d = _digitos(series, 8)
+    return _numero(d, 0, 2) * 3600 + _numero(d, 3, 5) * 60 + _numero(d, 6, 8)
+
+
+def parse_duracao_segundos(series: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna de duração para segundos (float, NaN quando inválido).
+    Aceita:
+      - número em segundos (int/float)
+      - texto "HH:MM:SS" (caminho vetorizado, sem to_timedelta)
+      - texto "0 days 00:12:33" / "100:00:00" (to_timedelta só nessas linhas)
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+
+    out = pd.Series(np.nan, index=series.index, dtype="float64")
+    txt = series.astype("string").str.strip()
+
+    fixo = txt.str.fullmatch(r"\d\d:\d\d:\d\d").fillna(False).astype(bool)
+    if fixo.any():
+        out[fixo] = _hhmmss_fixo_to_seconds(txt[fixo])
+
+    resto = ~fixo & txt.notna() & (txt != "")
+    if resto.any():
+        num = pd.to_numeric(txt[resto], errors="coerce")
+        out[resto] = num.to_numpy(dtype="float64", na_value=np.nan)
+        resto &= out.isna()
+        if resto.any():
+            td = pd.to_timedelta(txt[resto], errors="coerce")
+            out[resto] = td.dt.total_seconds().to_numpy()
+    return out
+
+
+def _parse_duration_to_minutes(series: pd.Series) -> pd.Series:
+    """Converte uma coluna de duração para minutos (ver parse_duracao_segundos)."""
+    return parse_duracao_segundos(series) / 60.0
+
+
+@medido("csv.formatacao")
+def formatacao_csv(df: pd.DataFrame, copiar: bool = True) -> pd.DataFrame:
+    # copiar=False quando o df de entrada é descartável (ex.: acabou de sair do read_csv)
+    if copiar:
+        df = df.copy()
+
+    # Datas
+    # Formato detectado uma vez; parse genérico só nas linhas que falharem
+    for col in ("Data Início", "Data Fim"):
+        if col in df.columns:
+            df[col] = parse_datas(df[col])
+
+    # Duração
+    # Preferência: Total (s) (se existir) -> Duracao_min
+    if "Total (s)" in df.columns:
+        df["Duracao_min"] = _parse_duration_to_minutes(df["Total (s)"])
+    elif "Duração" in df.columns:
+        df["Duracao_min"] = _parse_duration_to_minutes(df["Duração"])
+    else:
+        # se tiver começo/fim, calcula
+        if "Data Início" in df.columns and "Data Fim" in df.columns:
+            df["Duracao_min"] = (df["Data Fim"] - df["Data Início"]).dt.total_seconds() / 60.0
+        else:
+            df["Duracao_min"] = pd.NA
+
+    # Hora do dia (para heatmap/hist)
+    if "Data Início" in df.columns:
+        df["Hora"] = df["Data Início"].dt.hour
+
+    return compactar_schema(df)
+
+
+def compactar_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Esquema compacto do ROI (altera df no lugar e o devolve):
+      - texto de baixa cardinalidade -> category
+      - Código/PID -> menor inteiro que comporta os valores
+      - Hora -> int8, Duracao_min -> float32
+    """
+    # colunas de baixa cardinalidade viram categóricas (menor e mais rápido no groupby)
+    for col in CATEGORICAS + CATEGORICAS_EXTRA:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    for col in INTEIROS:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+
+    if "Hora" in df.columns:
+        df["Hora"] = df["Hora"].astype("float32" if df["Hora"].isna().any() else "int8")
+    if "Duracao_min" in df.columns:
+        df["Duracao_min"] = df["Duracao_min"].astype("float32")
+    return df
+
+
+def relatorio_memoria(df: pd.DataFrame) -> pd.DataFrame:
+    """Bytes por coluna (deep), para acompanhar o tamanho do dataset em memória."""
+    uso = df.memory_usage(deep=True, index=False)
+    return pd.DataFrame({
+        "Coluna": uso.index,
+        "Tipo": [str(df[c].dtype) for c in uso.index],
+        "MB": (uso / 1024 ** 2).round(3).to_numpy(),
+    })
+
+
+# =============================
+# Cache colunar em disco
+# =============================
+def file_fingerprint(path: str) -> dict:
+    """Tamanho e mtime do arquivo: identificam uma versão sem precisar ler o conteúdo."""
+    info = os.stat(path)
+    return {"size": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# amostra (em bytes) do começo/fim do corpo usada para reconhecer um append
+SAMPLE_BYTES = 64 * 1024
+# acima disso as partes incrementais são compactadas numa só
+MAX_PARTS = 16
+
+# agregados gravados junto das partes e atualizados só com as linhas novas:
+# nome -> (montar(df), merge(antigo, novo), para_tabela, de_tabela)
+AGREGADOS = {
+    "cubo": (montar_cubo, merge_cubos, None, None),
+    "sketch": (montar_sketch, merge_sketches, SketchPorGrupo.para_tabela, SketchPorGrupo.de_tabela),
+    "sketch_dia": (montar_sketch_dia, merge_sketches_dia, SketchPorDia.para_tabela, SketchPorDia.de_tabela),
+}
+
+
+def _cache_paths(path: str) -> tuple[str, str]:
+    nome = os.path.splitext(os.path.basename(path))[0]
+    cache_dir = os.path.join(get_cache_dir(), nome)
+    return cache_dir, os.path.join(cache_dir, "meta.json")
+
+
+def _read_meta(meta_path: str) -> dict | None:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def _write_meta(meta_path: str, meta: dict) -> None:
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def _read_range(path: str, start: int, stop: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(max(0, stop - start))
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _layout(path: str, size: int) -> dict:
+    """Cabeçalho + amostras do início/fim do corpo, para comparar versões do arquivo."""
+    with open(path, "rb") as f:
+        header = f.readline()
+    header_len = len(header)
+    k = min(SAMPLE_BYTES, size - header_len)
+    return {
+        "header": _digest(header),
+        "header_len": header_len,
+        "sample_len": k,
+        "head": _digest(_read_range(path, header_len, header_len + k)),
+        "tail": _digest(_read_range(path, size - k, size)),
+        "ends_newline": _read_range(path, size - 1, size) == b"\n",
+    }
+
+
+def _novo_trecho(path: str, meta: dict, size: int) -> tuple[int, int, str] | None:
+    """
+    Se o arquivo atual é o arquivo do cache com linhas novas no fim (append)
+    ou no começo (export mais recente primeiro), devolve (início, fim, lado)
+    do trecho novo em bytes. Caso contrário devolve None => rebuild completo.
+
+    Só o cabeçalho e as pontas do conteúdo antigo são conferidos; o Código
+    (monotônico) é checado depois, no parse do trecho.
+    """
+    lay = meta["layout"]
+    old_size = meta["size"]
+    grow = size - old_size
+    if grow <= 0 or lay["sample_len"] <= 0 or not lay["ends_newline"]:
+        return None
+
+    with open(path, "rb") as f:
+        header = f.readline()
+    if len(header) != lay["header_len"] or _digest(header) != lay["header"]:
+        return None
+
+    h0, k = lay["header_len"], lay["sample_len"]
+
+    # append: conteúdo antigo continua em [h0, old_size)
+    if (_digest(_read_range(path, h0, h0 + k)) == lay["head"]
+            and _digest(_read_range(path, old_size - k, old_size)) == lay["tail"]):
+        return old_size, size, "fim"
+
+    # prepend: conteúdo antigo foi empurrado para [h0 + grow, size)
+    if (_digest(_read_range(path, h0 + grow, h0 + grow + k)) == lay["head"]
+            and _digest(_read_range(path, size - k, size)) == lay["tail"]
+            and _read_range(path, h0 + grow - 1, h0 + grow) == b"\n"):
+        return h0, h0 + grow, "inicio"
+
+    return None
+
+
+def _read_parts(cache_dir: str, parts: list[str]) -> pd.DataFrame:
+    frames = [pd.read_parquet(os.path.join(cache_dir, p)) for p in parts]
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    # concat de categóricas com categorias diferentes volta para texto
+    return compactar_schema(df)
+
+
+def _write_part(cache_dir: str, df: pd.DataFrame, seq: int) -> str:
+    nome = f"part-{seq:05d}.parquet"
+    tmp = os.path.join(cache_dir, nome + ".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, os.path.join(cache_dir, nome))
+    return nome
+
+
+def _nome_agregado(nome: str, seq: int) -> str:
+    """Arquivo de um agregado no cache de um CSV: um por geração, apontado pelo meta."""
+    return f"{nome}-{seq:05d}.parquet"
+
+
+def _read_agregado(cache_dir: str, nome: str, arquivo: str | None = None):
+    de_tabela = AGREGADOS[nome][3]
+    try:
+        tabela = pd.read_parquet(os.path.join(cache_dir, arquivo or f"{nome}.parquet"))
+    except (OSError, ValueError):
+        return None
+    return de_tabela(tabela) if de_tabela else tabela
+
+
+def _write_agregado(cache_dir: str, nome: str, valor, arquivo: str | None = None) -> str:
+    para_tabela = AGREGADOS[nome][2]
+    tabela = para_tabela(valor) if para_tabela else valor
+    arquivo = arquivo or f"{nome}.parquet"
+    tmp = os.path.join(cache_dir, arquivo + ".tmp")
+    tabela.to_parquet(tmp, index=False)
+    os.replace(tmp, os.path.join(cache_dir, arquivo))
+    return arquivo
+
+
+def _read_cached(cache_dir: str, meta: dict) -> dict:
+    """Partes + agregados apontados pelo meta; agregado faltando é refeito a partir do df."""
+    dados = {"df": _read_parts(cache_dir, meta["parts"])}
+    for nome, (montar, *_resto) in AGREGADOS.items():
+        arquivo = meta["agregados"][nome]
+        valor = _read_agregado(cache_dir, nome, arquivo)
+        if valor is None:
+            valor = montar(dados["df"])
+            try:
+                _write_agregado(cache_dir, nome, valor, arquivo)
+            except OSError:
+                pass
+        dados[nome] = valor
+    return dados
+
+
+def _rebuild(path: str, cache_dir: str, meta_path: str, fp: dict, digest: str) -> dict:
+    df = formatacao_csv(read_roi_csv(path), copiar=False)
+    dados = {"df": df, **{nome: montar(df) for nome, (montar, *_resto) in AGREGADOS.items()}}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        old = _read_meta(meta_path)
+        seq = old["next_seq"] if old else 0
+        part = _write_part(cache_dir, df, seq)
+        agregados = {nome: _write_agregado(cache_dir, nome, dados[nome], _nome_agregado(nome, seq))
+                     for nome in AGREGADOS}
+        _write_meta(meta_path, {
+            "version": CACHE_VERSION,
+            "source": os.path.basename(path),
+            "hash": digest,
+            "built_at": dt.datetime.now().isoformat(timespec="seconds"),
+            "parts": [part],
+            "agregados": agregados,
+            "next_seq": seq + 1,
+            "max_codigo": _max_codigo(df),
+            "layout": _layout(path, fp["size"]),
+            **fp,
+        })
+        _cleanup_parts(cache_dir, [part, *agregados.values()])
+    except OSError:
+        # sem permissão de escrita: segue sem cache em disco
+        pass
+    return dados
+
+
+def _max_codigo(df: pd.DataFrame) -> int | None:
+    if "Código" not in df.columns or df["Código"].dropna().empty:
+        return None
+    return int(df["Código"].max())
+
+
+def _cleanup_parts(cache_dir: str, keep: list[str]) -> None:
+    """Apaga partes e gerações de agregados que o meta não aponta mais."""
+    prefixos = ("part-", *(f"{nome}-" for nome in AGREGADOS), *(f"{nome}.parquet" for nome in AGREGADOS))
+    for nome in os.listdir(cache_dir):
+        if nome.startswith(prefixos) and nome not in keep:
+            try:
+                os.remove(os.path.join(cache_dir, nome))
+            except OSError:
+                pass
+
+
+def _ingest_incremental(path: str, cache_dir: str, meta_path: str, meta: dict, fp: dict,
+                        trecho: tuple[int, int, str]) -> dict:
+    """
+    Lê só o trecho novo do CSV, formata e grava como mais uma parte do
+    cache; cada agregado gravado é combinado apenas com o das linhas novas.
+
+    Partes e agregados novos vão para arquivos novos (numerados por seq) e
+    só passam a valer com a gravação do meta.json, que é atômica: se o
+    processo cair no meio, o meta anterior continua apontando para os
+    arquivos anteriores e as linhas novas não são somadas duas vezes.
+
+    Levanta ValueError se o trecho traz Código que o cache já cobre
+    (load_roi_dados cai no rebuild).
+    """
+    inicio, fim, lado = trecho
+    with open(path, "rb") as f:
+        header = f.readline()
+    raw = header + _read_range(path, inicio, fim)
+    novos = pd.read_csv(io.BytesIO(raw), sep=";", encoding="latin1")
+    # o trecho novo vem dos offsets; Código repetido ou menor que o do cache
+    # indica que o arquivo foi reescrito, não só estendido => rebuild completo
+    if (meta.get("max_codigo") is not None and "Código" in novos.columns
+            and (novos["Código"] <= meta["max_codigo"]).any()):
+        raise ValueError("trecho novo com Código já coberto pelo cache")
+    novos = formatacao_csv(novos, copiar=False)
+
+    parts = list(meta["parts"])
+    seq = meta["next_seq"]
+    if not novos.empty:
+        part = _write_part(cache_dir, novos, seq)
+        seq += 1
+        parts = [part] + parts if lado == "inicio" else parts + [part]
+
+    df = _read_parts(cache_dir, parts)
+    dados = {"df": df}
+    agregados = dict(meta["agregados"])
+    for nome, (montar, merge, *_resto) in AGREGADOS.items():
+        valor = _read_agregado(cache_dir, nome, agregados[nome])
+        if valor is None:
+            valor = montar(df)
+        elif not novos.empty:
+            valor = merge(valor, montar(novos))
+        else:
+            dados[nome] = valor
+            continue
+        agregados[nome] = _write_agregado(cache_dir, nome, valor, _nome_agregado(nome, seq))
+        dados[nome] = valor
+    seq += 1
+    if len(parts) > MAX_PARTS:
+        parts = [_write_part(cache_dir, df, seq)]
+        seq += 1
+
+    codigos = [c for c in (meta.get("max_codigo"), _max_codigo(novos)) if c is not None]
+    meta.update({
+        "hash": None,  # hash completo só é recalculado num rebuild
+        "built_at": dt.datetime.now().isoformat(timespec="seconds"),
+        "parts": parts,
+        "agregados": agregados,
+        "next_seq": seq,
+        "max_codigo": max(codigos) if codigos else None,
+        "layout": _layout(path, fp["size"]),
+        **fp,
+    })
+    _write_meta(meta_path, meta)
+    _cleanup_parts(cache_dir, [*parts, *agregados.values()])
+    return dados
+
+
+@medido("csv.load_roi_dados")
+def load_roi_dados(path: str) -> dict:
+    """
+    Devolve o CSV do ROI já formatado (datas, Duracao_min, Hora, categóricas)
+    e os agregados correspondentes: {"df", "cubo", "sketch", "sketch_dia"}
+    (ver AGREGADOS).
+
+    O resultado fica gravado em Parquet na pasta de cache; enquanto o CSV
+    não mudar (tamanho/mtime, ou hash se só o mtime mudou) o Parquet é lido
+    direto, sem refazer o parse. Se o CSV só ganhou linhas novas (no fim ou
+    no começo), apenas essas linhas são lidas e viram uma parte nova do cache.
+
+    `path` também pode ser uma pasta ou glob de CSVs (load_roi_particionado).
+    """
+    if particionada(path):
+        return load_roi_particionado(path)
+    cache_dir, meta_path = _cache_paths(path)
+    fp = file_fingerprint(path)
+    meta = _read_meta(meta_path)
+    digest = None
+
+    if meta is not None and all(os.path.exists(os.path.join(cache_dir, p)) for p in meta["parts"]):
+        if meta["size"] == fp["size"]:
+            if meta["mtime_ns"] == fp["mtime_ns"]:
+                registrar_cache("roi.parquet", acerto=True)
+                return _read_cached(cache_dir, meta)
+            # mesmo tamanho, mtime diferente (ex.: checkout/cópia): confere o conteúdo
+            digest = file_hash(path)
+            if digest == meta["hash"]:
+                meta.update(fp)
+                try:
+                    _write_meta(meta_path, meta)
+                except OSError:
+                    pass
+                registrar_cache("roi.parquet", acerto=True)
+                return _read_cached(cache_dir, meta)
+        else:
+            trecho = _novo_trecho(path, meta, fp["size"])
+            if trecho is not None:
+                try:
+                    registrar_cache("roi.parquet", acerto=False)
+                    return _ingest_incremental(path, cache_dir, meta_path, meta, fp, trecho)
+                except (OSError, ValueError, pd.errors.ParserError):
+                    pass
+
+    registrar_cache("roi.parquet", acerto=False)
+    if digest is None:
+        digest = file_hash(path)
+    return _rebuild(path, cache_dir, meta_path, fp, digest)
+
+
+def load_roi_formatado(path: str) -> pd.DataFrame:
+    """Só o DataFrame formatado de load_roi_dados."""
+    return load_roi_dados(path)["df"]
+
+
+# =============================
+# Fonte particionada (pasta ou glob de CSVs)
+# =============================
+# processos para ler as partições novas (cada um grava as suas); ROI_WORKERS sobrescreve
+WORKERS_PARTICOES = int(os.environ.get("ROI_WORKERS", "0")) or min(8, os.cpu_count() or 1)
+# partição das linhas sem Data Início
+SEM_DATA = "sem_data"
+
+
+def particionada(fonte: str) -> bool:
+    """True se `fonte` é uma pasta ou um glob de CSVs em vez de um arquivo."""
+    return os.path.isdir(fonte) or glob.has_magic(fonte)
+
+
+def listar_particoes(fonte: str) -> list[str]:
+    """CSVs da fonte em ordem de nome; um arquivo comum é a sua única partição."""
+    if os.path.isdir(fonte):
+        padrao = os.path.join(fonte, "*.csv")
+    elif glob.has_magic(fonte):
+        padrao = fonte
+    else:
+        return [fonte] if os.path.isfile(fonte) else []
+    return sorted(os.path.abspath(p) for p in glob.glob(padrao) if os.path.isfile(p))
+
+
+def tamanho_fonte(fonte: str) -> int:
+    """Bytes somados de todos os CSVs da fonte."""
+    return sum(os.path.getsize(p) for p in listar_particoes(fonte))
+
+
+def _cache_particoes(fonte: str) -> tuple[str, str]:
+    nome = "particoes-" + _digest(os.path.abspath(fonte).encode())[:12]
+    cache_dir = os.path.join(get_cache_dir(), nome)
+    return cache_dir, os.path.join(cache_dir, "meta.json")
+
+
+def _gravar_parquet(df: pd.DataFrame, path: str) -> None:
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _ingerir_particao(csv_path: str, cache_dir: str, pid: str) -> dict:
+    """
+    Lê e formata um CSV-partição. As linhas vão para mes=AAAA-MM/<pid>.parquet
+    (uma por mês de Data Início) e os agregados para agregados/<pid>/.
+    Devolve {mês: {"arquivo", "linhas", "min", "max"}}.
+    """
+    df = formatacao_csv(read_roi_csv(csv_path), copiar=False)
+    if "Data Início" in df.columns:
+        chave = df["Data Início"].dt.strftime("%Y-%m").fillna(SEM_DATA).to_numpy()
+    else:
+        chave = np.full(len(df), SEM_DATA, dtype=object)
+
+    meses = {}
+    for mes, idx in df.groupby(chave, sort=True).indices.items():
+        parte = df.iloc[idx]
+        arquivo = f"mes={mes}/{pid}.parquet"
+        os.makedirs(os.path.join(cache_dir, f"mes={mes}"), exist_ok=True)
+        _gravar_parquet(parte, os.path.join(cache_dir, arquivo))
+        datas = parte["Data Início"].dropna() if "Data Início" in parte.columns else pd.Series(dtype="datetime64[ns]")
+        meses[mes] = {
+            "arquivo": arquivo,
+            "linhas": len(parte),
+            "min": datas.min().isoformat() if not datas.empty else None,
+            "max": datas.max().isoformat() if not datas.empty else None,
+        }
+
+    pasta_agg = os.path.join(cache_dir, "agregados", pid)
+    os.makedirs(pasta_agg, exist_ok=True)
+    for nome, (montar, *_resto) in AGREGADOS.items():
+        _write_agregado(pasta_agg, nome, montar(df))
+    return meses
+
+
+def _remover_particao(cache_dir: str, registro: dict) -> None:
+    for item in registro.get("meses", {}).values():
+        try:
+            os.remove(os.path.join(cache_dir, item["arquivo"]))
+        except OSError:
+            pass
+    for nome in AGREGADOS:
+        try:
+            os.remove(os.path.join(cache_dir, "agregados", registro["id"], f"{nome}.parquet"))
+        except OSError:
+            pass
+
+
+def _combinar(nome: str, valores: list):
+    """Soma os agregados de todas as partições (merge de AGREGADOS)."""
+    merge = AGREGADOS[nome][1]
+    if isinstance(valores[0], pd.DataFrame):
+        return merge(*valores)
+    # sketches: uma cópia só, e o resto entra nela no lugar
+    total = merge(valores[0], valores[-1]) if len(valores) > 1 else valores[0]
+    for valor in valores[1:-1]:
+        total.merge(valor)
+    return total
+
+
+def _selecionar_meses(registro: dict, inicio=None, fim=None) -> list[str]:
+    """
+    Arquivos mes=... cujas datas cruzam [inicio, fim), na ordem das
+    partições. Sem período, tudo (inclusive as linhas sem data).
+    """
+    ini = pd.Timestamp(inicio) if inicio is not None else None
+    fi = pd.Timestamp(fim) if fim is not None else None
+    arquivos = []
+    for csv_path in sorted(registro):
+        for mes, item in sorted(registro[csv_path]["meses"].items()):
+            if ini is not None or fi is not None:
+                if item["min"] is None:
+                    continue
+                if fi is not None and pd.Timestamp(item["min"]) >= fi:
+                    continue
+                if ini is not None and pd.Timestamp(item["max"]) < ini:
+                    continue
+            arquivos.append(item["arquivo"])
+    return arquivos
+
+
+def _ler_meses(cache_dir: str, arquivos: list[str], inicio=None, fim=None) -> pd.DataFrame:
+    frames = [pd.read_parquet(os.path.join(cache_dir, a)) for a in arquivos]
+    if not frames:
+        return pd.DataFrame()
+    df = frames[0] if len(frames) == 1 else compactar_schema(pd.concat(frames, ignore_index=True))
+    if inicio is not None or fim is not None:
+        mask = pd.Series(True, index=df.index)
+        if inicio is not None:
+            mask &= df["Data Início"] >= pd.Timestamp(inicio)
+        if fim is not None:
+            mask &= df["Data Início"] < pd.Timestamp(fim)
+        df = df[mask].reset_index(drop=True)
+    return df
+
+
+@medido("csv.load_roi_particionado")
+def load_roi_particionado(fonte: str, inicio=None, fim=None, linhas: bool = True) -> dict:
+    """
+    ROI a partir de uma pasta/glob de CSVs (ex.: um export por dia ou mês).
+
+    Cada CSV novo ou alterado (tamanho/mtime) é lido num pool de processos e gravado
+    no cache particionado por mês de Data Início, com os seus agregados;
+    CSVs que sumiram saem do cache. Os agregados totais ({"cubo", "sketch",
+    "sketch_dia"}) são a soma dos de cada partição e ficam gravados enquanto
+    o conjunto de CSVs não muda.
+
+    Com `linhas`, "df" traz só as linhas com inicio <= Data Início < fim,
+    lidas apenas dos meses que cruzam o período (sem período: tudo).
+    """
+    arquivos = listar_particoes(fonte)
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum CSV em {fonte}")
+    cache_dir, meta_path = _cache_particoes(fonte)
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = _read_meta(meta_path) or {"version": CACHE_VERSION, "fonte": fonte, "arquivos": {}}
+    registro = meta["arquivos"]
+
+    atuais = {p: file_fingerprint(p) for p in arquivos}
+    removidos = [p for p in registro if p not in atuais]
+    for p in removidos:
+        _remover_particao(cache_dir, registro.pop(p))
+    pendentes = []
+    for p, fp in atuais.items():
+        r = registro.get(p)
+        em_dia = (
+            r is not None and r["size"] == fp["size"] and r["mtime_ns"] == fp["mtime_ns"]
+            and all(os.path.exists(os.path.join(cache_dir, m["arquivo"])) for m in r["meses"].values())
+        )
+        registrar_cache("roi.particoes", acerto=em_dia)
+        if not em_dia:
+            if r is not None:
+                _remover_particao(cache_dir, registro.pop(p))
+            pendentes.append(p)
+
+    if pendentes:
+        ids = [_digest(p.encode())[:16] for p in pendentes]
+        workers = min(WORKERS_PARTICOES, len(pendentes))
+        if workers > 1:
+            # os processos gravam o Parquet direto no cache; só o resumo dos meses volta
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                resultados = list(pool.map(_ingerir_particao, pendentes, [cache_dir] * len(pendentes), ids))
+        else:
+            resultados = [_ingerir_particao(p, cache_dir, pid) for p, pid in zip(pendentes, ids)]
+        for p, pid, meses in zip(pendentes, ids, resultados):
+            registro[p] = {**atuais[p], "id": pid, "meses": meses}
+
+    # agregados totais: refeitos só quando o conjunto de partições muda
+    assinatura = _digest(json.dumps(
+        sorted((r["id"], r["size"], r["mtime_ns"]) for r in registro.values())
+    ).encode())
+    pasta_total = os.path.join(cache_dir, "agregados", "total")
+    dados = {}
+    if meta.get("assinatura") == assinatura:
+        dados = {nome: _read_agregado(pasta_total, nome) for nome in AGREGADOS}
+    if not dados or any(v is None for v in dados.values()):
+        os.makedirs(pasta_total, exist_ok=True)
+        for nome in AGREGADOS:
+            valores = [_read_agregado(os.path.join(cache_dir, "agregados", registro[p]["id"]), nome)
+                       for p in sorted(registro)]
+            valores = [v for v in valores if v is not None]
+            dados[nome] = _combinar(nome, valores) if valores else AGREGADOS[nome][0](pd.DataFrame())
+            _write_agregado(pasta_total, nome, dados[nome])
+    if pendentes or removidos or meta.get("assinatura") != assinatura:
+        meta["assinatura"] = assinatura
+        meta["built_at"] = dt.datetime.now().isoformat(timespec="seconds")
+        _write_meta(meta_path, meta)
+
+    if linhas:
+        dados["df"] = _ler_meses(cache_dir, _selecionar_meses(registro, inicio, fim), inicio, fim)
+    dados["particoes"] = len(registro)
+    return dados
+
+
+def ler_particoes(fonte: str, inicio=None, fim=None) -> Iterator[pd.DataFrame]:
+    """
+    Linhas já formatadas da fonte particionada, um arquivo mensal por vez,
+    pulando os meses fora de [inicio, fim). Usa o cache de
+    load_roi_particionado (que precisa ter rodado antes).
+    """
+    cache_dir, meta_path = _cache_particoes(fonte)
+    meta = _read_meta(meta_path)
+    if meta is None:
+        return
+    for arquivo in _selecionar_meses(meta["arquivos"], inicio, fim):
+        yield pd.read_parquet(os.path.join(cache_dir, arquivo))
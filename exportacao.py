@@ -0,0 +1,307 @@
+"""
+Exportação em blocos do ROI filtrado e das planilhas de horas, sem Streamlit.
+
+Os dados saem de um gerador de blocos e cada bloco é gravado e descartado
+antes do próximo: CSV anexado ao arquivo, Parquet em row groups
+(pyarrow.ParquetWriter) e XLSX no modo write_only do openpyxl. A memória
+usada depende do tamanho do bloco, não do tamanho da exportação.
+
+As exportações rodam num worker em segundo plano (Exportador); a página
+só acompanha o andamento e oferece o arquivo quando fica pronto.
+"""
+import datetime as dt
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from csvLoader import get_cache_dir
+from planilhaLoader import formatar_duracoes
+from roiSqlite import ler_banco
+from roiStreaming import blocos_filtrados
+
+log = logging.getLogger(__name__)
+
+FORMATOS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "XLSX": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+LINHAS_POR_BLOCO = 100_000
+# limite de linhas de uma aba do Excel (sem o cabeçalho); o resto continua numa aba nova
+MAX_LINHAS_XLSX = 1_048_575
+WORKERS = int(os.environ.get("EXPORT_WORKERS", "1"))
+# arquivos gerados ficam disponíveis por este tempo
+VALIDADE_H = float(os.environ.get("EXPORT_VALIDADE_H", "24"))
+MAX_TAREFAS = 50
+
+
+def pasta_exportacoes() -> str:
+    """Pasta dos arquivos exportados (EXPORT_DIR sobrescreve)."""
+    return os.environ.get("EXPORT_DIR") or os.path.join(get_cache_dir(), "exportacoes")
+
+
+# =============================
+# Fontes de blocos
+# =============================
+def blocos_roi(dados: dict, path: str, inicio=None, fim=None, filtros: dict | None = None,
+               linhas_por_bloco: int = LINHAS_POR_BLOCO) -> Iterator[pd.DataFrame]:
+    """
+    Linhas do ROI no período/filtros, em blocos, de onde o dataset estiver:
+    df em memória (posições do índice), banco SQLite ou o próprio CSV lido
+    em blocos (modo streaming).
+    """
+    if "df" in dados:
+        pos = dados["indice"].posicoes(inicio, fim, filtros)
+        for ini in range(0, len(pos), linhas_por_bloco):
+            yield dados["df"].iloc[pos[ini:ini + linhas_por_bloco]]
+    elif "sqlite" in dados:
+        yield from ler_banco(dados["sqlite"], linhas_por_bloco, inicio, fim, filtros)
+    else:
+        yield from blocos_filtrados(path, inicio, fim, filtros)
+
+
+def blocos_tabela(df: pd.DataFrame, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> Iterator[pd.DataFrame]:
+    """Uma tabela já em memória (ex.: outliers) fatiada em blocos."""
+    for ini in range(0, len(df), linhas_por_bloco):
+        yield df.iloc[ini:ini + linhas_por_bloco]
+
+
+def blocos_horas(horas: pd.DataFrame, planilhas: list[str]) -> Iterator[pd.DataFrame]:
+    """Um bloco por worksheet, com as durações em HH:MM:SS como na página."""
+    for nome in planilhas:
+        df = horas[horas["Planilha"] == nome].drop(columns=["Mes"], errors="ignore")
+        if not df.empty:
+            yield formatar_duracoes(df.reset_index(drop=True))
+
+
+# =============================
+# Gravação
+# =============================
+def _texto_categorias(bloco: pd.DataFrame) -> pd.DataFrame:
+    """Categóricas viram texto: o dicionário muda de bloco para bloco."""
+    cats = [c for c in bloco.columns if isinstance(bloco[c].dtype, pd.CategoricalDtype)]
+    if not cats:
+        return bloco
+    return bloco.assign(**{c: bloco[c].astype("str").where(bloco[c].notna()) for c in cats})
+
+
+def _tipos_largos(bloco: pd.DataFrame) -> pd.DataFrame:
+    """
+    Inteiros -> int64 e reais -> float64: compactar_schema escolhe a largura
+    por bloco (Código int16 num bloco e int32 no seguinte), e o Parquet
+    precisa de um esquema só.
+    """
+    tipos = {}
+    for c in bloco.columns:
+        kind = getattr(bloco[c].dtype, "kind", "")
+        if kind in "iu" and bloco[c].dtype != "int64":
+            tipos[c] = "int64"
+        elif kind == "f" and bloco[c].dtype != "float64":
+            tipos[c] = "float64"
+    return bloco.astype(tipos) if tipos else bloco
+
+
+def _gravar_csv(blocos: Iterable[pd.DataFrame], destino: str, progresso: Callable[[int], None]) -> None:
+    # mesmo padrão do relatório em lote: ; e vírgula decimal, BOM para o Excel
+    with open(destino, "w", encoding="utf-8-sig", newline="") as f:
+        for i, bloco in enumerate(blocos):
+            bloco.to_csv(f, sep=";", decimal=",", index=False, header=i == 0)
+            progresso(len(bloco))
+
+
+def _esquema(tabela: pa.Table) -> pa.Schema:
+    """
+    Esquema do arquivo a partir do primeiro bloco. Coluna só com nulos nele
+    (ex.: texto opcional vazio nas primeiras linhas) sai com tipo null, que
+    não recebe os blocos seguintes; vira texto.
+    """
+    campos = [c.with_type(pa.large_string()) if pa.types.is_null(c.type) else c for c in tabela.schema]
+    return pa.schema(campos, metadata=tabela.schema.metadata)
+
+
+def _gravar_parquet(blocos: Iterable[pd.DataFrame], destino: str, progresso: Callable[[int], None]) -> None:
+    escritor = None
+    try:
+        for bloco in blocos:
+            tabela = pa.Table.from_pandas(_tipos_largos(_texto_categorias(bloco)), preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(destino, _esquema(tabela))
+            tabela = tabela.cast(escritor.schema)
+            escritor.write_table(tabela)
+            progresso(len(bloco))
+    finally:
+        if escritor is not None:
+            escritor.close()
+    if escritor is None:
+        pd.DataFrame().to_parquet(destino, index=False)
+
+
+def _nome_aba(nome: str, usados: set) -> str:
+    # Excel: até 31 caracteres, sem []:*?/\ e sem repetir
+    base = re.sub(r"[\[\]:*?/\\]", "_", str(nome))[:31] or "Dados"
+    nome, n = base, 2
+    while nome in usados:
+        sufixo = f" ({n})"
+        nome, n = base[:31 - len(sufixo)] + sufixo, n + 1
+    usados.add(nome)
+    return nome
+
+
+def _gravar_xlsx(blocos: Iterable[pd.DataFrame], destino: str, progresso: Callable[[int], None],
+                 aba_por: str | None) -> None:
+    """
+    write_only: as linhas vão para o arquivo à medida que são anexadas.
+    Com `aba_por`, cada bloco vai para a aba com o valor dessa coluna
+    (os blocos devem vir um por valor, como em blocos_horas).
+    """
+    wb = Workbook(write_only=True)
+    usados: set = set()
+    ws, linhas_aba, aba_atual = None, 0, None
+    for bloco in blocos:
+        nome = str(bloco[aba_por].iat[0]) if aba_por and not bloco.empty else "Dados"
+        valores = _texto_categorias(bloco)
+        valores = valores.astype(object).where(valores.notna(), None)
+        linhas = valores.itertuples(index=False, name=None)
+        while True:
+            if ws is None or linhas_aba >= MAX_LINHAS_XLSX or (aba_por and nome != aba_atual):
+                ws = wb.create_sheet(_nome_aba(nome, usados))
+                ws.append(list(bloco.columns))
+                linhas_aba, aba_atual = 0, nome
+            cabe = MAX_LINHAS_XLSX - linhas_aba
+            lote = list(itertools.islice(linhas, cabe))
+            for linha in lote:
+                ws.append(linha)
+            linhas_aba += len(lote)
+            # aba cheia: só abre outra se o bloco ainda tiver linhas
+            if len(lote) < cabe:
+                break
+            proxima = next(linhas, None)
+            if proxima is None:
+                break
+            linhas = itertools.chain([proxima], linhas)
+        progresso(len(bloco))
+    if ws is None:
+        wb.create_sheet("Dados")
+    wb.save(destino)
+
+
+def gravar_blocos(blocos: Iterable[pd.DataFrame], destino: str, formato: str,
+                  progresso: Callable[[int], None] | None = None, aba_por: str | None = None) -> None:
+    """Grava os blocos em `destino` no `formato` de FORMATOS, um bloco por vez."""
+    progresso = progresso or (lambda n: None)
+    if formato == "CSV":
+        _gravar_csv(blocos, destino, progresso)
+    elif formato == "Parquet":
+        _gravar_parquet(blocos, destino, progresso)
+    elif formato == "XLSX":
+        _gravar_xlsx(blocos, destino, progresso, aba_por)
+    else:
+        raise ValueError(f"formato desconhecido: {formato}")
+
+
+# =============================
+# Worker em segundo plano
+# =============================
+class Exportador:
+    """
+    Fila de exportações do processo. Cada tarefa é um dict com estado
+    ("na fila", "gerando", "pronto", "erro"), linhas gravadas, caminho e
+    nome do arquivo; status() devolve uma cópia.
+    """
+
+    def __init__(self, workers: int = WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exportacao")
+        self._tarefas: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def submeter(self, nome: str, gerar: Callable[[], Iterable[pd.DataFrame]], formato: str,
+                 aba_por: str | None = None) -> str:
+        """
+        Agenda a exportação; `gerar()` só é chamado no worker. Devolve o id
+        da tarefa para acompanhar com status().
+        """
+        ext, mime = FORMATOS[formato]
+        pasta = pasta_exportacoes()
+        os.makedirs(pasta, exist_ok=True)
+        self._limpar(pasta)
+        tid = uuid.uuid4().hex[:12]
+        arquivo = f"{nome}_{dt.datetime.now():%Y%m%d_%H%M%S}{ext}"
+        tarefa = {
+            "id": tid, "estado": "na fila", "linhas": 0, "erro": None,
+            "arquivo": arquivo, "mime": mime, "caminho": os.path.join(pasta, f"{tid}{ext}"),
+            "inicio": time.time(), "fim": None,
+        }
+        with self._lock:
+            self._tarefas[tid] = tarefa
+            for antiga in list(self._tarefas)[:-MAX_TAREFAS]:
+                self._tarefas.pop(antiga)
+        self._pool.submit(self._executar, tarefa, gerar, formato, aba_por)
+        return tid
+
+    def _executar(self, tarefa: dict, gerar, formato: str, aba_por: str | None) -> None:
+        def progresso(n: int) -> None:
+            tarefa["linhas"] += n
+
+        tarefa["estado"] = "gerando"
+        tmp = tarefa["caminho"] + ".tmp"
+        try:
+            gravar_blocos(gerar(), tmp, formato, progresso, aba_por)
+            os.replace(tmp, tarefa["caminho"])
+            tarefa["estado"] = "pronto"
+        except Exception as e:
+            log.exception("erro na exportação %s", tarefa["arquivo"])
+            tarefa["erro"] = str(e)
+            tarefa["estado"] = "erro"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        finally:
+            tarefa["fim"] = time.time()
+
+    def status(self, tid: str) -> dict | None:
+        """Cópia da tarefa; None se não existe ou se o arquivo pronto já foi apagado."""
+        with self._lock:
+            tarefa = self._tarefas.get(tid)
+            if tarefa and tarefa["estado"] == "pronto" and not os.path.exists(tarefa["caminho"]):
+                self._tarefas.pop(tid)
+                return None
+            return dict(tarefa) if tarefa else None
+
+    def _limpar(self, pasta: str) -> None:
+        """Apaga exportações mais velhas que VALIDADE_H; as tarefas delas saem junto."""
+        limite = time.time() - VALIDADE_H * 3600
+        removidos = set()
+        for nome in os.listdir(pasta):
+            p = os.path.join(pasta, nome)
+            try:
+                if os.path.getmtime(p) < limite:
+                    os.remove(p)
+                    removidos.add(p)
+            except OSError:
+                pass
+        with self._lock:
+            for tid in [t for t, tarefa in self._tarefas.items() if tarefa["caminho"] in removidos]:
+                self._tarefas.pop(tid)
+
+
+_EXPORTADOR: Exportador | None = None
+_EXPORTADOR_LOCK = threading.Lock()
+
+
+def get_exportador() -> Exportador:
+    """Instância única do processo (compartilhada por todas as sessões)."""
+    global _EXPORTADOR
+    with _EXPORTADOR_LOCK:
+        if _EXPORTADOR is None:
+            _EXPORTADOR = Exportador()
+        return _EXPORTADOR
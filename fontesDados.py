@@ -0,0 +1,36 @@
+"""
+Fontes de dados vigiadas pelo atualizador (atualizadorDados).
+
+O app registra as fontes na subida do processo, para a primeira carga
+começar em segundo plano antes de alguém abrir a página. O registro roda
+numa thread porque importar pandas e os loaders leva cerca de 1s, e a
+primeira pintura do app não deve esperar por isso. As páginas chamam
+registrar_fontes() também: se o registro em segundo plano ainda não
+terminou, ele é feito na hora (registrar de novo não faz nada).
+"""
+import threading
+
+_THREAD: threading.Thread | None = None
+_LOCK = threading.Lock()
+
+
+def registrar_fontes() -> None:
+    """Registra ROI e Controle de Horas no atualizador do processo."""
+    from atualizadorDados import get_atualizador
+    from csvLoader import get_csv_path
+    from horasAgregados import carregar_horas
+    from planilhaLoader import get_excel_path
+    from roiDados import carregar_roi
+
+    atualizador = get_atualizador()
+    atualizador.registrar("roi", get_csv_path(), carregar_roi)
+    atualizador.registrar("horas", get_excel_path(), carregar_horas)
+
+
+def iniciar() -> None:
+    """Dispara registrar_fontes() numa thread, uma vez por processo."""
+    global _THREAD
+    with _LOCK:
+        if _THREAD is None:
+            _THREAD = threading.Thread(target=registrar_fontes, name="registro-fontes", daemon=True)
+            _THREAD.start()
@@ -0,0 +1,163 @@
+"""
+Agregados do Controle de Horas para a visão anual.
+
+Parte da tabela longa de load_horas (todas as worksheets, durações em
+segundos) e monta de uma vez as tabelas da visão anual: uma linha por dia
+com data completa, totais por mês e médias por dia da semana. A página só
+filtra/plota essas tabelas, sem reler as worksheets.
+"""
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import medido
+from planilhaLoader import MONTH_MAP, load_horas, data_salvamento
+
+DOW_ORDER = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+DOW_MAP = {0: "Seg", 1: "Ter", 2: "Qua", 3: "Qui", 4: "Sex", 5: "Sáb", 6: "Dom"}
+MES_NOME = {v: k.capitalize() for k, v in MONTH_MAP.items()}
+
+COLUNAS_SEGUNDOS = {
+    "Monit_s": "Total - Monitoramento",
+    "Dev_s": "Total - Desenvolvimento",
+}
+
+
+def anos_por_planilha(planilhas: list[str], meses: list[int | None], ano_final: int | None = None,
+                      referencia: dt.date | None = None) -> dict[str, int]:
+    """
+    Ano de cada worksheet. O Excel não guarda o ano: as worksheets estão em
+    ordem cronológica, então o ano vira quando o mês volta (dez -> jan).
+    A última worksheet fica em `ano_final` (padrão: o ano de `referencia`,
+    ou o anterior se o mês dela ainda não tinha chegado). `referencia` é a
+    data em que o Excel foi salvo (carregar_horas); sem ela, hoje.
+    """
+    ref = referencia or dt.date.today()
+    validos = [m for m in meses if m is not None and not pd.isna(m)]
+    if ano_final is None:
+        ultimo = validos[-1] if validos else ref.month
+        ano_final = ref.year if ultimo <= ref.month else ref.year - 1
+
+    viradas = 0
+    anterior = None
+    relativos = []
+    for mes in meses:
+        if mes is not None and not pd.isna(mes):
+            if anterior is not None and mes < anterior:
+                viradas += 1
+            anterior = mes
+        relativos.append(viradas)
+    return {nome: ano_final - viradas + rel for nome, rel in zip(planilhas, relativos)}
+
+
+def horas_diarias(horas: pd.DataFrame, ano_final: int | None = None,
+                  referencia: dt.date | None = None) -> pd.DataFrame:
+    """
+    Uma linha por dia trabalhado: Data, Ano, Mes, Planilha, DiaSemana e os
+    totais em segundos (Monit_s, Dev_s, Total_s). Linhas sem dia válido
+    ("dd/mm" ou "d") ficam de fora.
+    """
+    colunas = ["Data", "Ano", "Mes", "Planilha", "DiaSemana", "Monit_s", "Dev_s", "Total_s"]
+    if horas is None or horas.empty:
+        return pd.DataFrame(columns=colunas)
+
+    ordem = horas.drop_duplicates("Planilha")
+    anos = anos_por_planilha(list(ordem["Planilha"]), list(ordem["Mes"]), ano_final, referencia)
+
+    partes = horas["Dia"].astype(str).str.extract(r"^\s*(\d{1,2})(?:/(\d{1,2}))?")
+    dia = pd.to_numeric(partes[0], errors="coerce")
+    # mês do próprio "dd/mm" quando existe; senão o mês da worksheet
+    mes = pd.to_numeric(partes[1], errors="coerce").fillna(pd.to_numeric(horas["Mes"], errors="coerce"))
+    ano = horas["Planilha"].map(anos)
+    data = pd.to_datetime(
+        pd.DataFrame({"year": ano, "month": mes, "day": dia}), errors="coerce"
+    )
+
+    out = pd.DataFrame({
+        "Data": data,
+        "Planilha": horas["Planilha"],
+    })
+    for novo, col in COLUNAS_SEGUNDOS.items():
+        out[novo] = (horas[col] if col in horas.columns else pd.Series(0, index=horas.index)) \
+            .fillna(0).astype("int64")
+    if "Total" in horas.columns:
+        out["Total_s"] = horas["Total"].fillna(out["Monit_s"] + out["Dev_s"]).astype("int64")
+    else:
+        out["Total_s"] = out["Monit_s"] + out["Dev_s"]
+
+    out = out[out["Data"].notna()].copy()
+    out["Ano"] = out["Data"].dt.year.astype("int64")
+    out["Mes"] = out["Data"].dt.month.astype("int64")
+    out["DiaSemana"] = pd.Categorical(out["Data"].dt.dayofweek.map(DOW_MAP), categories=DOW_ORDER, ordered=True)
+    return out[colunas].sort_values("Data").reset_index(drop=True)
+
+
+def totais_mensais(diario: pd.DataFrame) -> pd.DataFrame:
+    """Totais por (Ano, Mes) em horas, com dias trabalhados e % de Monitoramento."""
+    colunas = ["Ano", "Mes", "MesNome", "Periodo", "Dias", "Monit_h", "Dev_h", "Total_h", "Monit_pct"]
+    if diario.empty:
+        return pd.DataFrame(columns=colunas)
+    g = diario.groupby(["Ano", "Mes"], sort=True).agg(
+        Dias=("Data", "nunique"),
+        Monit_s=("Monit_s", "sum"),
+        Dev_s=("Dev_s", "sum"),
+        Total_s=("Total_s", "sum"),
+    ).reset_index()
+    g["MesNome"] = g["Mes"].map(MES_NOME)
+    g["Periodo"] = g["MesNome"].str[:3] + "/" + g["Ano"].astype(str)
+    g["Monit_h"] = g["Monit_s"] / 3600
+    g["Dev_h"] = g["Dev_s"] / 3600
+    g["Total_h"] = g["Total_s"] / 3600
+    base = g["Monit_h"] + g["Dev_h"]
+    g["Monit_pct"] = np.where(base > 0, g["Monit_h"] / base.where(base > 0, 1) * 100, 0.0)
+    return g[colunas]
+
+
+def medias_dia_semana(diario: pd.DataFrame) -> pd.DataFrame:
+    """Média de horas por dia trabalhado, por dia da semana (ordem DOW_ORDER)."""
+    colunas = ["DiaSemana", "Dias", "Monit_h", "Dev_h", "Total_h"]
+    if diario.empty:
+        return pd.DataFrame(columns=colunas)
+    g = diario.groupby("DiaSemana", observed=False).agg(
+        Dias=("Data", "nunique"),
+        Monit_s=("Monit_s", "mean"),
+        Dev_s=("Dev_s", "mean"),
+        Total_s=("Total_s", "mean"),
+    ).reset_index()
+    g["Monit_h"] = g["Monit_s"].fillna(0) / 3600
+    g["Dev_h"] = g["Dev_s"].fillna(0) / 3600
+    g["Total_h"] = g["Total_s"].fillna(0) / 3600
+    g["DiaSemana"] = g["DiaSemana"].astype(str)
+    return g[colunas]
+
+
+@medido("horas.agregar")
+def agregar_horas(horas: pd.DataFrame, ano_final: int | None = None,
+                  referencia: dt.date | None = None) -> dict:
+    """
+    Tabelas da visão anual a partir da tabela longa de load_horas:
+      - diario: uma linha por dia (horas_diarias)
+      - mensal: totais por mês (totais_mensais)
+      - semana: médias por dia da semana (medias_dia_semana)
+    """
+    diario = horas_diarias(horas, ano_final, referencia)
+    return {
+        "diario": diario,
+        "mensal": totais_mensais(diario),
+        "semana": medias_dia_semana(diario),
+    }
+
+
+def carregar_horas(excel_path: str) -> dict:
+    """
+    Tabela longa de todas as worksheets + tabelas da visão anual
+    ({"horas", "diario", "mensal", "semana"}). A página usa via atualizador
+    em segundo plano (sempre que o Excel muda); jobs em lote chamam direto.
+
+    O ano das worksheets sai da data em que o Excel foi salvo, não de hoje:
+    o resultado fica em cache pela versão do arquivo e não pode mudar
+    sozinho na virada do ano.
+    """
+    horas = load_horas(excel_path)
+    return {"horas": horas, **agregar_horas(horas, referencia=data_salvamento(excel_path))}
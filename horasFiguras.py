@@ -0,0 +1,211 @@
+"""
+Figuras do Controle de Horas, sem Streamlit.
+
+Cada função recebe as tabelas já preparadas (load_horas / horasAgregados)
+e devolve uma figura Plotly; a página só chama st.plotly_chart e o
+relatório em lote grava o HTML.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from horasAgregados import DOW_ORDER
+from planilhaLoader import MONTH_MAP
+
+COR_MONIT = "#FAA43A"
+COR_DEV = "#5DA5DA"
+
+INICIO_JANELA = 8
+FIM_JANELA = 17
+
+
+def preparar_mapa(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Linhas de uma worksheet prontas para o mapa 08:00–17:00: sem a linha
+    "Soma", ordenadas pelo dia, com Monit_h/Dev_h em horas e ajustados
+    para caber na janela. Vazio se não sobrar nenhum dia.
+    """
+    # ✅ ignora "Soma"
+    df_plot = df[df["Dia"].astype(str).str.strip().str.lower() != "soma"].copy()
+    if df_plot.empty:
+        return df_plot
+
+    # mantém só o que interessa e ordena por dia (tenta ordenar pelo número no começo)
+    df_plot["DiaLabel"] = df_plot["Dia"].astype(str).str.strip()
+
+    # tenta extrair número do dia (serve pra "01/12" e "1")
+    df_plot["DiaNum"] = pd.to_numeric(df_plot["DiaLabel"].str.extract(r"(\d+)")[0], errors="coerce")
+    df_plot = df_plot.sort_values(["DiaNum", "DiaLabel"], na_position="last")
+
+    # converte tempos (segundos) para horas
+    df_plot["Monit_h"] = (df_plot["Total - Monitoramento"] / 3600).fillna(0).astype("float64")
+    df_plot["Dev_h"]   = (df_plot["Total - Desenvolvimento"] / 3600).fillna(0).astype("float64")
+
+    # opcional: limitar a janela 08-17 (9h) para caber no eixo
+    # se quiser mostrar tudo, remova o clip (mas aí pode “passar” de 17:00)
+    max_window = FIM_JANELA - INICIO_JANELA  # 9 horas
+    df_plot["Monit_h"] = df_plot["Monit_h"].clip(lower=0, upper=max_window)
+    df_plot["Dev_h"]   = df_plot["Dev_h"].clip(lower=0, upper=max_window)
+
+    # se quiser que a soma não passe de 9h, ajusta proporcionalmente
+    total = df_plot["Monit_h"] + df_plot["Dev_h"]
+    scale = (max_window / total).where(total > max_window, 1.0)
+    df_plot["Monit_h"] = df_plot["Monit_h"] * scale
+    df_plot["Dev_h"]   = df_plot["Dev_h"] * scale
+    return df_plot
+
+
+def figura_mapa(df_plot: pd.DataFrame, titulo="Mapa de horas (08:00–17:00)") -> go.Figure:
+    y = df_plot["DiaLabel"]
+
+    fig = go.Figure()
+
+    # 1) Monitoramento (começa em 08:00)
+    fig.add_trace(go.Bar(
+        y=y,
+        x=df_plot["Monit_h"],
+        base=INICIO_JANELA,
+        orientation="h",
+        name="Monitoramento",
+        marker=dict(color=COR_MONIT),
+        hovertemplate="Dia: %{y}<br>Monitoramento: %{x:.2f}h<extra></extra>",
+    ))
+
+    # 2) Desenvolvimento
+    fig.add_trace(go.Bar(
+        y=y,
+        x=df_plot["Dev_h"],
+        base=INICIO_JANELA + df_plot["Monit_h"],
+        orientation="h",
+        name="Desenvolvimento",
+        marker=dict(color=COR_DEV),
+        hovertemplate="Dia: %{y}<br>Desenvolvimento: %{x:.2f}h<extra></extra>",
+    ))
+
+    tickvals = list(range(INICIO_JANELA, FIM_JANELA + 1))
+    ticktext = [f"{h:02d}:00" for h in tickvals]
+
+    fig.update_layout(
+        template="simple_white",
+        title=titulo,
+        barmode="overlay",
+        xaxis=dict(
+            range=[INICIO_JANELA, FIM_JANELA],
+            tickmode="array",
+            tickvals=tickvals,
+            ticktext=ticktext,
+            side="top",
+            title="",
+        ),
+        yaxis=dict(
+            title="Dia",
+            autorange="reversed"
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        margin=dict(l=60, r=30, t=80, b=30),
+        height=max(420, 22 * len(df_plot))
+    )
+    return fig
+
+
+def figura_pizza(df_plot: pd.DataFrame) -> go.Figure:
+    df_pie = pd.DataFrame({
+        "Tipo": ["Monitoramento", "Desenvolvimento"],
+        "Horas": [df_plot["Monit_h"].sum(), df_plot["Dev_h"].sum()]
+    })
+    fig = px.pie(
+        df_pie,
+        names="Tipo",
+        values="Horas",
+        title="Distribuição do tempo total",
+        hole=0.35,  # donut (mais profissional)
+        color="Tipo",
+        color_discrete_map={
+            "Monitoramento": COR_MONIT,
+            "Desenvolvimento": COR_DEV,
+        }
+    )
+    fig.update_traces(
+        textinfo="percent+label",
+        marker=dict(line=dict(color="#000000", width=1))
+    )
+    fig.update_layout(
+        template="simple_white",
+        showlegend=True
+    )
+    return fig
+
+
+# =============================
+# VISÃO ANUAL
+# =============================
+def figura_mensal(mensal: pd.DataFrame) -> go.Figure:
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=mensal["Periodo"], y=mensal["Monit_h"], name="Monitoramento",
+        marker=dict(color=COR_MONIT),
+        hovertemplate="%{x}<br>Monitoramento: %{y:.1f}h<extra></extra>",
+    ))
+    fig.add_trace(go.Bar(
+        x=mensal["Periodo"], y=mensal["Dev_h"], name="Desenvolvimento",
+        marker=dict(color=COR_DEV),
+        hovertemplate="%{x}<br>Desenvolvimento: %{y:.1f}h<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(
+        x=mensal["Periodo"], y=mensal["Monit_pct"], name="% Monitoramento",
+        yaxis="y2", mode="lines+markers", line=dict(color="#333333"),
+        hovertemplate="%{x}<br>Monitoramento: %{y:.0f}%<extra></extra>",
+    ))
+    fig.update_layout(
+        template="simple_white",
+        title="Horas por mês",
+        barmode="stack",
+        yaxis=dict(title="Horas"),
+        yaxis2=dict(title="% Monitoramento", overlaying="y", side="right", range=[0, 100]),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    return fig
+
+
+def figura_ano_a_ano(mensal: pd.DataFrame) -> go.Figure:
+    """Total de horas por mês com uma linha por ano (só faz sentido com 2+ anos)."""
+    fig = px.line(
+        mensal, x="Mes", y="Total_h", color=mensal["Ano"].astype(str), markers=True,
+        labels={"Mes": "Mês", "Total_h": "Horas", "color": "Ano"},
+        title="Comparativo ano a ano",
+    )
+    fig.update_layout(
+        template="simple_white",
+        xaxis=dict(tickmode="array", tickvals=list(range(1, 13)),
+                   ticktext=[m[:3].capitalize() for m in MONTH_MAP]),
+    )
+    return fig
+
+
+def figura_dia_semana(semana: pd.DataFrame) -> go.Figure:
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=semana["DiaSemana"], y=semana["Monit_h"], name="Monitoramento",
+        marker=dict(color=COR_MONIT),
+        hovertemplate="%{x}<br>Monitoramento: %{y:.2f}h<extra></extra>",
+    ))
+    fig.add_trace(go.Bar(
+        x=semana["DiaSemana"], y=semana["Dev_h"], name="Desenvolvimento",
+        marker=dict(color=COR_DEV),
+        hovertemplate="%{x}<br>Desenvolvimento: %{y:.2f}h<extra></extra>",
+    ))
+    fig.update_layout(
+        template="simple_white",
+        title="Média de horas por dia da semana",
+        barmode="stack",
+        xaxis=dict(categoryorder="array", categoryarray=DOW_ORDER),
+        yaxis=dict(title="Horas"),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    return fig
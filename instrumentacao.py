@@ -0,0 +1,182 @@
+"""
+Medição de tempo por etapa das execuções das páginas.
+
+Cada execução de página (ou carga em segundo plano) abre uma Execucao com
+`execucao(nome)`. Dentro dela, `etapa(nome)` / `@medido(nome)` registram
+o tempo de parede e a variação de memória residente de cada trecho
+(etapas podem ser aninhadas), e `cache_medido` conta acertos e falhas dos
+caches do Streamlit. Fora de uma execução tudo vira no-op barato.
+
+As últimas execuções ficam num buffer do processo (painel de depuração) e
+cada uma termina numa linha JSON no logger "central.perf" (ligado com
+CENTRAL_PERF_LOG=1, ver configurar_log).
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+log = logging.getLogger("central.perf")
+
+MAX_EXECUCOES = int(os.environ.get("CENTRAL_PERF_HISTORICO", "200"))
+
+_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb() -> float | None:
+    """Memória residente do processo (Linux); None onde /proc não existe."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGINA / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Execucao:
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.inicio = time.time()
+        self.etapas: list[dict] = []
+        self.cache: dict[str, dict[str, int]] = {}
+        self.total_s: float | None = None
+        self._nivel = 0
+
+    def registrar_cache(self, nome: str, acerto: bool) -> None:
+        c = self.cache.setdefault(nome, {"acertos": 0, "falhas": 0})
+        c["acertos" if acerto else "falhas"] += 1
+
+    def como_dict(self) -> dict:
+        return {
+            "execucao": self.nome,
+            "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.inicio)),
+            "total_s": round(self.total_s or 0.0, 4),
+            "etapas": self.etapas,
+            "cache": self.cache,
+        }
+
+
+_ATUAL: contextvars.ContextVar[Execucao | None] = contextvars.ContextVar("execucao_atual", default=None)
+# marcador do cache_medido: o corpo da função cacheada só roda numa falha
+_FALHA: contextvars.ContextVar[list | None] = contextvars.ContextVar("falha_cache", default=None)
+
+_HISTORICO: deque = deque(maxlen=MAX_EXECUCOES)
+_HISTORICO_LOCK = threading.Lock()
+
+
+@contextmanager
+def execucao(nome: str):
+    """Abre uma execução (uma rodada da página); ao sair ela vai para o histórico e para o log."""
+    ex = Execucao(nome)
+    token = _ATUAL.set(ex)
+    t0 = time.perf_counter()
+    try:
+        yield ex
+    finally:
+        ex.total_s = time.perf_counter() - t0
+        _ATUAL.reset(token)
+        with _HISTORICO_LOCK:
+            _HISTORICO.append(ex)
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps(ex.como_dict(), ensure_ascii=False, default=str))
+
+
+@contextmanager
+def etapa(nome: str):
+    """Tempo e variação de memória de um trecho dentro da execução atual."""
+    ex = _ATUAL.get()
+    if ex is None:
+        yield
+        return
+    registro = {"etapa": nome, "nivel": ex._nivel, "s": None, "mem_mb": None}
+    ex.etapas.append(registro)
+    ex._nivel += 1
+    mem0 = _rss_mb()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro["s"] = round(time.perf_counter() - t0, 5)
+        mem1 = _rss_mb()
+        if mem0 is not None and mem1 is not None:
+            registro["mem_mb"] = round(mem1 - mem0, 2)
+        ex._nivel -= 1
+
+
+def medido(nome: str):
+    """Decorador: a função inteira vira uma etapa."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _ATUAL.get() is None:
+                return fn(*args, **kwargs)
+            with etapa(nome):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def cache_medido(nome: str, cache_decorador):
+    """
+    Aplica `cache_decorador` (ex.: st.cache_data(show_spinner=False)) e
+    conta acerto/falha de cada chamada: o corpo da função só roda quando o
+    cache falha. A chamada também é registrada como etapa.
+
+        @cache_medido("roi.tendencias", st.cache_data(show_spinner=False))
+        def tendencias_cache(...): ...
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def corpo(*args, **kwargs):
+            marcador = _FALHA.get()
+            if marcador is not None:
+                marcador[0] = True
+            return fn(*args, **kwargs)
+
+        cacheada = cache_decorador(corpo)
+
+        @functools.wraps(fn)
+        def chamada(*args, **kwargs):
+            marcador = [False]
+            token = _FALHA.set(marcador)
+            try:
+                with etapa(nome):
+                    out = cacheada(*args, **kwargs)
+            finally:
+                _FALHA.reset(token)
+            ex = _ATUAL.get()
+            if ex is not None:
+                ex.registrar_cache(nome, acerto=not marcador[0])
+            return out
+
+        chamada.clear = getattr(cacheada, "clear", None)
+        return chamada
+    return deco
+
+
+def registrar_cache(nome: str, acerto: bool) -> None:
+    """Acerto/falha de um cache próprio (ex.: Parquet do ROI) na execução atual."""
+    ex = _ATUAL.get()
+    if ex is not None:
+        ex.registrar_cache(nome, acerto)
+
+
+def historico() -> list[Execucao]:
+    """Execuções recentes do processo, da mais antiga para a mais nova."""
+    with _HISTORICO_LOCK:
+        return list(_HISTORICO)
+
+
+def configurar_log() -> None:
+    """Com CENTRAL_PERF_LOG=1, cada execução vira uma linha JSON no stderr."""
+    if not os.environ.get("CENTRAL_PERF_LOG") or log.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
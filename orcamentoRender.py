@@ -0,0 +1,182 @@
+"""
+Orçamento de renderização das páginas.
+
+Tudo que vai para o navegador passa por aqui com um teto de tamanho:
+categorias além do top-N viram "Outros", séries longas são reduzidas a
+baldes de tempo e tabelas grandes são paginadas. Cada gráfico/tabela
+enviado é registrado com o número de linhas/pontos e o tamanho do payload,
+para a página mostrar quanto está mandando.
+"""
+import os
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pyarrow as pa
+import streamlit as st
+
+from cacheRender import memo
+from instrumentacao import etapa
+
+MAX_CATEGORIAS = int(os.environ.get("RENDER_MAX_CATEGORIAS", "15"))
+MAX_PONTOS = int(os.environ.get("RENDER_MAX_PONTOS", "1500"))
+LINHAS_POR_PAGINA = int(os.environ.get("RENDER_LINHAS_POR_PAGINA", "200"))
+ROTULO_OUTROS = "Outros"
+
+
+# =============================
+# Redução dos dados
+# =============================
+def top_n_outros(df: pd.DataFrame, col: str, valor: str, n: int = MAX_CATEGORIAS,
+                 rotulo: str = ROTULO_OUTROS) -> pd.DataFrame:
+    """
+    As `n - 1` maiores categorias por `valor` e uma linha `rotulo` com a soma
+    das colunas numéricas do resto (só quando sobra mais de uma categoria).
+    Colunas não aditivas (médias) devem ser recalculadas por quem chama.
+    """
+    if len(df) <= n:
+        return df
+    ordenado = df.sort_values(valor, ascending=False, kind="stable")
+    topo, resto = ordenado.iloc[:n - 1], ordenado.iloc[n - 1:]
+    outros = resto.select_dtypes("number").sum().to_frame().T
+    outros[col] = rotulo
+    out = pd.concat([topo.assign(**{col: topo[col].astype(str)}), outros], ignore_index=True)
+    return out[df.columns]
+
+
+def reduzir_serie(df: pd.DataFrame, x: str, y: str | list[str], max_pontos: int = MAX_PONTOS,
+                  agg: str = "mean", por: str | None = None) -> pd.DataFrame:
+    """
+    Reduz uma série (x datetime ou numérico) a no máximo `max_pontos` pontos
+    por série, agregando `y` em baldes de x de largura fixa. `por` separa
+    várias séries (ex.: uma por Job) antes de agregar.
+    """
+    df = df[df[x].notna()]
+    series = df[por].nunique() if por else 1
+    limite = max(1, max_pontos // max(series, 1))
+    por_serie = df.groupby(por, observed=True)[x].size().max() if por else len(df)
+    if df.empty or por_serie <= limite:
+        return df
+
+    xs = df[x]
+    datas = pd.api.types.is_datetime64_any_dtype(xs)
+    v = xs.astype("datetime64[ns]").astype("int64") if datas else pd.to_numeric(xs)
+    lo, hi = v.min(), v.max()
+    largura = max((hi - lo) / limite, 1)
+    balde = np.floor((v - lo) / largura).clip(upper=limite - 1).astype("int64")
+    inicio = lo + balde * largura
+    chave = pd.to_datetime(inicio.astype("int64"), unit="ns") if datas else inicio
+
+    chaves = [chave.rename(x)] + ([df[por]] if por else [])
+    out = df[[y] if isinstance(y, str) else y].groupby(chaves, observed=True).agg(agg).reset_index()
+    return out
+
+
+def paginar(df: pd.DataFrame, pagina: int, por_pagina: int = LINHAS_POR_PAGINA) -> tuple[pd.DataFrame, int]:
+    """Fatia da página `pagina` (1-based) e o total de páginas."""
+    paginas = max(1, -(-len(df) // por_pagina))
+    pagina = min(max(1, pagina), paginas)
+    ini = (pagina - 1) * por_pagina
+    return df.iloc[ini:ini + por_pagina], paginas
+
+
+# =============================
+# Medição do payload
+# =============================
+def tamanho_figura(fig: go.Figure) -> int:
+    """Bytes do JSON da figura (o que o plotly_chart manda ao navegador)."""
+    return len(fig.to_json())
+
+
+def pontos_figura(fig: go.Figure) -> int:
+    """Pontos somados de todos os traces (x, ou values nas pizzas)."""
+    total = 0
+    for trace in fig.data:
+        for eixo in ("x", "values", "y"):
+            dados = getattr(trace, eixo, None)
+            if dados is not None:
+                total += np.size(dados)
+                break
+    return total
+
+
+def tamanho_tabela(df: pd.DataFrame) -> int:
+    """Bytes aproximados da tabela em Arrow (formato do st.dataframe)."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False).nbytes
+    except (pa.ArrowException, TypeError, ValueError):
+        return int(df.memory_usage(deep=True).sum())
+
+
+def _medir_figura(fig) -> tuple[go.Figure, int, int]:
+    fig = fig() if callable(fig) else fig
+    return fig, pontos_figura(fig), tamanho_figura(fig)
+
+
+def _medir_tabela(df) -> tuple[pd.DataFrame, int]:
+    df = df() if callable(df) else df
+    return df, tamanho_tabela(df)
+
+
+class OrcamentoPagina:
+    """Registro do que uma execução da página enviou ao navegador."""
+
+    def __init__(self):
+        self.itens: list[dict] = []
+
+    def registrar(self, nome: str, tipo: str, linhas: int, nbytes: int) -> None:
+        self.itens.append({"Elemento": nome, "Tipo": tipo, "Linhas/pontos": linhas, "KB": nbytes / 1024})
+
+    def tabela(self) -> pd.DataFrame:
+        return pd.DataFrame(self.itens, columns=["Elemento", "Tipo", "Linhas/pontos", "KB"])
+
+    def total_kb(self) -> float:
+        return sum(i["KB"] for i in self.itens)
+
+    # ---- saída para o Streamlit ----
+    def grafico(self, fig: go.Figure | Callable[[], go.Figure], nome: str, chave_cache=None, **kwargs) -> None:
+        """
+        Com `chave_cache` (versão do dataset + estado da seleção), `fig` pode
+        ser a função que monta a figura: figura e medição saem do cache de
+        render enquanto a chave não mudar.
+        """
+        with etapa(f"render: {nome}"):
+            if chave_cache is None:
+                fig = fig() if callable(fig) else fig
+                pontos, nbytes = pontos_figura(fig), tamanho_figura(fig)
+            else:
+                fig, pontos, nbytes = memo("graficos", nome, chave_cache,
+                                           lambda: _medir_figura(fig), lambda item: item[2])
+            self.registrar(nome, "gráfico", pontos, nbytes)
+            st.plotly_chart(fig, width="stretch", **kwargs)
+
+    def dataframe(self, df: pd.DataFrame | Callable[[], pd.DataFrame], nome: str, chave_cache=None,
+                  **kwargs) -> pd.DataFrame:
+        """Como grafico(): com `chave_cache`, `df` pode ser a função que monta a tabela. Devolve a tabela."""
+        with etapa(f"render: {nome}"):
+            if chave_cache is None:
+                df = df() if callable(df) else df
+                nbytes = tamanho_tabela(df)
+            else:
+                df, nbytes = memo("tabelas", nome, chave_cache,
+                                  lambda: _medir_tabela(df), lambda item: item[1])
+            self.registrar(nome, "tabela", len(df), nbytes)
+            st.dataframe(df, width="stretch", **kwargs)
+        return df
+
+    def dataframe_paginado(self, df: pd.DataFrame, nome: str, chave: str,
+                           por_pagina: int = LINHAS_POR_PAGINA, **kwargs) -> None:
+        """Tabela com só uma página enviada por vez; o seletor aparece se houver mais de uma."""
+        paginas = max(1, -(-len(df) // por_pagina))
+        pagina = 1
+        if paginas > 1:
+            c1, c2 = st.columns([1, 4])
+            pagina = c1.number_input("Página", min_value=1, max_value=paginas, value=1, step=1, key=chave)
+            c2.caption(f"{len(df):,} linhas · {por_pagina} por página · {paginas} páginas".replace(",", "."))
+        fatia, _ = paginar(df, int(pagina), por_pagina)
+        self.dataframe(fatia, nome, **kwargs)
+
+    def resumo(self) -> None:
+        with st.expander(f"Payload da página ({self.total_kb():,.0f} KB)"):
+            st.dataframe(self.tabela().round({"KB": 1}), width="stretch", hide_index=True)
@@ -1,7 +1,22 @@
 import os
-import pandas as pd
-import streamlit as st
+import re
+import zipfile
 import datetime as dt
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentacao import medido
+
+MONTH_MAP = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "abril": 4,
+    "maio": 5, "junho": 6, "julho": 7, "agosto": 8,
+    "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12
+}
+
+# colunas de duração normalizadas em todas as worksheets; depois de
+# preparar_planilha guardam segundos (Int64) e só viram HH:MM:SS na exibição
+DURATION_COLUMNS = ["Total - Monitoramento", "Total - Desenvolvimento", "Total"]
 
 
 def get_base_dir() -> str:
@@ -15,12 +30,33 @@ def get_excel_path() -> str:
     return os.path.join(base_dir, "Planilhas", "Controle de Horas Mills.xlsx")
 
 
+def data_salvamento(excel_path: str) -> dt.date:
+    """
+    Dia em que o Excel foi salvo (dcterms:modified de docProps/core.xml);
+    sem essa informação, o mtime do arquivo. Não muda enquanto o arquivo
+    não muda, ao contrário da data de hoje.
+    """
+    try:
+        with zipfile.ZipFile(excel_path) as z:
+            xml = z.read("docProps/core.xml").decode("utf-8")
+        m = re.search(r"<dcterms:modified[^>]*>([^<]+)<", xml)
+        if m:
+            return pd.Timestamp(m.group(1).strip()).date()
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        pass
+    return dt.date.fromtimestamp(os.path.getmtime(excel_path))
+
+
+def get_month_number(sheet_name: str) -> int | None:
+    return MONTH_MAP.get(sheet_name.strip().lower())
+
+
 def recortar_planilha(df: pd.DataFrame) -> pd.DataFrame:
     # Limita até a coluna K
     df2 = df.iloc[:, :10].copy()
     # Para na primeira linha onde a Coluna A == "Soma"
     col_a = df2.iloc[:, 0].astype(str).str.strip().str.casefold()
-    idx_soma = col_a[col_a == "Soma"].index
+    idx_soma = col_a[col_a == "soma"].index
     if len(idx_soma) > 0:
         stop = idx_soma[0]
         df2 = df2.loc[:stop - 1]
@@ -28,16 +64,94 @@ def recortar_planilha(df: pd.DataFrame) -> pd.DataFrame:
     return df2
 
 
-@st.cache_data(show_spinner=False)
-def list_sheets(excel_path: str) -> list[str]:
-    """Lista as worksheets do Excel."""
-    return pd.ExcelFile(excel_path).sheet_names
+def _rows_to_frame(rows: list[tuple]) -> pd.DataFrame:
+    """Linhas cruas de uma worksheet (1ª = cabeçalho) -> DataFrame, como o read_excel."""
+    if not rows:
+        return pd.DataFrame()
+    # sem a dimensão gravada no arquivo, o modo read-only devolve linhas de
+    # larguras diferentes; completa com None como o read_excel
+    largura = max(len(r) for r in rows)
+    if any(len(r) != largura for r in rows):
+        rows = [tuple(r) + (None,) * (largura - len(r)) for r in rows]
+    header = [
+        str(c) if c is not None else f"Unnamed: {i}"
+        for i, c in enumerate(rows[0])
+    ]
+    body = list(rows[1:])
+    # read_excel ignora as linhas vazias no fim da planilha
+    while body and all(v is None for v in body[-1]):
+        body.pop()
+    return pd.DataFrame(body, columns=header).fillna(np.nan)
+
+
+@medido("horas.read_workbook")
+def read_workbook(excel_path: str, sheet_names: list[str] | None = None) -> dict[str, pd.DataFrame]:
+    """
+    Lê várias worksheets abrindo o arquivo uma única vez (openpyxl em modo
+    read-only, só valores), em vez de um read_excel por worksheet.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        nomes = sheet_names if sheet_names is not None else wb.sheetnames
+        return {nome: _rows_to_frame(list(wb[nome].iter_rows(values_only=True))) for nome in nomes}
+    finally:
+        wb.close()
+
+
+def preparar_planilha(df: pd.DataFrame) -> pd.DataFrame:
+    """Recorte + normalização das colunas de duração de uma worksheet."""
+    df = recortar_planilha(df)
+    for col in DURATION_COLUMNS:
+        df = fix_duration_column(df, col)
+    return df
+
 
+def _ler_e_preparar(excel_path: str, sheet_names: list[str] | None) -> dict[str, pd.DataFrame]:
+    return {nome: preparar_planilha(df) for nome, df in read_workbook(excel_path, sheet_names).items()}
 
-@st.cache_data(show_spinner=False)
-def load_sheet(excel_path: str, sheet_name: str) -> pd.DataFrame:
-    """Carrega uma worksheet do Excel."""
-    return pd.read_excel(excel_path, sheet_name=sheet_name)
+
+@medido("horas.load_horas")
+def load_horas(excel_path: str, workers: int = 1) -> pd.DataFrame:
+    """
+    Todas as worksheets já preparadas numa tabela longa, com as colunas
+    "Planilha" (nome da worksheet) e "Mes" (número do mês, se o nome for um mês).
+
+    workers > 1 divide as worksheets entre processos (cada um abre o arquivo
+    em modo read-only); só compensa em pastas de trabalho grandes.
+    """
+    nomes = list_sheet_names(excel_path) if workers > 1 else []
+    if len(nomes) > 1:
+        lotes = [nomes[i::workers] for i in range(min(workers, len(nomes)))]
+        with ProcessPoolExecutor(max_workers=len(lotes)) as pool:
+            partes = {}
+            for resultado in pool.map(_ler_e_preparar, [excel_path] * len(lotes), lotes):
+                partes.update(resultado)
+    else:
+        # uma passada só: os nomes saem da própria leitura, na ordem do arquivo
+        partes = _ler_e_preparar(excel_path, None)
+        nomes = list(partes)
+
+    frames = []
+    for nome in nomes:
+        df = partes[nome].copy()
+        df.insert(0, "Planilha", nome)
+        df.insert(1, "Mes", get_month_number(nome))
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["Planilha", "Mes"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def list_sheet_names(excel_path: str) -> list[str]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
 
 
 def fmt_hhmmss_from_seconds(total_seconds: float) -> str:
@@ -49,47 +163,59 @@ def fmt_hhmmss_from_seconds(total_seconds: float) -> str:
     s = total_seconds % 60
     return f"{h:02d}:{m:02d}:{s:02d}" 
 
-def excel_duration_to_hhmmss(x) -> str:
-    if x is None or (isinstance(x, float) and pd.isna(x)) or (isinstance(x, str) and x.strip() == ""):
-        return ""
-    total_seconds = None
-
-    # timedelta 
-    if isinstance(x, dt.timedelta):
-        total_seconds = int(x.total_seconds())
+def duration_to_seconds(series: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna de duração do Excel para segundos inteiros (Int64),
+    de uma vez para a coluna toda:
+      - número (int/float do Excel) = fração de dia
+      - timedelta / datetime.time / texto [hh]:mm:ss via to_timedelta
+      - vazio ou inválido -> <NA>
+    """
+    if pd.api.types.is_timedelta64_dtype(series):
+        return series.dt.total_seconds().round().astype("Int64")
+
+    out = pd.Series(np.nan, index=series.index, dtype="float64")
+    num = pd.to_numeric(series, errors="coerce")
+    out[num.notna()] = (num[num.notna()] * 86400).round()
+
+    resto = num.isna() & series.notna()
+    if resto.any():
+        txt = series[resto].astype(str).str.strip()
+        td = pd.to_timedelta(txt.where(txt != ""), errors="coerce")
+        out[resto] = td.dt.total_seconds().round().to_numpy()
+    return out.astype("Int64")
+
+
+def seconds_to_hhmmss(series: pd.Series) -> pd.Series:
+    """Segundos -> texto HH:MM:SS (horas podem passar de 24); <NA> vira ""."""
+    sec = pd.to_numeric(series, errors="coerce")
+    ok = sec.notna()
+    v = sec[ok].round().astype("int64")
+    txt = (
+        (v // 3600).astype(str).str.zfill(2) + ":"
+        + (v % 3600 // 60).astype(str).str.zfill(2) + ":"
+        + (v % 60).astype(str).str.zfill(2)
+    )
+    return txt.reindex(series.index, fill_value="").astype("string")
 
-    # datetime.time
-    elif isinstance(x, dt.time):
-        total_seconds = x.hour * 3600 + x.minute * 60 + x.second
-
-    # float / int do Excel
-    elif isinstance(x, (int, float)):
-        total_seconds = int(round(float(x) * 86400))
-
-    #string [hh]:mm:ss
-    elif isinstance(x, str):
-        try:
-            td = pd.to_timedelta(x)
-            total_seconds = int(td.total_seconds())
-        except Exception:
-            return str(x)
-
-    else:
-        return str(x)
-
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 def fix_duration_column(df: pd.DataFrame, col_name: str) -> pd.DataFrame:
+    """Normaliza a coluna de duração para segundos (ver duration_to_seconds)."""
     if col_name not in df.columns:
         return df
-    df[col_name] = df[col_name].map(excel_duration_to_hhmmss).astype("string")
+    df[col_name] = duration_to_seconds(df[col_name])
     return df
 
 
+def formatar_duracoes(df: pd.DataFrame) -> pd.DataFrame:
+    """Cópia para exibição com as colunas de duração (segundos) em HH:MM:SS."""
+    out = df.copy()
+    for col in DURATION_COLUMNS:
+        if col in out.columns:
+            out[col] = seconds_to_hhmmss(out[col])
+    return out
+
+
 def hhmmss_to_minutes(x: str) -> float:
     if not isinstance(x, str) or ":" not in x:
         return 0.0
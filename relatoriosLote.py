@@ -0,0 +1,413 @@
+"""
+Relatórios estáticos em lote, sem Streamlit.
+
+Para cada mês do ROI e cada worksheet do Controle de Horas (mais a visão
+anual), monta as mesmas tabelas e figuras das páginas e grava em disco um
+relatorio.html com as figuras Plotly e as tabelas em CSV ou Parquet. Os
+dados são lidos uma vez no processo principal; a renderização (figuras ->
+HTML, tabelas -> arquivos) roda num pool de processos e cada tarefa recebe
+só o seu recorte.
+
+O manifesto da pasta de saída guarda uma impressão digital dos dados de
+cada relatório: numa nova execução só os meses/worksheets que mudaram são
+regravados (--forcar regrava tudo).
+
+    python relatoriosLote.py --saida relatorios
+    python relatoriosLote.py --saida relatorios --meses 2025-01,2025-02 --workers 4
+    python relatoriosLote.py --saida relatorios --somente horas --formato parquet
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from csvLoader import get_csv_path, listar_particoes
+from horasAgregados import carregar_horas
+from horasFiguras import (
+    preparar_mapa, figura_mapa, figura_pizza,
+    figura_mensal, figura_ano_a_ano, figura_dia_semana,
+)
+from instrumentacao import configurar_log, etapa, execucao
+from orcamentoRender import top_n_outros, MAX_CATEGORIAS
+from planilhaLoader import get_base_dir, get_excel_path, formatar_duracoes
+from roiAgregados import (
+    kpis_cubo, contar_por_cubo, tempo_medio_cubo, variancia_cubo,
+    carga_node_cubo, heatmap_cubo, PERCENTIS,
+)
+from roiDados import carregar_roi
+from roiFiguras import (
+    figura_top_jobs, figura_por_hora, figura_tempo_medio,
+    figura_nodes, figura_cenarios,
+)
+
+FORMATOS = ("csv", "parquet")
+MANIFESTO = "manifesto.json"
+# plotly.js da mesma versão que o plotly instalado gera as figuras; o nome
+# leva a versão para um upgrade gravar o arquivo novo (os relatórios antigos
+# continuam apontando para o deles)
+PLOTLY_JS_VERSAO = get_plotlyjs_version()
+PLOTLY_JS = f"plotly-{PLOTLY_JS_VERSAO}.min.js"
+PLOTLY_CDN = f"https://cdn.plot.ly/plotly-{PLOTLY_JS_VERSAO}.min.js"
+# tabelas maiores que isto vão inteiras só para o CSV/Parquet; no HTML, as primeiras linhas
+MAX_LINHAS_HTML = 200
+# muda quando o layout dos relatórios muda: invalida o manifesto inteiro
+VERSAO_LOTE = 1
+
+
+# =============================
+# Gravação
+# =============================
+def impressao(*partes) -> str:
+    """Impressão digital estável de DataFrames e valores simples."""
+    h = hashlib.sha1(str(VERSAO_LOTE).encode())
+    for parte in partes:
+        if isinstance(parte, pd.DataFrame):
+            h.update(",".join(map(str, parte.columns)).encode())
+            h.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+        else:
+            h.update(repr(parte).encode())
+    return h.hexdigest()
+
+
+def nome_pasta(nome: str) -> str:
+    return re.sub(r"[^\w\-]+", "_", nome.strip()).strip("_") or "_"
+
+
+def gravar_tabela(df: pd.DataFrame, pasta: str, nome: str, formato: str) -> str:
+    """CSV no padrão do Excel brasileiro (; e vírgula decimal) ou Parquet."""
+    path = os.path.join(pasta, f"{nome}.{formato}")
+    if formato == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, sep=";", decimal=",", index=False, encoding="utf-8-sig")
+    return path
+
+
+def _tabela_html(titulo: str, df: pd.DataFrame) -> str:
+    extra = ""
+    if len(df) > MAX_LINHAS_HTML:
+        extra = f"<p class='nota'>{MAX_LINHAS_HTML} de {len(df):,} linhas; a tabela completa está no arquivo ao lado.</p>"
+        df = df.head(MAX_LINHAS_HTML)
+    corpo = df.to_html(index=False, border=0, classes="tabela", na_rep="—",
+                       float_format=lambda v: f"{v:,.2f}")
+    return f"<h2>{html.escape(titulo)}</h2>{extra}{corpo}"
+
+
+def gravar_html(path: str, titulo: str, secoes: list, plotlyjs: str) -> None:
+    """
+    `secoes`: ("kpis", {rótulo: valor}), ("figura", fig) ou ("tabela", título, df).
+    `plotlyjs`: caminho relativo do PLOTLY_JS ou "cdn".
+    """
+    src = PLOTLY_CDN if plotlyjs == "cdn" else plotlyjs
+    partes = []
+    for secao in secoes:
+        if secao[0] == "kpis":
+            itens = "".join(
+                f"<div class='kpi'><span>{html.escape(k)}</span><b>{html.escape(str(v))}</b></div>"
+                for k, v in secao[1].items()
+            )
+            partes.append(f"<div class='kpis'>{itens}</div>")
+        elif secao[0] == "figura":
+            partes.append(secao[1].to_html(full_html=False, include_plotlyjs=False))
+        else:
+            partes.append(_tabela_html(secao[1], secao[2]))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_PAGINA.format(
+            titulo=html.escape(titulo), script=f'<script src="{src}"></script>', corpo="\n".join(partes),
+            gerado=time.strftime("%d/%m/%Y %H:%M"),
+        ))
+
+
+_PAGINA = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>{titulo}</title>
+{script}
+<style>
+body {{ font-family: sans-serif; margin: 0 2rem 2rem; }}
+header {{ background: #F37021; color: white; margin: 0 -2rem 1rem; padding: 1rem 2rem; }}
+.kpis {{ display: flex; gap: 2rem; margin: 1rem 0; }}
+.kpi span {{ display: block; color: #666; font-size: .85rem; }}
+.kpi b {{ font-size: 1.6rem; }}
+table.tabela {{ border-collapse: collapse; font-size: .85rem; }}
+table.tabela th, table.tabela td {{ padding: .25rem .6rem; border-bottom: 1px solid #ddd; text-align: right; }}
+.nota {{ color: #666; font-size: .85rem; }}
+</style></head>
+<body><header><h1>{titulo}</h1><small>Gerado em {gerado}</small></header>
+{corpo}
+</body></html>
+"""
+
+
+# =============================
+# Tarefas (rodam no pool; recebem só dados já recortados)
+# =============================
+def render_roi_mes(tarefa: dict) -> dict:
+    cubo, formato, pasta = tarefa["cubo"], tarefa["formato"], tarefa["pasta"]
+    os.makedirs(pasta, exist_ok=True)
+    kpis = kpis_cubo(cubo)
+    tabelas = {
+        "top_jobs": contar_por_cubo(cubo, "Job", nome_contagem="Execuções", top=10),
+        "por_hora": heatmap_cubo(cubo),
+        "tempo_medio": tempo_medio_cubo(cubo, top_n=10),
+        "desvio": variancia_cubo(cubo, top_n=10),
+        "nodes": carga_node_cubo(cubo),
+        "cenarios": contar_por_cubo(cubo, "Cenário", nome_contagem="Execuções", top=len(cubo)),
+        "percentis": tarefa["percentis"],
+    }
+    for nome, df in tabelas.items():
+        gravar_tabela(df, pasta, nome, formato)
+
+    secoes = [("kpis", {
+        "Registros": f"{kpis['registros']:,}".replace(",", "."),
+        "Tempo total (min)": f"{kpis['tempo_total']:.1f}",
+        "Tempo médio (min)": f"{kpis['tempo_medio']:.2f}" if kpis["tempo_medio"] is not None else "—",
+    })]
+    if not tabelas["top_jobs"].empty:
+        secoes += [("tabela", "Top 10 Jobs por volume de execuções", tabelas["top_jobs"]),
+                   ("figura", figura_top_jobs(tabelas["top_jobs"]))]
+    if not tabelas["por_hora"].empty:
+        secoes.append(("figura", figura_por_hora(tabelas["por_hora"])))
+    if not tabelas["tempo_medio"].empty:
+        secoes += [("tabela", "Top 10 Jobs por tempo médio (min)", tabelas["tempo_medio"]),
+                   ("figura", figura_tempo_medio(tabelas["tempo_medio"]))]
+    secoes.append(("tabela", "Top 10 Jobs por instabilidade (desvio padrão)", tabelas["desvio"]))
+    if not tabelas["nodes"].empty:
+        secoes += [("tabela", "Carga por Node", tabelas["nodes"]),
+                   ("figura", figura_nodes(top_n_outros(tabelas["nodes"], "Node", "Execucoes", MAX_CATEGORIAS)))]
+    if not tabelas["cenarios"].empty:
+        secoes.append(("figura", figura_cenarios(
+            top_n_outros(tabelas["cenarios"], "Cenário", "Execuções", MAX_CATEGORIAS))))
+    secoes.append(("tabela", "Percentis de duração por Job (min)", tabelas["percentis"]))
+    gravar_html(os.path.join(pasta, "relatorio.html"), tarefa["titulo"], secoes, tarefa["plotlyjs"])
+    return {"chave": tarefa["chave"]}
+
+
+def render_horas_planilha(tarefa: dict) -> dict:
+    df, formato, pasta = tarefa["df"], tarefa["formato"], tarefa["pasta"]
+    os.makedirs(pasta, exist_ok=True)
+    gravar_tabela(df, pasta, "horas", formato)
+    secoes = []
+    df_plot = preparar_mapa(df) if not df.empty else df
+    if not df_plot.empty:
+        secoes.append(("kpis", {
+            "Monitoramento": f"{df_plot['Monit_h'].sum():,.1f}h".replace(",", "."),
+            "Desenvolvimento": f"{df_plot['Dev_h'].sum():,.1f}h".replace(",", "."),
+        }))
+        secoes.append(("figura", figura_mapa(df_plot, tarefa["titulo"])))
+        if df_plot["Monit_h"].sum() > 0 or df_plot["Dev_h"].sum() > 0:
+            secoes.append(("figura", figura_pizza(df_plot)))
+    secoes.append(("tabela", "Worksheet", formatar_duracoes(df)))
+    gravar_html(os.path.join(pasta, "relatorio.html"), tarefa["titulo"], secoes, tarefa["plotlyjs"])
+    return {"chave": tarefa["chave"]}
+
+
+def render_horas_anual(tarefa: dict) -> dict:
+    mensal, semana, formato, pasta = tarefa["mensal"], tarefa["semana"], tarefa["formato"], tarefa["pasta"]
+    os.makedirs(pasta, exist_ok=True)
+    gravar_tabela(mensal, pasta, "mensal", formato)
+    gravar_tabela(semana, pasta, "semana", formato)
+    secoes = [
+        ("kpis", {
+            "Horas totais": f"{mensal['Total_h'].sum():,.1f}".replace(",", "."),
+            "Monitoramento": f"{mensal['Monit_h'].sum():,.1f}h".replace(",", "."),
+            "Desenvolvimento": f"{mensal['Dev_h'].sum():,.1f}h".replace(",", "."),
+            "Dias trabalhados": int(mensal["Dias"].sum()),
+        }),
+        ("figura", figura_mensal(mensal)),
+    ]
+    if mensal["Ano"].nunique() > 1:
+        secoes.append(("figura", figura_ano_a_ano(mensal)))
+    secoes += [
+        ("figura", figura_dia_semana(semana)),
+        ("tabela", "Totais por mês", mensal[["Periodo", "Dias", "Monit_h", "Dev_h", "Total_h", "Monit_pct"]]),
+    ]
+    gravar_html(os.path.join(pasta, "relatorio.html"), tarefa["titulo"], secoes, tarefa["plotlyjs"])
+    return {"chave": tarefa["chave"]}
+
+
+# =============================
+# Montagem das tarefas
+# =============================
+def percentis_mes(sketch_dia, inicio: pd.Timestamp, fim: pd.Timestamp) -> pd.DataFrame:
+    """p50/p95/p99 por Job no mês, combinando os sketches diários."""
+    out = None
+    for nome, q in PERCENTIS.items():
+        s = sketch_dia.serie("Job", q, "M", inicio, fim)[["Job", nome]]
+        out = s if out is None else out.merge(s, on="Job", how="outer")
+    return out if out is not None else pd.DataFrame(columns=["Job", *PERCENTIS])
+
+
+def tarefas_roi(dados: dict, meses: list[str] | None) -> list[dict]:
+    cubo = dados["cubo"]
+    mes = cubo["Dia"].dt.to_period("M")
+    tarefas = []
+    for periodo in sorted(mes.dropna().unique()):
+        chave_mes = str(periodo)
+        if meses and chave_mes not in meses:
+            continue
+        fatia = cubo[mes == periodo]
+        fatia = fatia.sort_values(["Dia", "Hora", "Job", "Node", "Cenário"]).reset_index(drop=True)
+        if dados.get("sketch_dia") is not None:
+            pct = percentis_mes(dados["sketch_dia"], periodo.start_time, (periodo + 1).start_time)
+        else:
+            pct = pd.DataFrame(columns=["Job", *PERCENTIS])
+        tarefas.append({
+            "funcao": render_roi_mes, "chave": f"roi/{chave_mes}",
+            "titulo": f"ROI — {chave_mes}", "impressao": impressao(fatia, pct),
+            "cubo": fatia, "percentis": pct,
+        })
+    return tarefas
+
+
+def tarefas_horas(dados: dict) -> list[dict]:
+    horas = dados["horas"]
+    tarefas = []
+    for nome in horas["Planilha"].unique():
+        df = horas[horas["Planilha"] == nome].drop(columns=["Planilha", "Mes"]).reset_index(drop=True)
+        tarefas.append({
+            "funcao": render_horas_planilha, "chave": f"horas/{nome_pasta(nome)}",
+            "titulo": f"Controle de Horas — {nome}", "impressao": impressao(df), "df": df,
+        })
+    if not dados["mensal"].empty:
+        tarefas.append({
+            "funcao": render_horas_anual, "chave": "horas/anual",
+            "titulo": "Controle de Horas — Visão anual",
+            "impressao": impressao(dados["mensal"], dados["semana"]),
+            "mensal": dados["mensal"], "semana": dados["semana"],
+        })
+    return tarefas
+
+
+def _executar(tarefa: dict) -> dict:
+    t0 = time.perf_counter()
+    out = tarefa.pop("funcao")(tarefa)
+    out["s"] = round(time.perf_counter() - t0, 3)
+    return out
+
+
+# =============================
+# Índice + execução
+# =============================
+def gravar_indice(saida: str, manifesto: dict) -> None:
+    linhas = []
+    for chave in sorted(manifesto):
+        item = manifesto[chave]
+        linhas.append(
+            f"<li><a href='{html.escape(chave)}/relatorio.html'>{html.escape(item['titulo'])}</a>"
+            f" <small>({html.escape(item['gerado'])})</small></li>"
+        )
+    with open(os.path.join(saida, "index.html"), "w", encoding="utf-8") as f:
+        f.write(_PAGINA.format(
+            titulo="Central de Relatórios", script="", corpo=f"<ul>{''.join(linhas)}</ul>",
+            gerado=time.strftime("%d/%m/%Y %H:%M"),
+        ))
+
+
+def gerar(saida: str, roi_path: str | None = None, excel_path: str | None = None,
+          meses: list[str] | None = None, workers: int = 1, formato: str = "csv",
+          plotlyjs: str = "arquivo", forcar: bool = False) -> dict:
+    """
+    Grava os relatórios em `saida` e devolve {"gerados", "mantidos", "s"}.
+    `roi_path`/`excel_path` None pulam a fonte.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"formato deve ser um de {FORMATOS}")
+    os.makedirs(saida, exist_ok=True)
+    t0 = time.perf_counter()
+
+    tarefas = []
+    with execucao("lote"):
+        if roi_path:
+            with etapa("lote.roi.dados"):
+                tarefas += tarefas_roi(carregar_roi(roi_path), meses)
+        if excel_path:
+            with etapa("lote.horas.dados"):
+                tarefas += tarefas_horas(carregar_horas(excel_path))
+
+    manifesto_path = os.path.join(saida, MANIFESTO)
+    manifesto = {}
+    if os.path.exists(manifesto_path):
+        with open(manifesto_path, encoding="utf-8") as f:
+            manifesto = json.load(f)
+
+    # origem e versão do plotly.js: se mudarem (upgrade do plotly, --plotlyjs), o relatório é refeito
+    js = f"{plotlyjs}:{PLOTLY_JS_VERSAO}"
+    pendentes = []
+    for tarefa in tarefas:
+        tarefa["pasta"] = os.path.join(saida, tarefa["chave"])
+        tarefa["formato"] = formato
+        profundidade = tarefa["chave"].count("/") + 1
+        tarefa["plotlyjs"] = "cdn" if plotlyjs == "cdn" else "../" * profundidade + PLOTLY_JS
+        anterior = manifesto.get(tarefa["chave"], {})
+        em_dia = (
+            anterior.get("impressao") == tarefa["impressao"]
+            and anterior.get("formato") == formato
+            and anterior.get("plotlyjs") == js
+            and os.path.exists(os.path.join(tarefa["pasta"], "relatorio.html"))
+        )
+        if forcar or not em_dia:
+            pendentes.append(tarefa)
+
+    if plotlyjs != "cdn" and pendentes and not os.path.exists(os.path.join(saida, PLOTLY_JS)):
+        with open(os.path.join(saida, PLOTLY_JS), "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+
+    infos = {t["chave"]: {"titulo": t["titulo"], "impressao": t["impressao"], "formato": formato,
+                          "plotlyjs": js}
+             for t in pendentes}
+    if workers > 1 and len(pendentes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pendentes))) as pool:
+            resultados = list(pool.map(_executar, pendentes))
+    else:
+        resultados = [_executar(t) for t in pendentes]
+
+    gerado = time.strftime("%Y-%m-%d %H:%M")
+    for r in resultados:
+        manifesto[r["chave"]] = {**infos[r["chave"]], "gerado": gerado, "s": r["s"]}
+    with open(manifesto_path, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1)
+    gravar_indice(saida, manifesto)
+
+    return {
+        "gerados": [r["chave"] for r in resultados],
+        "mantidos": len(tarefas) - len(resultados),
+        "s": round(time.perf_counter() - t0, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saida", default=os.path.join(get_base_dir(), "relatorios"), help="pasta de saída")
+    parser.add_argument("--roi", default=get_csv_path(), help="CSV do ROI, pasta de CSVs ou glob")
+    parser.add_argument("--excel", default=get_excel_path(), help="Excel do Controle de Horas")
+    parser.add_argument("--somente", choices=["roi", "horas"], help="gera só uma das fontes")
+    parser.add_argument("--meses", help="meses do ROI separados por vírgula (AAAA-MM); padrão: todos")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos de renderização")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv", help="formato das tabelas")
+    parser.add_argument("--plotlyjs", choices=["arquivo", "cdn"], default="arquivo",
+                        help="plotly.js gravado na saída (funciona offline) ou carregado da CDN")
+    parser.add_argument("--forcar", action="store_true", help="regrava mesmo o que não mudou")
+    args = parser.parse_args()
+
+    configurar_log()
+    roi_path = args.roi if args.somente in (None, "roi") else None
+    excel_path = args.excel if args.somente in (None, "horas") else None
+    if roi_path and not listar_particoes(roi_path):
+        sys.exit(f"CSV não encontrado: {roi_path}")
+    if excel_path and not os.path.exists(excel_path):
+        sys.exit(f"Arquivo não encontrado: {excel_path}")
+    meses = [m.strip() for m in args.meses.split(",")] if args.meses else None
+
+    r = gerar(args.saida, roi_path, excel_path, meses, args.workers, args.formato, args.plotlyjs, args.forcar)
+    print(f"{len(r['gerados'])} relatórios gravados, {r['mantidos']} sem mudança, em {r['s']}s -> {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+"""
+Cubo de agregados do ROI.
+
+Uma passada sobre o DataFrame formatado gera contagem, soma, soma dos
+quadrados, mínimo e máximo de Duracao_min por (Job, Node, Cenário, Hora,
+Dia). Todas as tabelas da página (volume por Job/Cenário, tempo médio,
+desvio padrão, carga por Node, execuções por hora) saem desse cubo, que
+tem tamanho proporcional ao número de grupos e não ao de linhas. Cubos de
+partes diferentes do arquivo podem ser somados com merge_cubos.
+"""
+import numpy as np
+import pandas as pd
+
+from instrumentacao import medido
+
+CHAVES = ["Job", "Node", "Cenário", "Hora", "Dia"]
+METRICAS_SOMA = ["Execucoes", "N", "Soma_min", "SomaQ_min"]
+COLUNAS_CUBO = CHAVES + METRICAS_SOMA + ["Min_min", "Max_min"]
+
+
+def cubo_vazio() -> pd.DataFrame:
+    return pd.DataFrame(columns=COLUNAS_CUBO)
+
+
+@medido("roi.montar_cubo")
+def montar_cubo(df: pd.DataFrame) -> pd.DataFrame:
+    """Agrega o DataFrame formatado (saída de formatacao_csv) no cubo."""
+    if df.empty or "Duracao_min" not in df.columns:
+        return cubo_vazio()
+
+    dur = df["Duracao_min"].astype("float64")
+    base = pd.DataFrame({
+        col: df[col] for col in ("Job", "Node", "Cenário", "Hora") if col in df.columns
+    })
+    if "Data Início" in df.columns:
+        base["Dia"] = df["Data Início"].dt.floor("D")
+    base["Duracao_min"] = dur
+    base["Duracao_q"] = dur * dur
+    chaves = [c for c in CHAVES if c in base.columns]
+
+    cubo = (
+        base.groupby(chaves, observed=True, dropna=False, sort=False)
+        .agg(
+            Execucoes=("Duracao_min", "size"),
+            N=("Duracao_min", "count"),
+            Soma_min=("Duracao_min", "sum"),
+            SomaQ_min=("Duracao_q", "sum"),
+            Min_min=("Duracao_min", "min"),
+            Max_min=("Duracao_min", "max"),
+        )
+        .reset_index()
+    )
+    return cubo.reindex(columns=COLUNAS_CUBO)
+
+
+def merge_cubos(*cubos: pd.DataFrame) -> pd.DataFrame:
+    """Soma cubos de partes disjuntas dos dados (ex.: arquivo base + linhas novas)."""
+    cubos = [c for c in cubos if c is not None and not c.empty]
+    if not cubos:
+        return cubo_vazio()
+    if len(cubos) == 1:
+        return cubos[0]
+    todos = pd.concat(cubos, ignore_index=True)
+    for col in ("Job", "Node", "Cenário"):
+        todos[col] = todos[col].astype("category")
+    out = (
+        todos.groupby(CHAVES, observed=True, dropna=False, sort=False)
+        .agg({**{m: "sum" for m in METRICAS_SOMA}, "Min_min": "min", "Max_min": "max"})
+        .reset_index()
+    )
+    return out.reindex(columns=COLUNAS_CUBO)
+
+
+def filtrar_cubo(cubo: pd.DataFrame, inicio=None, fim=None, filtros: dict[str, list] | None = None) -> pd.DataFrame:
+    """
+    Recorta o cubo (inicio <= Dia < fim, valores por coluna; lista vazia =
+    todos). Custa O(grupos); datas devem cair em dias inteiros.
+    """
+    mask = np.ones(len(cubo), dtype=bool)
+    if inicio is not None:
+        mask &= (cubo["Dia"] >= pd.Timestamp(inicio)).to_numpy()
+    if fim is not None:
+        mask &= (cubo["Dia"] < pd.Timestamp(fim)).to_numpy()
+    for col, valores in (filtros or {}).items():
+        if valores:
+            mask &= cubo[col].astype(str).isin([str(v) for v in valores]).to_numpy()
+    return cubo if mask.all() else cubo[mask]
+
+
+def _por(cubo: pd.DataFrame, col: str) -> pd.DataFrame:
+    return cubo.groupby(col, observed=True, as_index=False)[METRICAS_SOMA].sum()
+
+
+def _media(g: pd.DataFrame) -> pd.Series:
+    return g["Soma_min"] / g["N"].where(g["N"] > 0)
+
+
+def _desvio(g: pd.DataFrame) -> pd.Series:
+    # variância amostral (ddof=1) a partir de soma e soma dos quadrados
+    n = g["N"].where(g["N"] > 1)
+    var = (g["SomaQ_min"] - g["Soma_min"] ** 2 / n) / (n - 1)
+    return np.sqrt(var.clip(lower=0))
+
+
+# =============================
+# Tabelas derivadas do cubo
+# =============================
+def kpis_cubo(cubo: pd.DataFrame) -> dict:
+    n = cubo["N"].sum()
+    soma = cubo["Soma_min"].sum()
+    return {
+        "registros": int(cubo["Execucoes"].sum()),
+        "tempo_total": float(soma),
+        "tempo_medio": float(soma / n) if n else None,
+    }
+
+
+def contar_por_cubo(cubo: pd.DataFrame, col: str, nome_contagem: str = "Execuções", top: int = 10) -> pd.DataFrame:
+    """Equivalente a contar_por(df, col) calculado sobre o cubo."""
+    g = _por(cubo, col)
+    out = (
+        g[[col, "Execucoes"]]
+        .rename(columns={"Execucoes": nome_contagem})
+        .sort_values(nome_contagem, ascending=False, kind="stable")
+        .head(top)
+    )
+    out[col] = out[col].astype(str)
+    return out.reset_index(drop=True)
+
+
+def tempo_medio_cubo(cubo: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
+    g = _por(cubo, "Job")
+    g["Tempo médio (min)"] = _media(g)
+    return (
+        g[["Job", "Tempo médio (min)"]]
+        .sort_values("Tempo médio (min)", ascending=False)
+        .head(top_n)
+    )
+
+
+def variancia_cubo(cubo: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
+    g = _por(cubo, "Job")
+    g["Desvio padrão (min)"] = _desvio(g)
+    return (
+        g[["Job", "Desvio padrão (min)"]]
+        .sort_values("Desvio padrão (min)", ascending=False)
+        .head(top_n)
+    )
+
+
+def carga_node_cubo(cubo: pd.DataFrame) -> pd.DataFrame:
+    g = _por(cubo, "Node")
+    out = pd.DataFrame({
+        "Node": g["Node"],
+        "Execucoes": g["Execucoes"],
+        "Tempo_Total_min": g["Soma_min"],
+        "Tempo_Medio_min": _media(g),
+    })
+    return out.sort_values("Execucoes", ascending=False)
+
+
+def heatmap_cubo(cubo: pd.DataFrame) -> pd.DataFrame:
+    g = _por(cubo, "Hora")
+    return (
+        g[["Hora", "Execucoes"]]
+        .rename(columns={"Execucoes": "Execuções"})
+        .sort_values("Hora")
+    )
+
+
+# =============================
+# Agregadores combináveis (streaming)
+# =============================
+class WelfordPorGrupo:
+    """
+    Média e variância de Duracao_min por grupo (n, média, M2), atualizadas
+    bloco a bloco e combináveis entre si (fórmula de Chan) sem guardar linhas.
+    """
+
+    def __init__(self, chave: str):
+        self.chave = chave
+        self.estado = pd.DataFrame({"n": [], "media": [], "m2": []}, dtype="float64")
+
+    def update(self, df: pd.DataFrame) -> None:
+        if df.empty or self.chave not in df.columns:
+            return
+        g = df.groupby(df[self.chave].astype(str), observed=True)["Duracao_min"]
+        n = g.count()
+        bloco = pd.DataFrame({"n": n.astype("float64"), "media": g.mean(), "m2": g.var(ddof=0) * n})
+        self.merge_estado(bloco[bloco["n"] > 0])
+
+    def merge(self, outro: "WelfordPorGrupo") -> None:
+        self.merge_estado(outro.estado)
+
+    def merge_estado(self, b: pd.DataFrame) -> None:
+        a = self.estado.reindex(self.estado.index.union(b.index), fill_value=0.0)
+        b = b.reindex(a.index, fill_value=0.0)
+        n = a["n"] + b["n"]
+        delta = b["media"] - a["media"]
+        peso_b = (b["n"] / n).fillna(0.0)
+        self.estado = pd.DataFrame({
+            "n": n,
+            "media": a["media"] + delta * peso_b,
+            "m2": a["m2"] + b["m2"] + (delta ** 2 * a["n"] * peso_b).fillna(0.0),
+        })
+
+    def tabela(self) -> pd.DataFrame:
+        e = self.estado
+        return pd.DataFrame({
+            self.chave: e.index,
+            "N": e["n"].astype("int64").to_numpy(),
+            "Média (min)": e["media"].to_numpy(),
+            "Desvio padrão (min)": np.sqrt(e["m2"] / (e["n"] - 1).where(e["n"] > 1)).to_numpy(),
+        })
+
+
+# balde reservado para valores <= 0 na serialização dos sketches
+BALDE_ZERO = np.iinfo(np.int64).min
+
+
+class SketchQuantil:
+    """
+    Sketch de quantis com erro relativo limitado (estilo DDSketch): cada
+    valor cai num balde logarítmico de largura `erro`; os baldes são só
+    contagens, então dois sketches se combinam somando as contagens.
+    """
+
+    def __init__(self, erro: float = 0.01):
+        self.erro = erro
+        self.gamma = (1 + erro) / (1 - erro)
+        self._log_gamma = np.log(self.gamma)
+        self.offset = 0
+        self.contagens = np.zeros(0, dtype=np.int64)
+        self.zeros = 0  # valores <= 0 (ex.: duração "00:00:00")
+
+    @property
+    def n(self) -> int:
+        return int(self.contagens.sum()) + self.zeros
+
+    def _baldes(self, valores) -> np.ndarray:
+        return np.ceil(np.log(valores) / self._log_gamma).astype(np.int64)
+
+    def _acumular(self, idx: np.ndarray, contagens: np.ndarray) -> None:
+        if len(idx) == 0:
+            return
+        lo = min(int(idx.min()), self.offset if len(self.contagens) else int(idx.min()))
+        hi = max(int(idx.max()), self.offset + len(self.contagens) - 1)
+        novo = np.zeros(hi - lo + 1, dtype=np.int64)
+        if len(self.contagens):
+            novo[self.offset - lo:self.offset - lo + len(self.contagens)] = self.contagens
+        np.add.at(novo, idx - lo, contagens)
+        self.offset, self.contagens = lo, novo
+
+    def update(self, valores) -> None:
+        v = np.asarray(valores, dtype="float64")
+        v = v[~np.isnan(v)]
+        self.zeros += int((v <= 0).sum())
+        pos = v[v > 0]
+        if len(pos):
+            idx = self._baldes(pos)
+            base = int(idx.min())
+            cont = np.bincount(idx - base)
+            nz = np.flatnonzero(cont)
+            self._acumular(nz + base, cont[nz])
+
+    def merge(self, outro: "SketchQuantil") -> None:
+        self.zeros += outro.zeros
+        nz = np.flatnonzero(outro.contagens)
+        self._acumular(nz + outro.offset, outro.contagens[nz])
+
+    def quantil(self, q: float) -> float:
+        total = self.n
+        if total == 0:
+            return float("nan")
+        rank = q * (total - 1)
+        if rank < self.zeros:
+            return 0.0
+        acum = np.cumsum(self.contagens) + self.zeros
+        i = int(np.searchsorted(acum, rank, side="right"))
+        i = min(i, len(self.contagens) - 1)
+        # valor representativo do balde (meio geométrico), erro relativo <= `erro`
+        return float(2 * self.gamma ** (self.offset + i) / (self.gamma + 1))
+
+    def para_baldes(self) -> tuple[np.ndarray, np.ndarray]:
+        """(índices, contagens) dos baldes não vazios; o balde de zeros usa BALDE_ZERO."""
+        nz = np.flatnonzero(self.contagens)
+        idx = np.concatenate([[BALDE_ZERO], nz + self.offset]) if self.zeros else nz + self.offset
+        cont = np.concatenate([[self.zeros], self.contagens[nz]]) if self.zeros else self.contagens[nz]
+        return idx.astype(np.int64), cont.astype(np.int64)
+
+    @classmethod
+    def de_baldes(cls, idx, contagens, erro: float = 0.01) -> "SketchQuantil":
+        sk = cls(erro)
+        idx, contagens = np.asarray(idx, dtype=np.int64), np.asarray(contagens, dtype=np.int64)
+        zero = idx == BALDE_ZERO
+        sk.zeros = int(contagens[zero].sum())
+        sk._acumular(idx[~zero], contagens[~zero])
+        return sk
+
+
+PERCENTIS = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+
+
+class SketchPorGrupo:
+    """Um SketchQuantil de Duracao_min por valor de `chave` (Job); o global é a soma deles."""
+
+    def __init__(self, chave: str = "Job", erro: float = 0.01):
+        self.chave = chave
+        self.erro = erro
+        self.sketches: dict[str, SketchQuantil] = {}
+
+    def _sketch(self, grupo: str) -> SketchQuantil:
+        if grupo not in self.sketches:
+            self.sketches[grupo] = SketchQuantil(self.erro)
+        return self.sketches[grupo]
+
+    def update(self, df: pd.DataFrame) -> None:
+        if df.empty or self.chave not in df.columns:
+            return
+        for grupo, dur in df.groupby(df[self.chave].astype(str), observed=True)["Duracao_min"]:
+            self._sketch(grupo).update(dur.to_numpy())
+
+    def merge(self, outro: "SketchPorGrupo") -> None:
+        for grupo, sk in outro.sketches.items():
+            self._sketch(grupo).merge(sk)
+
+    def global_(self) -> SketchQuantil:
+        total = SketchQuantil(self.erro)
+        for sk in self.sketches.values():
+            total.merge(sk)
+        return total
+
+    def quantis(self, percentis: dict[str, float] = PERCENTIS) -> pd.DataFrame:
+        """Tabela chave x percentis (ex.: Job, p50, p95, p99), mais a linha "(todos)"."""
+        linhas = [
+            {self.chave: grupo, "N": sk.n, **{nome: sk.quantil(q) for nome, q in percentis.items()}}
+            for grupo, sk in sorted(self.sketches.items())
+        ]
+        g = self.global_()
+        linhas.append({self.chave: "(todos)", "N": g.n, **{nome: g.quantil(q) for nome, q in percentis.items()}})
+        return pd.DataFrame(linhas)
+
+    def limiares(self, q: float) -> dict[str, float]:
+        return {grupo: sk.quantil(q) for grupo, sk in self.sketches.items()}
+
+    def para_tabela(self) -> pd.DataFrame:
+        partes = []
+        for grupo, sk in self.sketches.items():
+            idx, cont = sk.para_baldes()
+            partes.append(pd.DataFrame({"Grupo": grupo, "Balde": idx, "Contagem": cont}))
+        if not partes:
+            return pd.DataFrame({"Grupo": pd.Series(dtype=str), "Balde": pd.Series(dtype="int64"),
+                                 "Contagem": pd.Series(dtype="int64")})
+        return pd.concat(partes, ignore_index=True)
+
+    @classmethod
+    def de_tabela(cls, tabela: pd.DataFrame, chave: str = "Job", erro: float = 0.01) -> "SketchPorGrupo":
+        out = cls(chave, erro)
+        for grupo, t in tabela.groupby("Grupo", sort=False):
+            out.sketches[str(grupo)] = SketchQuantil.de_baldes(t["Balde"], t["Contagem"], erro)
+        return out
+
+
+class SketchPorDia:
+    """
+    Um SketchQuantil de Duracao_min por (dimensão, valor, dia), para Job e
+    Node: percentis por dia que se combinam em semanas/meses sem reler as
+    linhas, e partes diferentes do arquivo se somam com merge.
+    """
+
+    DIMENSOES = ("Job", "Node")
+
+    def __init__(self, erro: float = 0.01):
+        self.erro = erro
+        self.sketches: dict[tuple[str, str, pd.Timestamp], SketchQuantil] = {}
+
+    def _sketch(self, chave: tuple) -> SketchQuantil:
+        if chave not in self.sketches:
+            self.sketches[chave] = SketchQuantil(self.erro)
+        return self.sketches[chave]
+
+    def update(self, df: pd.DataFrame) -> None:
+        if df.empty or "Data Início" not in df.columns:
+            return
+        dia = df["Data Início"].dt.floor("D").rename("Dia")
+        for dim in self.DIMENSOES:
+            if dim not in df.columns:
+                continue
+            for (d, grupo), dur in df.groupby([dia, df[dim]], observed=True)["Duracao_min"]:
+                self._sketch((dim, str(grupo), pd.Timestamp(d))).update(dur.to_numpy())
+
+    def merge(self, outro: "SketchPorDia") -> None:
+        for chave, sk in outro.sketches.items():
+            self._sketch(chave).merge(sk)
+
+    def serie(self, dim: str, q: float, freq: str = "D", inicio=None, fim=None,
+              valores: list | None = None) -> pd.DataFrame:
+        """
+        Quantil q de Duracao_min por (período, valor de `dim`), com os
+        sketches diários combinados no período `freq` ("D", "W", "M").
+        """
+        nome = f"p{round(q * 100)}"
+        combinados: dict[tuple, SketchQuantil] = {}
+        ini = pd.Timestamp(inicio) if inicio is not None else None
+        fi = pd.Timestamp(fim) if fim is not None else None
+        permitidos = {str(v) for v in valores} if valores else None
+        for (d, grupo, dia), sk in self.sketches.items():
+            if d != dim or (permitidos is not None and grupo not in permitidos):
+                continue
+            if (ini is not None and dia < ini) or (fi is not None and dia >= fi):
+                continue
+            periodo = dia if freq == "D" else dia.to_period(freq).start_time
+            chave = (periodo, grupo)
+            if chave not in combinados:
+                combinados[chave] = SketchQuantil(self.erro)
+            combinados[chave].merge(sk)
+        linhas = [{"Periodo": p, dim: g, nome: sk.quantil(q)} for (p, g), sk in combinados.items()]
+        out = pd.DataFrame(linhas, columns=["Periodo", dim, nome])
+        return out.sort_values(["Periodo", dim]).reset_index(drop=True)
+
+    def para_tabela(self) -> pd.DataFrame:
+        # uma tabela só, montada com arrays (são milhares de sketches pequenos)
+        chaves, idxs, conts = [], [], []
+        for chave, sk in self.sketches.items():
+            idx, cont = sk.para_baldes()
+            chaves.append(chave)
+            idxs.append(idx)
+            conts.append(cont)
+        tamanhos = np.array([len(i) for i in idxs], dtype=np.int64)
+        dims, grupos, dias = zip(*chaves) if chaves else ((), (), ())
+        return pd.DataFrame({
+            "Dimensao": np.repeat(np.array(dims, dtype=object), tamanhos).astype(str),
+            "Grupo": np.repeat(np.array(grupos, dtype=object), tamanhos).astype(str),
+            "Dia": np.repeat(np.array(dias, dtype="datetime64[ns]"), tamanhos),
+            "Balde": np.concatenate(idxs) if idxs else np.empty(0, np.int64),
+            "Contagem": np.concatenate(conts) if conts else np.empty(0, np.int64),
+        })
+
+    @classmethod
+    def de_tabela(cls, tabela: pd.DataFrame, erro: float = 0.01) -> "SketchPorDia":
+        out = cls(erro)
+        if tabela.empty:
+            return out
+        t = tabela.sort_values(["Dimensao", "Grupo", "Dia"], kind="stable")
+        dim, grupo = t["Dimensao"].astype(str).to_numpy(), t["Grupo"].astype(str).to_numpy()
+        dia = t["Dia"].to_numpy(dtype="datetime64[ns]")
+        balde, cont = t["Balde"].to_numpy(np.int64), t["Contagem"].to_numpy(np.int64)
+        muda = (dim[1:] != dim[:-1]) | (grupo[1:] != grupo[:-1]) | (dia[1:] != dia[:-1])
+        inicios = np.r_[0, np.flatnonzero(muda) + 1]
+        for a, b in zip(inicios, np.r_[inicios[1:], len(t)]):
+            out.sketches[(dim[a], grupo[a], pd.Timestamp(dia[a]))] = \
+                SketchQuantil.de_baldes(balde[a:b], cont[a:b], erro)
+        return out
+
+
+@medido("roi.montar_sketch")
+def montar_sketch(df: pd.DataFrame) -> SketchPorGrupo:
+    sk = SketchPorGrupo("Job")
+    sk.update(df)
+    return sk
+
+
+def merge_sketches(a: SketchPorGrupo, b: SketchPorGrupo) -> SketchPorGrupo:
+    out = SketchPorGrupo(a.chave, a.erro)
+    out.merge(a)
+    out.merge(b)
+    return out
+
+
+@medido("roi.montar_sketch_dia")
+def montar_sketch_dia(df: pd.DataFrame) -> SketchPorDia:
+    sk = SketchPorDia()
+    sk.update(df)
+    return sk
+
+
+def merge_sketches_dia(a: SketchPorDia, b: SketchPorDia) -> SketchPorDia:
+    out = SketchPorDia(a.erro)
+    out.merge(a)
+    out.merge(b)
+    return out
+
+
+def limiar_por_linha(df: pd.DataFrame, sketches: SketchPorGrupo, q: float, por_grupo: bool = True) -> pd.Series:
+    """
+    Limiar de outlier de cada linha: o quantil q do grupo da linha (por_grupo)
+    ou o quantil q global.
+    """
+    if not por_grupo or sketches.chave not in df.columns:
+        return pd.Series(sketches.global_().quantil(q), index=df.index)
+    limiares = sketches.limiares(q)
+    return df[sketches.chave].astype(str).map(limiares).astype("float64")
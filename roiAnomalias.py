@@ -0,0 +1,221 @@
+"""
+Anomalias de duração por Job contra uma linha de base móvel.
+
+Cada execução é comparada com o histórico do próprio Job até ela:
+  - EWMA da duração e desvio exponencial (média e variância móveis);
+  - mediana e MAD das últimas JANELA execuções (robustas a picos).
+É anomalia quando fica acima de EWMA + K_EWMA·desvio, o z robusto
+(x - mediana) / (1,4826·MAD) passa de Z_ROBUSTO e o excesso sobre a
+mediana é de pelo menos MIN_EXCESSO_MIN minutos. As primeiras JANELA
+execuções de cada Job só formam a linha de base.
+
+O estado por Job (EWMA, variância, últimas JANELA durações) é pequeno e
+continua de uma versão do CSV para a outra: só as linhas depois da marca
+d'água (maior Data Início já vista) são processadas. Se algo mudou antes
+da marca (linhas removidas ou inseridas no meio), recomeça do zero.
+
+As médias móveis são recorrências lineares resolvidas por groupby().ewm();
+mediana/MAD saem de janelas deslizantes (sliding_window_view) por Job.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+JANELA = int(os.environ.get("ROI_ANOMALIA_JANELA", "30"))
+# peso do EWMA equivalente a uma média de JANELA execuções
+ALFA = 2.0 / (JANELA + 1)
+K_EWMA = float(os.environ.get("ROI_ANOMALIA_K", "3"))
+Z_ROBUSTO = float(os.environ.get("ROI_ANOMALIA_Z", "3.5"))
+MIN_EXCESSO_MIN = float(os.environ.get("ROI_ANOMALIA_MIN_EXCESSO", "1"))
+# teto de anomalias guardadas (as mais recentes)
+MAX_SINALIZADAS = int(os.environ.get("ROI_ANOMALIA_MAX", "50000"))
+# janelas de mediana/MAD calculadas por vez (memória = LOTE_JANELAS x JANELA floats)
+LOTE_JANELAS = 100_000
+
+# 1,4826·MAD estima o desvio padrão numa normal
+ESCALA_MAD = 1.4826
+
+COLUNAS_LINHA = ["Código", "Job", "Node", "Cenário", "Data Início", "Duracao_min"]
+COLUNAS_SINAL = COLUNAS_LINHA + ["EWMA_min", "Desvio_EWMA_min", "Mediana_min", "MAD_min", "Z_robusto", "Excesso_min"]
+
+
+def _mediana_mad(valores: np.ndarray, inicio: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mediana e MAD das JANELA durações anteriores a cada posição >= `inicio`
+    de `valores` (NaN onde ainda não há JANELA anteriores).
+    """
+    n = len(valores)
+    med = np.full(n - inicio, np.nan)
+    mad = np.full(n - inicio, np.nan)
+    primeira = max(inicio, JANELA)
+    if n <= primeira:
+        return med, mad
+    # janela k cobre valores[k:k + JANELA] e prevê a posição k + JANELA
+    janelas = sliding_window_view(valores[:-1], JANELA)[primeira - JANELA:]
+    for ini in range(0, len(janelas), LOTE_JANELAS):
+        w = janelas[ini:ini + LOTE_JANELAS]
+        m = np.median(w, axis=1)
+        pos = primeira - inicio + ini
+        med[pos:pos + len(w)] = m
+        mad[pos:pos + len(w)] = np.median(np.abs(w - m[:, None]), axis=1)
+    return med, mad
+
+
+class DetectorAnomalias:
+    """
+    Linha de base por Job + anomalias já encontradas. atualizar() devolve
+    um detector novo e não altera este (sessões podem estar lendo a
+    versão anterior do dataset).
+    """
+
+    def __init__(self):
+        # Job -> (execuções, ewma, variância, últimas JANELA durações)
+        self.estado: dict[str, tuple[int, float, float, np.ndarray]] = {}
+        self.marca: pd.Timestamp | None = None
+        self.linhas = 0
+        self.sinalizadas = pd.DataFrame(columns=COLUNAS_SINAL)
+
+    def atualizar(self, novos: pd.DataFrame, linhas_ate_marca: int) -> "DetectorAnomalias":
+        """
+        `novos`: linhas com Data Início depois da marca atual (todas, na
+        primeira vez); `linhas_ate_marca`: quantas linhas da fonte têm
+        Data Início <= marca. Se não bate com o que já foi processado, o
+        histórico mudou e o detector recomeça com `novos` = tudo.
+        """
+        if linhas_ate_marca != self.linhas:
+            raise ValueError("histórico mudou antes da marca d'água")
+        out = DetectorAnomalias()
+        out.estado = dict(self.estado)
+        # só linhas com data entram na contagem (as sem data nunca passam pela marca)
+        out.marca, out.linhas = self.marca, self.linhas + int(novos["Data Início"].notna().sum())
+        datas = novos["Data Início"].dropna()
+        if not datas.empty:
+            out.marca = datas.max() if self.marca is None else max(self.marca, datas.max())
+        sinal = out._processar(novos)
+        partes = [s for s in (self.sinalizadas, sinal) if not s.empty]
+        if partes:
+            tudo = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+            out.sinalizadas = tudo.iloc[-MAX_SINALIZADAS:].reset_index(drop=True)
+        return out
+
+    def _processar(self, novos: pd.DataFrame) -> pd.DataFrame:
+        cols = [c for c in COLUNAS_LINHA if c in novos.columns]
+        base = novos[cols].dropna(subset=["Job", "Data Início", "Duracao_min"])
+        if base.empty:
+            return pd.DataFrame(columns=COLUNAS_SINAL)
+        base = base.assign(Job=base["Job"].astype(str), x=base["Duracao_min"].astype("float64"))
+        ordem = ["Job", "Data Início"] + (["Código"] if "Código" in base.columns else [])
+        base = base.sort_values(ordem, kind="stable").reset_index(drop=True)
+
+        # uma linha-semente por Job conhecido (x = EWMA, y = variância) antes das novas
+        jobs = base["Job"].unique()
+        conhecidos = [j for j in jobs if j in self.estado]
+        sementes = pd.DataFrame({
+            "Job": conhecidos,
+            "x": [self.estado[j][1] for j in conhecidos],
+            "y": [self.estado[j][2] for j in conhecidos],
+            "semente": True,
+        })
+        comb = pd.concat([sementes, base.assign(semente=False)], ignore_index=True)
+        comb = comb.sort_values("Job", kind="stable").reset_index(drop=True)
+        g = comb.groupby("Job", sort=False)
+
+        # EWMA (adjust=False: m = (1-a)·m_ant + a·x) e a média antes de cada linha
+        m = g["x"].ewm(alpha=ALFA, adjust=False).mean().reset_index(level=0, drop=True).sort_index()
+        m_ant = m.groupby(comb["Job"], sort=False).shift(1)
+        # variância exponencial: v = (1-a)·v_ant + a·(1-a)·(x - m_ant)²
+        y = (1 - ALFA) * (comb["x"] - m_ant) ** 2
+        y = y.where(~comb["semente"], comb["y"]).fillna(0.0)
+        v = y.groupby(comb["Job"], sort=False).ewm(alpha=ALFA, adjust=False).mean()
+        v = v.reset_index(level=0, drop=True).sort_index()
+        v_ant = v.groupby(comb["Job"], sort=False).shift(1)
+
+        reais = ~comb["semente"].to_numpy()
+        med = np.full(len(comb), np.nan)
+        mad = np.full(len(comb), np.nan)
+        x = comb["x"].to_numpy()
+        limites = np.flatnonzero(np.r_[True, comb["Job"].to_numpy()[1:] != comb["Job"].to_numpy()[:-1], True])
+        for ini, fim in zip(limites[:-1], limites[1:]):
+            job = comb["Job"].iat[ini]
+            n_ant, _, _, buffer = self.estado.get(job, (0, 0.0, 0.0, np.empty(0)))
+            semente = int(not reais[ini])
+            valores = np.concatenate([buffer, x[ini + semente:fim]])
+            med[ini + semente:fim], mad[ini + semente:fim] = _mediana_mad(valores, len(buffer))
+            ultimo = fim - 1
+            self.estado[job] = (n_ant + fim - ini - semente, float(m.iat[ultimo]), float(v.iat[ultimo]),
+                                valores[-JANELA:].copy())
+
+        comb["EWMA_min"] = m_ant
+        comb["Desvio_EWMA_min"] = np.sqrt(v_ant)
+        comb["Mediana_min"] = med
+        comb["MAD_min"] = mad
+        comb["Excesso_min"] = comb["x"] - comb["Mediana_min"]
+        escala = ESCALA_MAD * comb["MAD_min"]
+        # MAD zero (durações iguais na janela): qualquer excesso conta como z infinito
+        comb["Z_robusto"] = np.where(escala > 0, comb["Excesso_min"] / escala.where(escala > 0),
+                                     np.where(comb["Excesso_min"] > 0, np.inf, 0.0))
+        flag = (
+            reais
+            & comb["Mediana_min"].notna().to_numpy()
+            & (comb["x"] > comb["EWMA_min"] + K_EWMA * comb["Desvio_EWMA_min"]).to_numpy()
+            & (comb["Z_robusto"] > Z_ROBUSTO).to_numpy()
+            & (comb["Excesso_min"] >= MIN_EXCESSO_MIN).to_numpy()
+        )
+        sinal = comb.loc[flag].sort_values("Data Início", kind="stable")
+        sinal = sinal.reindex(columns=COLUNAS_SINAL).reset_index(drop=True)
+        if "Código" in base.columns:
+            # as sementes (sem Código) deixaram a coluna em float
+            sinal["Código"] = sinal["Código"].astype(base["Código"].dtype)
+        return sinal
+
+    def baseline(self) -> pd.DataFrame:
+        """Linha de base atual de cada Job."""
+        linhas = []
+        for job, (n, ewma, var, buffer) in self.estado.items():
+            med = float(np.median(buffer)) if len(buffer) else np.nan
+            linhas.append({
+                "Job": job,
+                "Execuções": n,
+                "EWMA (min)": ewma,
+                "Desvio EWMA (min)": float(np.sqrt(var)),
+                "Mediana (min)": med,
+                "MAD (min)": float(np.median(np.abs(buffer - med))) if len(buffer) else np.nan,
+            })
+        colunas = ["Job", "Execuções", "EWMA (min)", "Desvio EWMA (min)", "Mediana (min)", "MAD (min)"]
+        return pd.DataFrame(linhas, columns=colunas).sort_values("Job").reset_index(drop=True)
+
+
+# =============================
+# Consultas sobre as anomalias
+# =============================
+def filtrar_sinalizadas(sinal: pd.DataFrame, inicio=None, fim=None, filtros: dict | None = None) -> pd.DataFrame:
+    """Anomalias do período/filtros (mesmo formato de filtro do IndiceROI)."""
+    mask = pd.Series(True, index=sinal.index)
+    if inicio is not None:
+        mask &= sinal["Data Início"] >= pd.Timestamp(inicio)
+    if fim is not None:
+        mask &= sinal["Data Início"] < pd.Timestamp(fim)
+    for col, valores in (filtros or {}).items():
+        if valores and col in sinal.columns:
+            mask &= sinal[col].astype(str).isin([str(v) for v in valores])
+    return sinal[mask]
+
+
+def resumo_anomalias(sinal: pd.DataFrame, cubo: pd.DataFrame, col: str) -> pd.DataFrame:
+    """
+    Anomalias por `col` (Node, Cenário ou Job): quantidade, excesso somado
+    e taxa sobre as execuções do cubo (já filtrado pelo mesmo recorte).
+    """
+    colunas = [col, "Anomalias", "Execuções", "Taxa (%)", "Excesso total (min)", "Excesso médio (min)"]
+    if sinal.empty or col not in sinal.columns:
+        return pd.DataFrame(columns=colunas)
+    g = sinal.assign(**{col: sinal[col].astype(str)}).groupby(col)
+    out = g.agg(Anomalias=("Excesso_min", "size"), Excesso=("Excesso_min", "sum")).reset_index()
+    execs = cubo.assign(**{col: cubo[col].astype(str)}).groupby(col)["Execucoes"].sum()
+    out["Execuções"] = out[col].map(execs).fillna(0).astype("int64")
+    out["Taxa (%)"] = (out["Anomalias"] / out["Execuções"].where(out["Execuções"] > 0) * 100).round(2)
+    out["Excesso total (min)"] = out.pop("Excesso").round(1)
+    out["Excesso médio (min)"] = (out["Excesso total (min)"] / out["Anomalias"]).round(2)
+    return out[colunas].sort_values("Anomalias", ascending=False).reset_index(drop=True)
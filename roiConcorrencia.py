@@ -0,0 +1,138 @@
+"""
+Concorrência e utilização dos Nodes a partir dos intervalos de execução.
+
+Cada execução é o intervalo [Data Início, Data Fim). Os limites viram
+eventos (+1 no início, -1 no fim) ordenados por (Node, instante), com os
+fins antes dos inícios no mesmo instante; a soma acumulada dos eventos dá
+quantas execuções estão rodando em cada Node após cada evento. É uma
+ordenação e uma soma acumulada: O(n log n) para n intervalos.
+
+Por hora, as integrais acumuladas desse nível (área = execuções x tempo,
+tempo ocupado = tempo com pelo menos uma execução) são avaliadas nos
+limites das horas, sem quebrar os intervalos hora a hora.
+"""
+import numpy as np
+import pandas as pd
+
+HORA_NS = 3_600 * 10 ** 9
+
+
+def _ns(serie: pd.Series) -> np.ndarray:
+    return serie.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def varredura(df: pd.DataFrame, por: str = "Node") -> dict:
+    """
+    Eventos ordenados de todos os grupos de `por`:
+      - grupos: nomes dos grupos (índice = código)
+      - g, t: código do grupo e instante (ns) de cada evento
+      - nivel: execuções simultâneas no grupo logo após o evento
+    Intervalos sem início/fim ou com fim <= início ficam de fora.
+    """
+    ini = _ns(df["Data Início"])
+    fim = _ns(df["Data Fim"])
+    validos = (~df["Data Início"].isna().to_numpy()) & (~df["Data Fim"].isna().to_numpy()) & (fim > ini)
+
+    serie = df[por] if isinstance(df[por].dtype, pd.CategoricalDtype) else df[por].astype("category")
+    cod = serie.cat.codes.to_numpy().astype(np.int64)
+    validos &= cod >= 0
+    ini, fim, cod = ini[validos], fim[validos], cod[validos]
+
+    t = np.concatenate([ini, fim])
+    delta = np.concatenate([np.ones(len(ini), np.int64), -np.ones(len(fim), np.int64)])
+    g = np.concatenate([cod, cod])
+    # chave primária é a última: grupo, depois instante, depois fim (-1) antes de início (+1)
+    ordem = np.lexsort((delta, t, g))
+    t, g, delta = t[ordem], g[ordem], delta[ordem]
+    # cada grupo soma zero, então a soma acumulada global já recomeça em cada grupo
+    nivel = np.cumsum(delta)
+    return {"grupos": [str(c) for c in serie.cat.categories], "g": g, "t": t, "nivel": nivel}
+
+
+def _por_hora(t: np.ndarray, nivel: np.ndarray) -> dict:
+    """Pico, concorrência média e fração ocupada por hora para os eventos de um grupo."""
+    dt = np.diff(t)
+    area = np.concatenate([[0], np.cumsum(nivel[:-1] * dt)])
+    ocupado = np.concatenate([[0], np.cumsum((nivel[:-1] > 0) * dt)])
+
+    h0 = t[0] // HORA_NS * HORA_NS
+    horas = np.arange(h0, t[-1] + HORA_NS, HORA_NS)
+    if horas[-1] < t[-1]:
+        horas = np.append(horas, horas[-1] + HORA_NS)
+
+    # último evento em ou antes de cada limite de hora (-1 = antes do primeiro)
+    idx = np.searchsorted(t, horas, side="right") - 1
+    antes = idx < 0
+    i = np.where(antes, 0, idx)
+    nivel_h = np.where(antes, 0, nivel[i])
+    area_h = np.where(antes, 0, area[i] + nivel[i] * (horas - t[i]))
+    ocup_h = np.where(antes, 0, ocupado[i] + (nivel[i] > 0) * (horas - t[i]))
+
+    n = len(horas) - 1
+    pico = nivel_h[:-1].copy()
+    hidx = np.minimum((t - h0) // HORA_NS, n - 1)
+    np.maximum.at(pico, hidx, nivel)
+    return {
+        "Hora": horas[:-1],
+        "Pico": pico,
+        "Media": np.diff(area_h) / HORA_NS,
+        "Utilizacao_pct": np.diff(ocup_h) / HORA_NS * 100,
+    }
+
+
+def concorrencia_por_hora(df: pd.DataFrame, por: str = "Node") -> pd.DataFrame:
+    """
+    Uma linha por (hora, grupo) entre a primeira e a última execução do
+    grupo: Pico (máximo de execuções simultâneas), Media (execuções
+    simultâneas em média) e Utilizacao_pct (% da hora com alguma execução).
+    """
+    colunas = ["Hora", por, "Pico", "Media", "Utilizacao_pct"]
+    v = varredura(df, por)
+    if len(v["t"]) == 0:
+        return pd.DataFrame(columns=colunas)
+
+    limites = np.flatnonzero(np.diff(v["g"])) + 1
+    partes = []
+    for a, b in zip(np.r_[0, limites], np.r_[limites, len(v["g"])]):
+        r = _por_hora(v["t"][a:b], v["nivel"][a:b])
+        r[por] = v["grupos"][v["g"][a]]
+        partes.append(pd.DataFrame(r))
+    out = pd.concat(partes, ignore_index=True)
+    out["Hora"] = pd.to_datetime(out["Hora"], unit="ns")
+    return out[colunas]
+
+
+def resumo_concorrencia(df: pd.DataFrame, por: str = "Node") -> pd.DataFrame:
+    """Por grupo: pico de simultaneidade, quando ocorreu e utilização no período das execuções."""
+    colunas = [por, "Pico", "Quando", "Media", "Utilizacao_pct"]
+    v = varredura(df, por)
+    if len(v["t"]) == 0:
+        return pd.DataFrame(columns=colunas)
+
+    g, t, nivel = v["g"], v["t"], v["nivel"]
+    limites = np.flatnonzero(np.diff(g)) + 1
+    linhas = []
+    for a, b in zip(np.r_[0, limites], np.r_[limites, len(g)]):
+        tk, nk = t[a:b], nivel[a:b]
+        dt = np.diff(tk)
+        span = tk[-1] - tk[0]
+        i = int(np.argmax(nk))
+        linhas.append({
+            por: v["grupos"][g[a]],
+            "Pico": int(nk[i]),
+            "Quando": pd.Timestamp(int(tk[i])),
+            "Media": float((nk[:-1] * dt).sum() / span) if span else 0.0,
+            "Utilizacao_pct": float(((nk[:-1] > 0) * dt).sum() / span * 100) if span else 0.0,
+        })
+    return pd.DataFrame(linhas, columns=colunas).sort_values("Pico", ascending=False).reset_index(drop=True)
+
+
+def perfil_hora_do_dia(por_hora: pd.DataFrame, por: str = "Node") -> pd.DataFrame:
+    """Média do pico e da utilização por hora do dia (0-23), para dimensionar os Nodes."""
+    if por_hora.empty:
+        return pd.DataFrame(columns=["HoraDia", por, "Pico_medio", "Pico_max", "Utilizacao_pct"])
+    base = por_hora.assign(HoraDia=por_hora["Hora"].dt.hour)
+    return (
+        base.groupby(["HoraDia", por], as_index=False)
+        .agg(Pico_medio=("Pico", "mean"), Pico_max=("Pico", "max"), Utilizacao_pct=("Utilizacao_pct", "mean"))
+    )
@@ -0,0 +1,90 @@
+"""
+Dataset do ROI pronto para consumo, sem Streamlit.
+
+Junta leitura (csvLoader / roiStreaming), agregados e índice num único
+dicionário. A página usa via atualizador em segundo plano; jobs em lote
+chamam carregar_roi direto.
+"""
+import os
+
+from csvLoader import load_roi_dados, load_roi_particionado, particionada, relatorio_memoria, tamanho_fonte
+from instrumentacao import etapa
+from roiAnomalias import DetectorAnomalias, COLUNAS_LINHA
+from roiIndice import IndiceROI
+from roiStreaming import agregar_em_blocos
+import roiSqlite
+
+# acima deste tamanho o CSV é lido em blocos (modo streaming), sem carregar o df
+LIMITE_STREAMING_MB = float(os.environ.get("ROI_STREAMING_MB", "1024"))
+# "sqlite": linhas num banco SQLite em disco (roiSqlite), só agregados em memória
+BACKEND = os.environ.get("ROI_BACKEND", "memoria").lower()
+
+
+def carregar_roi(path: str) -> dict:
+    """
+    Até LIMITE_STREAMING_MB: df formatado + agregados + índice
+    ({"df", "cubo", "sketch", "indice", ...}); acima disso, só os agregados
+    combináveis do modo streaming (roiStreaming.agregar_em_blocos).
+    Tudo que não depende da sessão é calculado aqui.
+
+    `path` pode ser uma pasta/glob de CSVs: acima do limite ficam só os
+    agregados somados das partições (as linhas são lidas por mês, sob demanda).
+
+    Com ROI_BACKEND=sqlite, sempre os agregados do modo streaming mais
+    {"sqlite": caminho do banco} com as linhas, qualquer que seja o tamanho.
+    """
+    if BACKEND == "sqlite":
+        dados = roiSqlite.carregar_sqlite(path)
+        dados["streaming"] = True
+        dados["anomalias"] = atualizar_anomalias(path, dados)
+        return dados
+    streaming = tamanho_fonte(path) > LIMITE_STREAMING_MB * 1024 ** 2
+    if particionada(path):
+        dados = load_roi_particionado(path, linhas=not streaming)
+    elif streaming:
+        dados = agregar_em_blocos(path)
+    else:
+        dados = load_roi_dados(path)
+    if not streaming:
+        # índice é só leitura: um por versão do CSV, compartilhado entre sessões
+        with etapa("roi.indice"):
+            dados["indice"] = IndiceROI(dados["df"])
+        dados["memoria"] = relatorio_memoria(dados["df"])
+    dados["streaming"] = streaming
+    dados["anomalias"] = atualizar_anomalias(path, dados)
+    return dados
+
+
+# detector de anomalias por fonte, continuado a cada versão nova do CSV
+_DETECTORES: dict[str, DetectorAnomalias] = {}
+
+
+def atualizar_anomalias(path: str, dados: dict) -> DetectorAnomalias | None:
+    """
+    Passa ao detector só as linhas depois da marca d'água; se o histórico
+    antes da marca mudou, recomeça com todas. None no modo streaming
+    puro (as linhas não ficam disponíveis em ordem).
+    """
+    det = _DETECTORES.get(path) or DetectorAnomalias()
+    with etapa("roi.anomalias"):
+        if "df" in dados:
+            df = dados["df"]
+            datas = df["Data Início"]
+            ate = int((datas <= det.marca).sum()) if det.marca is not None else 0
+            if ate != det.linhas:
+                det, ate = DetectorAnomalias(), 0
+            novos = df if det.marca is None else df[datas > det.marca]
+        elif "sqlite" in dados:
+            db = dados["sqlite"]
+            ate = roiSqlite.linhas_ate(db, det.marca) if det.marca is not None else 0
+            if ate != det.linhas:
+                det, ate = DetectorAnomalias(), 0
+            colunas = [c for c in COLUNAS_LINHA if c in roiSqlite.COLUNAS]
+            novos = roiSqlite.linhas(db, colunas, inicio=det.marca)
+            if det.marca is not None:
+                novos = novos[novos["Data Início"] > det.marca]
+        else:
+            return None
+        det = det.atualizar(novos, ate)
+    _DETECTORES[path] = det
+    return det
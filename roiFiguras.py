@@ -0,0 +1,59 @@
+"""
+Figuras do ROI montadas a partir das tabelas do cubo, sem Streamlit.
+
+A página passa as figuras pelo orçamento de render; o relatório em lote
+grava o HTML.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+JOB_COLORS = {
+    "JOB_NASA_VA": "#FAA43A",
+    "JOB_NASA_CME_NF": "#5DA5DA",
+    "JOB_NASA_CME_ST": "#60BD68",
+    "JOB_SD_ZVF31_ECP": "#F10C29",
+    "JOB_NASA_J3GH": "#B2912F",
+    "JOB_SD_J1BFNE_ECP": "#B276B2",
+}
+
+
+def figura_top_jobs(top_jobs: pd.DataFrame) -> go.Figure:
+    fig = px.bar(
+        top_jobs,
+        x="Job",
+        y="Execuções",
+        color="Job",
+        title="Execuções por Job (Top 10)",
+        color_discrete_map=JOB_COLORS
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def figura_por_hora(heat: pd.DataFrame) -> go.Figure:
+    return px.bar(heat, x="Hora", y="Execuções", title="Execuções por Hora")
+
+
+def figura_tempo_medio(tm: pd.DataFrame) -> go.Figure:
+    fig = px.bar(
+        tm,
+        x="Tempo médio (min)",
+        y="Job",
+        orientation="h",
+        color="Job",
+        title="Tempo médio por Job (Top 10)",
+        color_discrete_map=JOB_COLORS
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def figura_nodes(ns: pd.DataFrame) -> go.Figure:
+    """`ns` já reduzido aos maiores Nodes (+ "Outros")."""
+    return px.bar(ns, x="Node", y="Execucoes", title="Execuções por Node")
+
+
+def figura_cenarios(amb: pd.DataFrame) -> go.Figure:
+    """`amb` já reduzido aos maiores Cenários (+ "Outros")."""
+    return px.pie(amb, names="Cenário", values="Execuções", title="Distribuição por Cenário")
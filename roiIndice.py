@@ -0,0 +1,93 @@
+"""
+Índices de linhas do ROI para os filtros da página.
+
+As linhas ficam ordenadas por "Data Início" (um array de posições); um
+intervalo de datas vira uma fatia dessa ordem via busca binária. Para cada
+coluna categórica (Job, Node, Cenário) cada valor guarda a lista ordenada
+das suas posições nessa mesma ordem, e os filtros são resolvidos por
+união/interseção dessas listas, sem máscaras booleanas sobre o df inteiro.
+"""
+import numpy as np
+import pandas as pd
+
+COLUNAS_FILTRO = ["Job", "Node", "Cenário"]
+
+
+class IndiceROI:
+    def __init__(self, df: pd.DataFrame, col_data: str = "Data Início"):
+        datas = df[col_data].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        nat = df[col_data].isna().to_numpy()
+        # NaT vai para o fim da ordem e fica fora de qualquer intervalo
+        datas[nat] = np.iinfo(np.int64).max
+        self.ordem = np.argsort(datas, kind="stable")
+        self.datas = datas[self.ordem]
+        self.n_validas = int((~nat).sum())
+        self.listas: dict[str, dict[str, np.ndarray]] = {}
+
+        for col in COLUNAS_FILTRO:
+            if col not in df.columns:
+                continue
+            serie = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype("category")
+            categorias = serie.cat.categories
+            # códigos na ordem por data; argsort estável agrupa por valor mantendo as posições crescentes
+            cod_ordem = serie.cat.codes.to_numpy()[self.ordem]
+            por_valor = np.argsort(cod_ordem, kind="stable")
+            limites = np.searchsorted(cod_ordem[por_valor], np.arange(len(categorias) + 1))
+            self.listas[col] = {
+                str(cat): por_valor[limites[i]:limites[i + 1]]
+                for i, cat in enumerate(categorias)
+                if limites[i + 1] > limites[i]
+            }
+
+        # o índice é compartilhado entre sessões: arrays somente leitura
+        for arr in (self.ordem, self.datas, *(a for lst in self.listas.values() for a in lst.values())):
+            arr.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.ordem)
+
+    def valores(self, col: str) -> list[str]:
+        return sorted(self.listas.get(col, {}))
+
+    def periodo(self) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+        if self.n_validas == 0:
+            return None
+        return pd.Timestamp(self.datas[0]), pd.Timestamp(self.datas[self.n_validas - 1])
+
+    def _faixa(self, inicio, fim) -> tuple[int, int]:
+        """Fatia [lo, hi) da ordem por data com inicio <= Data Início < fim."""
+        lo, hi = 0, len(self.ordem)
+        if inicio is not None:
+            lo = int(np.searchsorted(self.datas, pd.Timestamp(inicio).value, side="left"))
+        if fim is not None:
+            hi = int(np.searchsorted(self.datas, pd.Timestamp(fim).value, side="left"))
+        elif inicio is not None:
+            hi = self.n_validas
+        return lo, max(lo, hi)
+
+    def posicoes(self, inicio=None, fim=None, filtros: dict[str, list] | None = None) -> np.ndarray:
+        """
+        Posições (iloc) das linhas com inicio <= Data Início < fim e cujos
+        valores estão nos filtros ({coluna: [valores]}; lista vazia = todos).
+        As posições saem em ordem cronológica.
+        """
+        lo, hi = self._faixa(inicio, fim)
+        selecionadas = None  # None = fatia inteira [lo, hi)
+
+        for col, valores in (filtros or {}).items():
+            if not valores or col not in self.listas:
+                continue
+            partes = []
+            for v in valores:
+                lista = self.listas[col].get(str(v))
+                if lista is None:
+                    continue
+                a, b = np.searchsorted(lista, [lo, hi])
+                partes.append(lista[a:b])
+            uniao = np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=np.int64)
+            selecionadas = uniao if selecionadas is None \
+                else np.intersect1d(selecionadas, uniao, assume_unique=True)
+
+        if selecionadas is None:
+            return self.ordem[lo:hi]
+        return self.ordem[selecionadas]
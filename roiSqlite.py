@@ -0,0 +1,315 @@
+"""
+Backend SQLite do ROI (ROI_BACKEND=sqlite).
+
+As linhas formatadas do CSV (ou das partições) vão para um banco SQLite
+em disco, com índices em Data Início, Job, Node e Cenário; o processo
+guarda só os agregados combináveis, como no modo streaming. As contagens,
+médias e cargas da página continuam saindo do cubo recortado (exato por
+dia). O banco atende o que precisa das linhas: outliers, concorrência,
+séries por hora e o desvio padrão por Job de um recorte (duas passadas
+no SQL, sem a perda de precisão de soma/soma dos quadrados). Todas
+as consultas leem só as linhas que casam com os filtros.
+
+Custo de atualização: o banco de uma versão nunca muda, então cada versão
+nova da fonte (inclusive um CSV que só ganhou linhas no fim) monta um
+banco novo relendo a fonte inteira; os agregados também são refeitos numa
+passada completa. A ingestão incremental do csvLoader (só as linhas
+novas) vale para o modo em memória, não para este backend.
+
+Um arquivo por versão da fonte (roi-<fonte>-<versão>.sqlite): é montado
+num temporário e renomeado pronto, depois nunca mais muda. Vários
+processos abrem o mesmo arquivo só para leitura, sem trava; quem ainda
+está na versão anterior continua lendo o arquivo antigo até trocar de
+dataset. Por isso uma versão antiga só é apagada RETENCAO_MIN minutos
+depois de a seguinte ficar pronta, e só entre os bancos da mesma fonte.
+"""
+import glob
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from atualizadorDados import versao_arquivo
+from csvLoader import get_cache_dir, compactar_schema, particionada, load_roi_particionado, ler_particoes
+from instrumentacao import medido, registrar_cache
+from roiStreaming import ler_em_blocos, agregar_blocos, LINHAS_POR_BLOCO, MAX_OUTLIERS
+
+TABELA = "execucoes"
+# colunas guardadas no banco (as que existirem na fonte) e o tipo SQLite de cada uma
+COLUNAS = {
+    "Código": "INTEGER",
+    "Job": "TEXT",
+    "PID": "INTEGER",
+    "Node": "TEXT",
+    "Cenário": "TEXT",
+    "Data Início": "TEXT",
+    "Data Fim": "TEXT",
+    "Duracao_min": "REAL",
+    "Hora": "INTEGER",
+}
+INDICES = ["Data Início", "Job", "Node", "Cenário"]
+DATAS = ["Data Início", "Data Fim"]
+# texto ISO: ordena igual à data, então filtro de período usa o índice
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+# tempo que uma versão substituída continua em disco para quem ainda a lê
+RETENCAO_MIN = float(os.environ.get("ROI_SQLITE_RETENCAO_MIN", "60"))
+
+
+def _q(col: str) -> str:
+    """Identificador SQL entre aspas (as colunas do ROI têm espaço e acento)."""
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _texto_data(valor) -> str:
+    return pd.Timestamp(valor).strftime(FORMATO_DATA)
+
+
+# =============================
+# Arquivo do banco
+# =============================
+def pasta_banco() -> str:
+    """Pasta dos bancos SQLite (ROI_SQLITE_DIR sobrescreve)."""
+    return os.environ.get("ROI_SQLITE_DIR") or os.path.join(get_cache_dir(), "sqlite")
+
+
+def _prefixo(fonte: str) -> str:
+    """Começo do nome dos bancos de uma fonte (roi-<hash do caminho>-)."""
+    return "roi-" + hashlib.sha1(os.path.abspath(fonte).encode("utf-8")).hexdigest()[:8] + "-"
+
+
+def caminho_banco(fonte: str) -> str:
+    """Banco da versão atual da fonte: muda de nome quando a fonte muda."""
+    versao = hashlib.sha1(str(versao_arquivo(fonte)).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(pasta_banco(), f"{_prefixo(fonte)}{versao}.sqlite")
+
+
+def conectar(db: str) -> sqlite3.Connection:
+    """Conexão só leitura; immutable porque o arquivo não muda depois de pronto."""
+    return sqlite3.connect(Path(db).resolve().as_uri() + "?mode=ro&immutable=1", uri=True)
+
+
+class _Montagem:
+    """
+    Banco novo sendo gravado num temporário: gravar() a cada bloco,
+    concluir() cria os índices e renomeia para o nome final. Se outro
+    processo montou o mesmo banco antes, fica valendo o dele.
+    """
+
+    def __init__(self, db: str):
+        os.makedirs(os.path.dirname(db), exist_ok=True)
+        self.db = db
+        self.tmp = f"{db}.{os.getpid()}.tmp"
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+        self.con = sqlite3.connect(self.tmp)
+        # arquivo temporário: sem journal nem fsync durante a carga
+        self.con.execute("PRAGMA journal_mode=OFF")
+        self.con.execute("PRAGMA synchronous=OFF")
+        self.colunas: list[str] | None = None
+
+    def _criar_tabela(self, colunas: list[str]) -> None:
+        self.colunas = colunas
+        self.con.execute(f"CREATE TABLE {TABELA} ({', '.join(f'{_q(c)} {COLUNAS[c]}' for c in colunas)})")
+
+    def gravar(self, bloco: pd.DataFrame) -> None:
+        if self.colunas is None:
+            self._criar_tabela([c for c in COLUNAS if c in bloco.columns])
+        sub = bloco[self.colunas].copy()
+        for col in DATAS:
+            if col in self.colunas:
+                sub[col] = sub[col].dt.strftime(FORMATO_DATA)
+        # object com None no lugar de NaN/NaT: o sqlite3 só aceita escalares do Python
+        sub = sub.astype(object).where(sub.notna(), None)
+        marcadores = ", ".join("?" * len(self.colunas))
+        self.con.executemany(
+            f"INSERT INTO {TABELA} ({', '.join(map(_q, self.colunas))}) VALUES ({marcadores})",
+            sub.itertuples(index=False, name=None),
+        )
+
+    def concluir(self) -> None:
+        if self.colunas is None:
+            self._criar_tabela(list(COLUNAS))
+        for col in INDICES:
+            if col in self.colunas:
+                self.con.execute(f"CREATE INDEX {_q('idx_' + col)} ON {TABELA} ({_q(col)})")
+        self.con.execute("ANALYZE")
+        self.con.commit()
+        self.con.close()
+        try:
+            os.replace(self.tmp, self.db)
+        except PermissionError:
+            # Windows: o destino já existe e está aberto por outro processo
+            os.remove(self.tmp)
+
+    def descartar(self) -> None:
+        self.con.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+def _remover_antigos(fonte: str, db: str) -> None:
+    """
+    Apaga versões antigas da mesma fonte quando a versão que as substituiu
+    já está pronta há mais de RETENCAO_MIN (os arquivos abertos no Windows ficam).
+    """
+    bancos = []
+    for p in glob.glob(os.path.join(os.path.dirname(db), glob.escape(_prefixo(fonte)) + "*.sqlite")):
+        try:
+            bancos.append((os.path.getmtime(p), p))
+        except OSError:
+            continue
+    bancos.sort(reverse=True)
+    limite = time.time() - RETENCAO_MIN * 60
+    # cada banco foi substituído pelo imediatamente mais novo
+    for (substituido_em, _), (_, antigo) in zip(bancos, bancos[1:]):
+        if substituido_em < limite and os.path.abspath(antigo) != os.path.abspath(db):
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+
+
+def _formatar(df: pd.DataFrame) -> pd.DataFrame:
+    """Linhas lidas do banco de volta aos tipos do ROI formatado."""
+    for col in DATAS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=FORMATO_DATA).astype("datetime64[ns]")
+    return compactar_schema(df)
+
+
+def ler_banco(db: str, linhas_por_bloco: int = LINHAS_POR_BLOCO, inicio=None, fim=None,
+              filtros: dict | None = None) -> Iterator[pd.DataFrame]:
+    """Blocos formatados das linhas do banco (mesmo formato de ler_em_blocos), opcionalmente filtradas."""
+    onde, params = _onde(inicio, fim, filtros)
+    con = conectar(db)
+    try:
+        for bloco in pd.read_sql_query(f"SELECT * FROM {TABELA}{onde}", con, params=params,
+                                       chunksize=linhas_por_bloco):
+            yield _formatar(bloco)
+    finally:
+        con.close()
+
+
+@medido("sqlite.carregar_sqlite")
+def carregar_sqlite(fonte: str) -> dict:
+    """
+    Agregados do modo streaming + {"sqlite": caminho do banco}. Se o banco
+    desta versão não existe, é montado na mesma passada que calcula os
+    agregados (fonte particionada: agregados vêm do cache das partições).
+    Sempre lê a fonte inteira (ver o custo de atualização no topo do módulo).
+    """
+    db = caminho_banco(fonte)
+    existe = os.path.exists(db)
+    registrar_cache("roi.sqlite", existe)
+    if existe:
+        if particionada(fonte):
+            dados = load_roi_particionado(fonte, linhas=False)
+        else:
+            dados = agregar_blocos(ler_banco(db))
+    else:
+        montagem = _Montagem(db)
+        try:
+            if particionada(fonte):
+                dados = load_roi_particionado(fonte, linhas=False)
+                for bloco in ler_particoes(fonte):
+                    montagem.gravar(bloco)
+            else:
+                dados = agregar_blocos(ler_em_blocos(fonte), ao_ler=montagem.gravar)
+        except BaseException:
+            montagem.descartar()
+            raise
+        montagem.concluir()
+    _remover_antigos(fonte, db)
+    dados["sqlite"] = db
+    return dados
+
+
+# =============================
+# Consultas (só as linhas do período/filtros)
+# =============================
+def _onde(inicio=None, fim=None, filtros: dict | None = None) -> tuple[str, list]:
+    """Cláusula WHERE e parâmetros no mesmo formato de filtro do IndiceROI."""
+    cond, params = [], []
+    if inicio is not None:
+        cond.append(f"{_q('Data Início')} >= ?")
+        params.append(_texto_data(inicio))
+    if fim is not None:
+        cond.append(f"{_q('Data Início')} < ?")
+        params.append(_texto_data(fim))
+    for col, valores in (filtros or {}).items():
+        if valores:
+            cond.append(f"{_q(col)} IN ({', '.join('?' * len(valores))})")
+            params.extend(str(v) for v in valores)
+    return (" WHERE " + " AND ".join(cond)) if cond else "", params
+
+
+def _consulta(db: str, sql: str, params: list | None = None) -> pd.DataFrame:
+    con = conectar(db)
+    try:
+        return pd.read_sql_query(sql, con, params=params or [])
+    finally:
+        con.close()
+
+
+def linhas(db: str, colunas: list[str] | None = None, inicio=None, fim=None,
+           filtros: dict | None = None) -> pd.DataFrame:
+    """Linhas formatadas do período/filtros, só com as `colunas` pedidas."""
+    sel = ", ".join(map(_q, colunas)) if colunas else "*"
+    onde, params = _onde(inicio, fim, filtros)
+    return _formatar(_consulta(db, f"SELECT {sel} FROM {TABELA}{onde}", params))
+
+
+def linhas_ate(db: str, limite) -> int:
+    """Quantas linhas têm Data Início <= limite."""
+    con = conectar(db)
+    try:
+        sql = f"SELECT COUNT(*) FROM {TABELA} WHERE {_q('Data Início')} <= ?"
+        return int(con.execute(sql, (_texto_data(limite),)).fetchone()[0])
+    finally:
+        con.close()
+
+
+def outliers(db: str, limiar: float | dict, inicio=None, fim=None, filtros: dict | None = None,
+             max_linhas: int = MAX_OUTLIERS) -> pd.DataFrame:
+    """Como roiStreaming.outliers_em_blocos, com o limiar aplicado no SQL."""
+    onde, params = _onde(inicio, fim, filtros)
+    if isinstance(limiar, dict):
+        if not limiar:
+            return pd.DataFrame()
+        casos = " ".join("WHEN ? THEN ?" for _ in limiar)
+        expr = f"CASE {_q('Job')} {casos} END"
+        lim_params = [v for job, lim in limiar.items() for v in (str(job), float(lim))]
+    else:
+        expr, lim_params = "?", [float(limiar)]
+    cond = f"{_q('Duracao_min')} > {expr}"
+    onde = f"{onde} AND {cond}" if onde else f" WHERE {cond}"
+    out = _consulta(
+        db,
+        f"SELECT * FROM {TABELA}{onde} ORDER BY {_q('Duracao_min')} DESC LIMIT ?",
+        params + lim_params + [max_linhas],
+    )
+    if out.empty:
+        return pd.DataFrame()
+    return _formatar(out)
+
+
+def variancia_jobs(db: str, top_n: int = 10, inicio=None, fim=None, filtros: dict | None = None) -> pd.DataFrame:
+    """Desvio padrão amostral por Job em duas passadas (média, depois desvios), sem perder precisão."""
+    onde, params = _onde(inicio, fim, filtros)
+    job, dur = _q("Job"), _q("Duracao_min")
+    out = _consulta(
+        db,
+        f"WITH f AS (SELECT {job}, {dur} FROM {TABELA}{onde}), "
+        f"m AS (SELECT {job}, AVG({dur}) AS media FROM f GROUP BY 1) "
+        f"SELECT f.{job} AS {job}, "
+        f"SUM((f.{dur} - m.media) * (f.{dur} - m.media)) / NULLIF(COUNT(f.{dur}) - 1, 0) AS var "
+        f"FROM f JOIN m ON f.{job} = m.{job} GROUP BY 1",
+        params,
+    )
+    out["Desvio padrão (min)"] = np.sqrt(out.pop("var").astype("float64"))
+    return out.sort_values("Desvio padrão (min)", ascending=False).head(top_n).reset_index(drop=True)
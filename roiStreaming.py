@@ -0,0 +1,124 @@
+"""
+Modo streaming do ROI para CSVs maiores que a memória.
+
+O CSV é lido em blocos de tamanho fixo; cada bloco passa por
+formatacao_csv e alimenta agregadores combináveis (cubo, Welford por Job,
+sketch de quantis) e é descartado em seguida. A memória usada depende do
+tamanho do bloco e do número de grupos, não do tamanho do arquivo.
+"""
+from typing import Callable, Iterable, Iterator
+
+import pandas as pd
+
+from csvLoader import formatacao_csv, compactar_schema, particionada, ler_particoes, CATEGORICAS
+from roiAgregados import montar_cubo, merge_cubos, cubo_vazio, WelfordPorGrupo, SketchPorGrupo, SketchPorDia
+
+LINHAS_POR_BLOCO = 200_000
+# teto de linhas guardadas na tabela de outliers do modo streaming
+MAX_OUTLIERS = 5_000
+
+
+def ler_em_blocos(path: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> Iterator[pd.DataFrame]:
+    """Blocos já formatados do CSV do ROI."""
+    leitor = pd.read_csv(
+        path, sep=";", encoding="latin1", chunksize=linhas_por_bloco,
+        dtype={col: "category" for col in CATEGORICAS},
+    )
+    with leitor:
+        for bloco in leitor:
+            yield formatacao_csv(bloco, copiar=False)
+
+
+def agregar_em_blocos(path: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> dict:
+    """
+    Uma passada pelo arquivo em blocos. Devolve:
+      - cubo: cubo de agregados (roiAgregados)
+      - welford: média/desvio por Job (WelfordPorGrupo)
+      - sketch: sketches de Duracao_min por Job (SketchPorGrupo)
+      - sketch_dia: sketches por dia e Job/Node (SketchPorDia)
+      - linhas: total de linhas lidas
+    """
+    return agregar_blocos(ler_em_blocos(path, linhas_por_bloco))
+
+
+def agregar_blocos(blocos: Iterable[pd.DataFrame], ao_ler: Callable[[pd.DataFrame], None] | None = None) -> dict:
+    """
+    Agregados de agregar_em_blocos a partir de blocos já formatados de
+    qualquer origem; `ao_ler` recebe cada bloco antes de ele ser descartado
+    (ex.: gravar as linhas em outro lugar na mesma passada).
+    """
+    cubo = cubo_vazio()
+    welford = WelfordPorGrupo("Job")
+    sketch = SketchPorGrupo("Job")
+    sketch_dia = SketchPorDia()
+    linhas = 0
+    for bloco in blocos:
+        if ao_ler is not None:
+            ao_ler(bloco)
+        cubo = merge_cubos(cubo, montar_cubo(bloco))
+        welford.update(bloco)
+        sketch.update(bloco)
+        sketch_dia.update(bloco)
+        linhas += len(bloco)
+    return {"cubo": cubo, "welford": welford, "sketch": sketch, "sketch_dia": sketch_dia, "linhas": linhas}
+
+
+def mascara_filtros(bloco: pd.DataFrame, inicio=None, fim=None, filtros: dict | None = None) -> pd.Series:
+    """Linhas do bloco dentro do período e dos filtros (mesmo formato do IndiceROI)."""
+    mask = pd.Series(True, index=bloco.index)
+    if inicio is not None:
+        mask &= bloco["Data Início"] >= pd.Timestamp(inicio)
+    if fim is not None:
+        mask &= bloco["Data Início"] < pd.Timestamp(fim)
+    for col, valores in (filtros or {}).items():
+        if valores:
+            mask &= bloco[col].astype(str).isin([str(v) for v in valores])
+    return mask
+
+
+def blocos_filtrados(path: str, inicio=None, fim=None, filtros: dict | None = None,
+                     linhas_por_bloco: int = LINHAS_POR_BLOCO) -> Iterator[pd.DataFrame]:
+    """
+    Blocos formatados só com as linhas do período/filtros; numa fonte
+    particionada só os meses que cruzam o período são lidos.
+    """
+    if particionada(path):
+        blocos = ler_particoes(path, inicio, fim)
+    else:
+        blocos = ler_em_blocos(path, linhas_por_bloco)
+    for bloco in blocos:
+        sel = bloco[mascara_filtros(bloco, inicio, fim, filtros)]
+        if not sel.empty:
+            yield sel
+
+
+def outliers_em_blocos(path: str, limiar: float | dict, inicio=None, fim=None, filtros: dict | None = None,
+                       max_linhas: int = MAX_OUTLIERS,
+                       linhas_por_bloco: int = LINHAS_POR_BLOCO) -> pd.DataFrame:
+    """
+    Segunda passada: linhas com Duracao_min > limiar (e dentro dos filtros),
+    mantendo no máximo `max_linhas` (as de maior duração). `limiar` pode ser
+    um valor único ou {Job: limiar}. Numa fonte particionada só os meses
+    que cruzam o período são lidos.
+    """
+    if particionada(path):
+        blocos = ler_particoes(path, inicio, fim)
+    else:
+        blocos = ler_em_blocos(path, linhas_por_bloco)
+    melhores = None
+    for bloco in blocos:
+        if isinstance(limiar, dict):
+            lim = bloco["Job"].astype(str).map(limiar).astype("float64")
+        else:
+            lim = limiar
+        sel = bloco[(bloco["Duracao_min"] > lim) & mascara_filtros(bloco, inicio, fim, filtros)]
+        if sel.empty:
+            continue
+        melhores = sel if melhores is None else pd.concat([melhores, sel], ignore_index=True)
+        if len(melhores) > max_linhas:
+            melhores = melhores.nlargest(max_linhas, "Duracao_min")
+
+    if melhores is None:
+        return pd.DataFrame()
+    compactar_schema(melhores)
+    return melhores.sort_values("Duracao_min", ascending=False).reset_index(drop=True)
@@ -0,0 +1,92 @@
+"""
+Séries temporais do ROI: execuções, duração média e percentil por período
+(hora, dia, semana) e por Job ou Node.
+
+Tudo sai dos agregados incrementais (cubo por Dia/Hora e SketchPorDia), que
+só recebem as linhas novas quando o CSV cresce; nada aqui relê o CSV. A
+única exceção é o percentil por hora, que os sketches diários não têm: no
+modo em memória ele vem das linhas já filtradas.
+"""
+import pandas as pd
+
+from roiAgregados import SketchPorDia
+
+# granularidade da página -> frequência do pandas
+FREQS = {"Hora": "h", "Dia": "D", "Semana": "W"}
+
+
+def _inicio_periodo(t: pd.Series, freq: str) -> pd.Series:
+    if freq == "D":
+        return t.dt.floor("D")
+    if freq == "h":
+        return t.dt.floor("h")
+    return t.dt.to_period(freq).dt.start_time
+
+
+def serie_cubo(cubo: pd.DataFrame, freq: str = "D", por: str = "Job") -> pd.DataFrame:
+    """Execucoes e Media_min por (Periodo, `por`) a partir do cubo (já filtrado)."""
+    colunas = ["Periodo", por, "Execucoes", "Media_min"]
+    # o cubo guarda as linhas sem Data Início (Dia/Hora nulos); não entram na série
+    datado = cubo["Dia"].notna()
+    if freq == "h":
+        datado &= cubo["Hora"].notna()
+    cubo = cubo[datado]
+    if cubo.empty:
+        return pd.DataFrame(columns=colunas)
+    t = cubo["Dia"]
+    if freq == "h":
+        t = t + pd.to_timedelta(cubo["Hora"].astype("int64"), unit="h")
+    base = pd.DataFrame({
+        "Periodo": _inicio_periodo(t, freq),
+        por: cubo[por].astype(str),
+        "Execucoes": cubo["Execucoes"],
+        "N": cubo["N"],
+        "Soma_min": cubo["Soma_min"],
+    })
+    g = base.groupby(["Periodo", por], sort=True, as_index=False)[["Execucoes", "N", "Soma_min"]].sum()
+    g["Media_min"] = g["Soma_min"] / g["N"].where(g["N"] > 0)
+    return g[colunas]
+
+
+def serie_linhas(df: pd.DataFrame, q: float, freq: str = "h", por: str = "Job") -> pd.DataFrame:
+    """Execucoes, Media_min e percentil por (Periodo, `por`) direto das linhas (resample)."""
+    nome = f"p{round(q * 100)}"
+    colunas = ["Periodo", por, "Execucoes", "Media_min", nome]
+    if df.empty:
+        return pd.DataFrame(columns=colunas)
+    base = pd.DataFrame({
+        "Data Início": df["Data Início"],
+        por: df[por].astype(str),
+        "Duracao_min": df["Duracao_min"].astype("float64"),
+    })
+    grupos = base.groupby([pd.Grouper(key="Data Início", freq=freq), por], observed=True)["Duracao_min"]
+    g = grupos.agg(Execucoes="size", Media_min="mean")
+    g[nome] = grupos.quantile(q)
+    g = g.reset_index().rename(columns={"Data Início": "Periodo"})
+    return g[g["Execucoes"] > 0][colunas].reset_index(drop=True)
+
+
+def tendencias(cubo: pd.DataFrame, sketch_dia: SketchPorDia | None, q: float, freq: str = "D",
+               por: str = "Job", inicio=None, fim=None, filtros: dict | None = None,
+               df: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Periodo, `por`, Execucoes, Media_min e o percentil q (coluna "p95" etc.).
+    `cubo` e `df` já devem vir filtrados; o percentil diário/semanal sai de
+    `sketch_dia`, recortado pelo período e pelos valores de `por` em
+    `filtros`. Por hora, o percentil precisa de `df` (modo em memória);
+    sem ele a coluna fica vazia.
+    """
+    nome = f"p{round(q * 100)}"
+    if freq == "h":
+        if df is not None:
+            return serie_linhas(df, q, freq, por)
+        out = serie_cubo(cubo, freq, por)
+        out[nome] = float("nan")
+        return out
+
+    out = serie_cubo(cubo, freq, por)
+    if sketch_dia is None or out.empty:
+        out[nome] = float("nan")
+        return out
+    pct = sketch_dia.serie(por, q, freq, inicio, fim, (filtros or {}).get(por))
+    return out.merge(pct, on=["Periodo", por], how="left")
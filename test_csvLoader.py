@@ -0,0 +1,111 @@
+"""Testes do cache incremental do roi.csv (csvLoader)."""
+import pandas as pd
+import pytest
+
+import csvLoader
+from benchmarks.gerador import gerar_roi
+from roiAgregados import CHAVES
+
+LINHAS = 3_000
+NOVAS = 400
+
+
+def _linhas(df: pd.DataFrame) -> tuple[bytes, list[bytes]]:
+    """Cabeçalho e linhas do CSV, como o export do ROI grava."""
+    texto = df.to_csv(sep=";", index=False, lineterminator="\n").encode("latin1")
+    header, *corpo = texto.splitlines(keepends=True)
+    return header, corpo
+
+
+def _gravar(path, header: bytes, corpo: list[bytes]) -> None:
+    path.write_bytes(header + b"".join(corpo))
+
+
+def _carregar(path, cache_dir, monkeypatch) -> tuple[dict, dict]:
+    monkeypatch.setenv("ROI_CACHE_DIR", str(cache_dir))
+    dados = csvLoader.load_roi_dados(str(path))
+    meta = csvLoader._read_meta(csvLoader._cache_paths(str(path))[1])
+    return dados, meta
+
+
+def _mesmos_dados(a: dict, b: dict) -> None:
+    """Resultado incremental x rebuild do mesmo arquivo."""
+    df_a = a["df"].sort_values("Código").reset_index(drop=True)
+    df_b = b["df"].sort_values("Código").reset_index(drop=True)
+    pd.testing.assert_frame_equal(df_a, df_b, check_dtype=False, check_categorical=False)
+
+    cubo_a = a["cubo"].sort_values(CHAVES).reset_index(drop=True)
+    cubo_b = b["cubo"].sort_values(CHAVES).reset_index(drop=True)
+    pd.testing.assert_frame_equal(cubo_a, cubo_b, check_dtype=False, check_categorical=False)
+
+    pd.testing.assert_frame_equal(a["sketch"].quantis(), b["sketch"].quantis())
+    cols = ["Dimensao", "Grupo", "Dia", "Balde"]
+    dia_a = a["sketch_dia"].para_tabela().sort_values(cols).reset_index(drop=True)
+    dia_b = b["sketch_dia"].para_tabela().sort_values(cols).reset_index(drop=True)
+    pd.testing.assert_frame_equal(dia_a, dia_b, check_dtype=False)
+
+
+@pytest.fixture
+def roi():
+    # mais recente primeiro (Código decrescente), como o export do ROI
+    return gerar_roi(LINHAS, seed=1)
+
+
+def test_append_igual_ao_rebuild(roi, tmp_path, monkeypatch):
+    header, corpo = _linhas(roi.iloc[::-1])  # Código crescente: linhas novas no fim
+    csv = tmp_path / "roi.csv"
+    _gravar(csv, header, corpo[:-NOVAS])
+    _carregar(csv, tmp_path / "cache", monkeypatch)
+
+    _gravar(csv, header, corpo)
+    dados, meta = _carregar(csv, tmp_path / "cache", monkeypatch)
+    assert meta["hash"] is None  # caminho incremental
+    assert len(meta["parts"]) == 2
+    assert len(dados["df"]) == LINHAS
+
+    rebuild, _ = _carregar(csv, tmp_path / "cache_rebuild", monkeypatch)
+    _mesmos_dados(dados, rebuild)
+
+
+def test_prepend_igual_ao_rebuild(roi, tmp_path, monkeypatch):
+    header, corpo = _linhas(roi)  # Código decrescente: linhas novas no começo
+    csv = tmp_path / "roi.csv"
+    _gravar(csv, header, corpo[NOVAS:])
+    _carregar(csv, tmp_path / "cache", monkeypatch)
+
+    _gravar(csv, header, corpo)
+    dados, meta = _carregar(csv, tmp_path / "cache", monkeypatch)
+    assert meta["hash"] is None
+    assert len(dados["df"]) == LINHAS
+
+    rebuild, _ = _carregar(csv, tmp_path / "cache_rebuild", monkeypatch)
+    _mesmos_dados(dados, rebuild)
+
+
+def test_append_com_codigo_menor_refaz_o_cache(roi, tmp_path, monkeypatch):
+    """Linhas anexadas com Código já coberto não podem sumir: cai no rebuild."""
+    header, corpo = _linhas(roi)  # Código decrescente: anexar no fim traz Código menor
+    csv = tmp_path / "roi.csv"
+    _gravar(csv, header, corpo[:-NOVAS])
+    _carregar(csv, tmp_path / "cache", monkeypatch)
+
+    _gravar(csv, header, corpo)
+    dados, meta = _carregar(csv, tmp_path / "cache", monkeypatch)
+    assert meta["hash"] is not None  # rebuild completo
+    assert len(dados["df"]) == LINHAS
+    # a leitura seguinte (cache quente) continua com todas as linhas
+    quente, _ = _carregar(csv, tmp_path / "cache", monkeypatch)
+    assert len(quente["df"]) == LINHAS
+
+    rebuild, _ = _carregar(csv, tmp_path / "cache_rebuild", monkeypatch)
+    _mesmos_dados(dados, rebuild)
+
+
+def test_arquivo_sem_mudanca_le_do_cache(roi, tmp_path, monkeypatch):
+    header, corpo = _linhas(roi)
+    csv = tmp_path / "roi.csv"
+    _gravar(csv, header, corpo)
+    primeiro, meta = _carregar(csv, tmp_path / "cache", monkeypatch)
+    segundo, meta2 = _carregar(csv, tmp_path / "cache", monkeypatch)
+    assert meta2 == meta
+    _mesmos_dados(primeiro, segundo)
@@ -0,0 +1,50 @@
+"""Testes da gravação em blocos (exportacao)."""
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from exportacao import gravar_blocos
+
+
+def _blocos(*frames):
+    return iter(frames)
+
+
+def test_parquet_coluna_nula_no_primeiro_bloco(tmp_path):
+    """Texto opcional vazio no primeiro bloco não trava os blocos seguintes."""
+    destino = str(tmp_path / "roi.parquet")
+    b1 = pd.DataFrame({"Código": [1, 2], "Obs": pd.Series([None, None], dtype=object)})
+    b2 = pd.DataFrame({"Código": [3, 4], "Obs": ["a", None]})
+    gravar_blocos(_blocos(b1, b2), destino, "Parquet")
+
+    lido = pd.read_parquet(destino)
+    assert lido["Código"].tolist() == [1, 2, 3, 4]
+    assert lido["Obs"].isna().tolist() == [True, True, False, True]
+    assert lido["Obs"].iat[2] == "a"
+
+
+def test_parquet_larguras_diferentes_por_bloco(tmp_path):
+    """int16/int32 e float32/float64 em blocos diferentes viram um esquema só."""
+    destino = str(tmp_path / "roi.parquet")
+    b1 = pd.DataFrame({"Código": np.array([1, 2], dtype="int16"),
+                       "Duracao_min": np.array([1.5, np.nan], dtype="float32"),
+                       "Job": pd.Categorical(["A", "B"])})
+    b2 = pd.DataFrame({"Código": np.array([70_000], dtype="int32"),
+                       "Duracao_min": np.array([2.25], dtype="float64"),
+                       "Job": pd.Categorical(["C"])})
+    progresso = []
+    gravar_blocos(_blocos(b1, b2), destino, "Parquet", progresso.append)
+
+    arquivo = pq.ParquetFile(destino)
+    assert arquivo.metadata.num_row_groups == 2
+    assert progresso == [2, 1]
+    lido = pd.read_parquet(destino)
+    assert lido["Código"].tolist() == [1, 2, 70_000]
+    assert lido["Job"].tolist() == ["A", "B", "C"]
+    np.testing.assert_allclose(lido["Duracao_min"], [1.5, np.nan, 2.25])
+
+
+def test_parquet_sem_blocos(tmp_path):
+    destino = str(tmp_path / "vazio.parquet")
+    gravar_blocos(_blocos(), destino, "Parquet")
+    assert pd.read_parquet(destino).empty
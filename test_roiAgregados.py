@@ -0,0 +1,90 @@
+"""Testes dos sketches e do cubo (roiAgregados)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.gerador import gerar_roi
+from csvLoader import formatacao_csv
+from roiAgregados import CHAVES, SketchPorGrupo, SketchQuantil, merge_cubos, montar_cubo
+
+ERRO = 0.01
+
+
+def _exato(valores: np.ndarray, q: float) -> float:
+    """Mesmo posto que SketchQuantil.quantil usa: floor(q * (n - 1))."""
+    return float(np.sort(valores)[int(q * (len(valores) - 1))])
+
+
+@pytest.fixture
+def duracoes():
+    rng = np.random.default_rng(7)
+    return rng.lognormal(mean=1.0, sigma=1.5, size=50_000)
+
+
+@pytest.mark.parametrize("q", [0.0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0])
+def test_quantil_dentro_do_erro_relativo(duracoes, q):
+    sk = SketchQuantil(ERRO)
+    sk.update(duracoes)
+    exato = _exato(duracoes, q)
+    assert abs(sk.quantil(q) - exato) <= ERRO * exato * (1 + 1e-9)
+
+
+def test_merge_igual_ao_sketch_do_todo(duracoes):
+    partes = np.array_split(duracoes, 7)
+    combinado = SketchQuantil(ERRO)
+    for parte in partes:
+        sk = SketchQuantil(ERRO)
+        sk.update(parte)
+        combinado.merge(sk)
+    todo = SketchQuantil(ERRO)
+    todo.update(duracoes)
+
+    assert combinado.n == todo.n == len(duracoes)
+    idx_a, cont_a = combinado.para_baldes()
+    idx_b, cont_b = todo.para_baldes()
+    np.testing.assert_array_equal(idx_a, idx_b)
+    np.testing.assert_array_equal(cont_a, cont_b)
+
+
+def test_zeros_e_nan():
+    sk = SketchQuantil(ERRO)
+    sk.update([0.0, 0.0, np.nan, 2.0, 4.0])
+    assert sk.n == 4
+    assert sk.zeros == 2
+    assert sk.quantil(0.0) == 0.0
+    assert abs(sk.quantil(1.0) - 4.0) <= ERRO * 4.0
+    assert np.isnan(SketchQuantil(ERRO).quantil(0.5))
+
+
+def test_baldes_ida_e_volta(duracoes):
+    sk = SketchQuantil(ERRO)
+    sk.update(np.concatenate([duracoes, [0.0]]))
+    volta = SketchQuantil.de_baldes(*sk.para_baldes(), erro=ERRO)
+    assert volta.n == sk.n
+    for q in (0.0, 0.5, 0.99):
+        assert volta.quantil(q) == sk.quantil(q)
+
+
+def test_sketch_por_grupo_tabela_e_merge():
+    df = formatacao_csv(gerar_roi(5_000, seed=3))
+    metade = len(df) // 2
+    a, b = SketchPorGrupo(), SketchPorGrupo()
+    a.update(df.iloc[:metade])
+    b.update(df.iloc[metade:])
+    a.merge(b)
+    todo = SketchPorGrupo()
+    todo.update(df)
+    pd.testing.assert_frame_equal(a.quantis(), todo.quantis())
+
+    volta = SketchPorGrupo.de_tabela(todo.para_tabela())
+    pd.testing.assert_frame_equal(volta.quantis(), todo.quantis())
+
+
+def test_merge_cubos_igual_ao_cubo_do_todo():
+    df = formatacao_csv(gerar_roi(5_000, seed=4))
+    metade = len(df) // 2
+    combinado = merge_cubos(montar_cubo(df.iloc[:metade]), montar_cubo(df.iloc[metade:]))
+    todo = montar_cubo(df)
+    combinado = combinado.sort_values(CHAVES).reset_index(drop=True)
+    todo = todo.sort_values(CHAVES).reset_index(drop=True)
+    pd.testing.assert_frame_equal(combinado, todo, check_dtype=False, check_categorical=False)